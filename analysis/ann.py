@@ -0,0 +1,99 @@
+"""
+近似最近邻检索：基于MiniBatchKMeans质心的倒排文件索引（IVF），用于任意文本的"相似文档"查询
+
+- 构建：文档向量（已L2归一化）聚成n_lists个簇，质心归一化后作为粗量化器；
+  每篇文档归入最近的簇，倒排表以 (按簇排序的行号, 各簇起始位置) 两个数组保存
+- 查询：先与全部质心计算相似度，取最相近的nprobe个簇，只对这些簇中的文档计算精确相似度
+- nprobe越大召回率越高、延迟越高；nprobe = n_lists 时等同于精确检索（见 bench_ann.py）
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import normalize
+
+DEFAULT_NPROBE = 8
+
+
+class IVFIndex:
+    """
+    :param matrix: 构建索引时的文档矩阵，候选文档的相似度在该矩阵上计算
+    :param version: 构建时DocumentStore的矩阵版本，用于判断是否过期
+    """
+
+    def __init__(self, matrix, centroids, order, offsets, version=None):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.version = version
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    @property
+    def n_docs(self):
+        return self.matrix.shape[0]
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, batch_size=1000, max_iter=100, random_state=42, version=None):
+        """
+        :param n_lists: 簇的数量，默认为文档数的平方根
+        """
+        # 复制一份：快照的只读mmap数组不能直接交给MiniBatchKMeans
+        matrix = csr_matrix(matrix, dtype=np.float32, copy=True)
+        n_docs = matrix.shape[0]
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_docs))
+        n_lists = max(min(n_lists, n_docs), 1)
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists,
+            random_state=random_state,
+            n_init=3,
+            batch_size=batch_size,
+            max_iter=max_iter
+        )
+        labels = kmeans.fit_predict(matrix)
+        # 文档向量为单位向量，质心归一化后按余弦相似度选择簇
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        order = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.searchsorted(labels[order], np.arange(n_lists + 1)).astype(np.int64)
+        return cls(matrix, centroids, order, offsets, version)
+
+    def search(self, vector, top=10, nprobe=DEFAULT_NPROBE):
+        """
+        :param vector: 1×n_features的稀疏查询向量（已L2归一化），多出的列（索引之后的新词）被忽略
+        :return: (行号数组, 相似度数组)，按相似度从高到低排列
+        """
+        vector = csr_matrix(vector, dtype=np.float32)[:, :self.matrix.shape[1]]
+        nprobe = max(min(nprobe, self.n_lists), 1)
+        centroid_scores = np.asarray(vector @ self.centroids.T).ravel()
+        if nprobe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.n_lists)
+
+        candidates = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in probes])
+        scores = (self.matrix[candidates] @ vector.T).toarray().ravel()
+        return top_k(candidates, scores, top)
+
+
+def exact_search(matrix, vector, top=10):
+    """精确检索，作为召回率的基准"""
+    scores = (matrix @ csr_matrix(vector, dtype=np.float32)[:, :matrix.shape[1]].T).toarray().ravel()
+    return top_k(np.arange(matrix.shape[0], dtype=np.int32), scores, top)
+
+
+def top_k(candidates, scores, top):
+    """候选中相似度最高的top个（相似度为0的不返回）"""
+    if top <= 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    if top < scores.size:
+        best = np.argpartition(-scores, top - 1)[:top]
+    else:
+        best = np.arange(scores.size)
+    best = best[np.argsort(-scores[best], kind='stable')]
+    best = best[scores[best] > 0]
+    return candidates[best].astype(np.int32), scores[best].astype(np.float32)
@@ -14,6 +14,30 @@ def create_app():
         'timeout': 30,
         'retries': 3
     }
+    # 文档库：启动后在后台增量读取爬虫新写入的页面
+    app.config['DOCUMENT_STORE'] = {
+        'incremental': True,
+        'poll_interval': 2.0
+    }
+    # 查重的相似度连接：每块行数与并行进程数（-1为全部CPU核心）
+    app.config['SIMILARITY_JOIN'] = {
+        'block_size': 2048,
+        'n_jobs': -1
+    }
+    # 相似文档的top-k近邻图：每篇文档保留的近邻数、每块行数、并行进程数、两次重建的最短间隔（秒）
+    app.config['NEIGHBORS'] = {
+        'k': 50,
+        'block_size': 256,
+        'n_jobs': -1,
+        'rebuild_interval': 300
+    }
+    # 任意文本检索的IVF索引：簇数量（None为文档数的平方根）、默认查询的簇数、两次重建的最短间隔（秒）
+    # nprobe越大召回率越高、延迟越高，可用 bench_ann.py 测量
+    app.config['ANN'] = {
+        'n_lists': None,
+        'nprobe': 8,
+        'rebuild_interval': 300
+    }
     
     # 初始化核心组件
     app.document_store = DocumentStore()
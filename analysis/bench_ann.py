@@ -0,0 +1,56 @@
+"""
+IVF近似检索的召回率基准：以语料中随机抽取的文档向量为查询，对比精确检索的top-k结果，
+输出不同nprobe下的召回率与单次查询延迟，用于选择 app.config['ANN'] 中的nprobe
+
+用法: python bench_ann.py [查询数] [top] [簇数量]
+"""
+import sys
+import time
+import numpy as np
+from ann import IVFIndex, exact_search
+from document_store import DocumentStore
+
+
+def timed_search(search, queries):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def report(name, latencies, recall=None):
+    recall = f'recall: {recall:.3f} | ' if recall is not None else ''
+    print(f'{name:>12}: {recall}avg: {latencies.mean():.2f}ms | '
+          f'p50: {np.percentile(latencies, 50):.2f}ms | p99: {np.percentile(latencies, 99):.2f}ms')
+
+
+if __name__ == '__main__':
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    n_lists = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    store = DocumentStore()
+    store.load(background=False)
+    matrix = store.tfidf_matrix
+    if matrix is None or matrix.shape[0] == 0:
+        sys.exit('No documents found')
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists)
+    print(f'{index.n_docs} documents, {index.n_lists} lists, built in {time.perf_counter() - start:.2f}s')
+
+    rng = np.random.default_rng(42)
+    rows = rng.choice(matrix.shape[0], size=min(n_queries, matrix.shape[0]), replace=False)
+    queries = [matrix[row] for row in rows]
+
+    truth, latencies = timed_search(lambda query: exact_search(index.matrix, query, top), queries)
+    report('exact', latencies)
+
+    nprobes = sorted({n for n in (1, 2, 4, 8, 16, 32, 64) if n < index.n_lists} | {index.n_lists})
+    for nprobe in nprobes:
+        results, latencies = timed_search(lambda query: index.search(query, top, nprobe), queries)
+        recalls = [len(set(found.tolist()) & set(expected.tolist())) / len(expected)
+                   for found, expected in zip(results, truth) if len(expected)]
+        report(f'nprobe={nprobe}', latencies, sum(recalls) / max(len(recalls), 1))
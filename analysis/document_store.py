@@ -1,34 +1,194 @@
+import time
+import threading
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy.sparse import csr_matrix
 from sklearn.cluster import MiniBatchKMeans
 from sklearn.preprocessing import Normalizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.exceptions import NotFittedError
 from collections import defaultdict
+from utils import iter_documents, corpus_manifest, corpus_cursors, read_new_documents
+from snapshot import create_vectorizer, load_snapshot, save_snapshot
+from incremental import IncrementalIndex
+from similarity import DEFAULT_BLOCK_SIZE, similarity_join
+from ann import DEFAULT_NPROBE, IVFIndex, exact_search
+from neighbors import DEFAULT_K, DEFAULT_BLOCK_SIZE as NEIGHBOR_BLOCK_SIZE, NeighborGraph, build_neighbor_graph, search_row
 
 class DocumentStore:
     def __init__(self):
         self.documents = []
-        self.vectorizer = TfidfVectorizer(tokenizer=lambda x: x.split(), lowercase=False)
+        self._vectorizer = create_vectorizer()
+        self._snapshot = None
         self.tfidf_matrix = None
         self._is_fitted = False
         self.cluster_cache = {}
+        self.duplicate_cache = {'version': None, 'results': {}}
+        # 矩阵每次替换时递增，依赖矩阵的缓存据此判断是否过期
+        self.version = 0
+        self._rebuild_thread = None
+        # 增量模式：各站点已读取到的位置、追加式索引、文档名到行号的映射
+        self._cursors = None
+        self._index = None
+        self._rows = None
+        self._poll_thread = None
+        # top-k近邻图及其后台构建线程
+        self._neighbors = None
+        self._neighbors_built = None
+        self._neighbor_thread = None
+        self._neighbor_lock = threading.Lock()
+        # 任意文本检索用的IVF近似索引
+        self._ann = None
+        self._ann_built = None
+        self._ann_thread = None
+        self._ann_lock = threading.Lock()
 
-    def load_documents(self, files):
+    @property
+    def vectorizer(self):
+        """从快照加载或增量更新后，首次需要转换新文本时才还原向量化器"""
+        if self._vectorizer is None:
+            if self._index is not None:
+                self._vectorizer = self._index.vectorizer()
+            elif self._snapshot is not None:
+                self._vectorizer = self._snapshot.vectorizer()
+        return self._vectorizer
+
+    def load(self, rebuild=False, background=True, incremental=False, poll_interval=2.0):
+        """
+        从磁盘快照加载TF-IDF模型和矩阵，快照与语料清单不一致时重新拟合并保存
+        :param rebuild: 忽略快照强制重新拟合
+        :param background: 已有过期快照时先使用它，在后台线程中重新拟合后替换
+        :param incremental: 启动后台线程增量读取新页面；过期快照不再重新拟合，而是从快照记录的位置追加
+        """
+        manifest = corpus_manifest()
+        snapshot = None if rebuild else load_snapshot()
+        if snapshot is not None:
+            self._apply_snapshot(snapshot)
+            if snapshot.digest == manifest['digest']:
+                print(f"Loaded TF-IDF snapshot {snapshot.path} ({len(self.documents)} documents)")
+            elif incremental and self._cursors is not None:
+                print("TF-IDF snapshot is stale, catching up incrementally")
+            elif background:
+                print("TF-IDF snapshot is stale, rebuilding in background")
+                self._rebuild_thread = threading.Thread(target=self._rebuild, args=(manifest,), daemon=True)
+                self._rebuild_thread.start()
+            else:
+                self._rebuild(manifest)
+        else:
+            self._rebuild(manifest)
+
+        if incremental:
+            self.start_incremental(poll_interval)
+
+    def _rebuild(self, manifest):
+        """读取全部文档重新拟合，并保存为新快照"""
+        # 先记录读取位置，拟合期间新写入的页面随后由增量更新读取
+        cursors = corpus_cursors()
+        store = DocumentStore()
+        store.load_documents(iter_documents())
+        if store._is_fitted:
+            save_snapshot(manifest['digest'], store.documents, store.vectorizer, store.tfidf_matrix, cursors)
+        self._vectorizer, self._snapshot, self._index, self._rows = store._vectorizer, None, None, None
+        self.documents, self.tfidf_matrix = store.documents, store.tfidf_matrix
+        self._is_fitted = store._is_fitted
+        self._cursors = cursors
+        self.cluster_cache = {}
+        self._neighbors = None
+        self._ann = None
+        self.version += 1
+
+    def _apply_snapshot(self, snapshot):
+        self._snapshot = snapshot
+        self._vectorizer, self._index, self._rows = None, None, None
+        self.documents = snapshot.documents
+        self.tfidf_matrix = snapshot.matrix
+        self._is_fitted = True
+        self._cursors = snapshot.cursors
+        self.cluster_cache = {}
+        self.version += 1
+        # 快照目录中已有近邻图时直接映射加载
+        self._neighbors = NeighborGraph.load(snapshot.path, self.version)
+        self._ann = None
+
+    def start_incremental(self, poll_interval=2.0):
+        """后台线程定期读取爬虫新写入的页面，几秒内即可被相似文档、查重和聚类接口使用"""
+        if self._poll_thread is not None:
+            return
+        self._poll_thread = threading.Thread(target=self._poll, args=(poll_interval,), daemon=True)
+        self._poll_thread.start()
+
+    def _poll(self, poll_interval):
+        while True:
+            # 后台重新拟合期间不做增量更新，完成后从拟合前记录的位置继续
+            if self._rebuild_thread is None or not self._rebuild_thread.is_alive():
+                try:
+                    added = self.refresh()
+                    if added:
+                        print(f"Merged {added} new or updated documents")
+                except Exception as e:
+                    print(f"[Incremental Error] 增量更新失败: {str(e)}")
+            time.sleep(poll_interval)
+
+    def refresh(self):
+        """读取上次之后新写入或更新的页面，合并到索引中，返回合并的文档数"""
+        if self._cursors is None:
+            self._cursors = corpus_cursors()
+            return 0
+        new_documents, cursors = read_new_documents(self._cursors)
+        if not new_documents:
+            self._cursors = cursors
+            return 0
+
+        if self._index is None:
+            self._index = self._create_index()
+        if self._rows is None:
+            self._rows = {doc['name']: i for i, doc in enumerate(self.documents)}
+        documents = list(self.documents)
+        for file, text in new_documents:
+            row = self._rows.get(file['name'])
+            if row is None:
+                row = self._rows[file['name']] = len(documents)
+                documents.append(file)
+            else:
+                documents[row] = file
+            self._index.add(row, text.strip())
+
+        matrix, _ = self._index.merge()
+        # 先替换文档目录再替换矩阵，并发请求中的行号始终有对应的文档
+        self.documents = documents
+        self.tfidf_matrix = matrix
+        self._vectorizer = None
+        self._is_fitted = True
+        self._cursors = cursors
+        self._mark_stale()
+        self.version += 1
+        return len(new_documents)
+
+    def _create_index(self):
+        if not self._is_fitted:
+            return IncrementalIndex({}, np.zeros(0), 0, csr_matrix((0, 0)))
+        vectorizer = self.vectorizer
+        return IncrementalIndex.from_fitted(vectorizer.vocabulary_, vectorizer.idf_, self.tfidf_matrix)
+
+    def _mark_stale(self):
+        """语料变化后已缓存的聚类结果不再准确，标记为过期而不是删除"""
+        for result in self.cluster_cache.values():
+            result["stale"] = True
+
+    def load_documents(self, documents):
+        """
+        :param documents: (文档条目, 处理后文本) 的可迭代对象，见 utils.iter_documents
+        """
         processed_docs = []
         self.documents = []
 
-        for file in files:
-            try:
-                with open(file['processed_path'], 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    processed_docs.append(content)
-                    self.documents.append(file)
-            except Exception as e:
-                print(f"Error loading {file['processed_path']}: {str(e)}")
+        for file, content in documents:
+            processed_docs.append(content.strip())
+            self.documents.append(file)
 
         try:
-            self.tfidf_matrix = self.vectorizer.fit_transform(processed_docs)
+            self._vectorizer = create_vectorizer()
+            self._snapshot = None
+            self.tfidf_matrix = self._vectorizer.fit_transform(processed_docs)
             self._is_fitted = True
         except ValueError:
             self.tfidf_matrix = None
@@ -42,14 +202,142 @@ class DocumentStore:
         vec2 = self.tfidf_matrix[idx2]
         return cosine_similarity(vec1, vec2)[0][0]
 
-    def cluster_documents(self, n_clusters=20):
+    def find_duplicates(self, threshold, block_size=DEFAULT_BLOCK_SIZE, n_jobs=1):
+        """
+        相似度不低于threshold的全部文档对，按阈值缓存到矩阵下次替换为止
+        :return: (行号, 列号, 相似度) 三个数组，按相似度从高到低排列
+        """
+        # 先取版本号再取矩阵：期间矩阵被替换时结果记在旧版本下，下次请求重新计算
+        version, matrix = self.version, self.tfidf_matrix
+        if matrix is None:
+            empty = np.zeros(0, dtype=np.int32)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+
+        cache = self.duplicate_cache
+        if cache['version'] != version:
+            cache = self.duplicate_cache = {'version': version, 'results': {}}
+        results = cache['results']
+        if threshold in results:
+            return results[threshold]
+
+        # 更低阈值的结果包含当前阈值的全部文档对，直接过滤
+        lower = [t for t in results if t < threshold]
+        if lower:
+            rows, cols, scores = results[max(lower)]
+            mask = scores >= threshold
+            pairs = rows[mask], cols[mask], scores[mask]
+        else:
+            pairs = similarity_join(matrix, threshold, block_size, n_jobs)
+        results[threshold] = pairs
+        return pairs
+
+    def schedule_neighbors(self, k=DEFAULT_K, block_size=NEIGHBOR_BLOCK_SIZE, n_jobs=1, rebuild_interval=300):
+        """
+        近邻图不存在或已过期时在后台线程中重新构建
+        :param rebuild_interval: 两次构建的最短间隔（秒），增量更新频繁时避免持续重建
+        """
+        graph = self._neighbors
+        if graph is not None and graph.version == self.version:
+            return
+        with self._neighbor_lock:
+            if self._neighbor_thread is not None and self._neighbor_thread.is_alive():
+                return
+            if graph is not None and time.monotonic() - self._neighbors_built < rebuild_interval:
+                return
+            self._neighbor_thread = threading.Thread(
+                target=self._build_neighbors, args=(k, block_size, n_jobs), daemon=True
+            )
+            self._neighbor_thread.start()
+
+    def _build_neighbors(self, k, block_size, n_jobs):
+        version, matrix, snapshot = self.version, self.tfidf_matrix, self._snapshot
+        if matrix is None:
+            return
+        try:
+            started = time.perf_counter()
+            graph = build_neighbor_graph(matrix, k, block_size, n_jobs, version)
+            # 矩阵仍是快照中的矩阵时，近邻图随快照保存，下次启动直接加载
+            if snapshot is not None and snapshot.matrix is matrix:
+                graph.save(snapshot.path)
+            self._neighbors = graph
+            print(f"Built top-{graph.k} neighbor graph for {graph.n_docs} documents "
+                  f"in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"[Neighbors Error] 近邻图构建失败: {str(e)}")
+        finally:
+            self._neighbors_built = time.monotonic()
+
+    def similar_documents(self, doc_index, top=5, threshold=0.0, **neighbor_options):
+        """
+        与指定文档最相似的文档，返回 (行号数组, 相似度数组)
+        近邻图覆盖该文档且top不超过k时只需切片；语料更新后在重建完成前继续使用旧近邻图，
+        新增文档或top超过k时退回单行精确计算
+        """
+        # 先取矩阵再取近邻图：近邻图的行数不会超过矩阵
+        matrix = self.tfidf_matrix
+        if matrix is None or not 0 <= doc_index < matrix.shape[0]:
+            raise IndexError("Invalid document index")
+        self.schedule_neighbors(**neighbor_options)
+        graph = self._neighbors
+        if graph is not None and doc_index < graph.n_docs and top <= graph.k:
+            return graph.neighbors(doc_index, top, threshold)
+        return search_row(matrix, doc_index, top, threshold)
+
+    def schedule_ann(self, n_lists=None, rebuild_interval=300):
+        """IVF索引不存在或已过期时在后台线程中重新构建，两次构建至少间隔rebuild_interval秒"""
+        index = self._ann
+        if index is not None and index.version == self.version:
+            return
+        with self._ann_lock:
+            if self._ann_thread is not None and self._ann_thread.is_alive():
+                return
+            if index is not None and time.monotonic() - self._ann_built < rebuild_interval:
+                return
+            self._ann_thread = threading.Thread(target=self._build_ann, args=(n_lists,), daemon=True)
+            self._ann_thread.start()
+
+    def _build_ann(self, n_lists):
+        version, matrix = self.version, self.tfidf_matrix
+        if matrix is None or matrix.shape[0] == 0:
+            return
+        try:
+            started = time.perf_counter()
+            index = IVFIndex.build(matrix, n_lists, version=version)
+            self._ann = index
+            print(f"Built IVF index with {index.n_lists} lists for {index.n_docs} documents "
+                  f"in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"[ANN Error] IVF索引构建失败: {str(e)}")
+        finally:
+            self._ann_built = time.monotonic()
+
+    def more_like_this(self, processed_text, top=10, nprobe=DEFAULT_NPROBE, exact=False, **ann_options):
+        """
+        与一段已分词文本最相似的文档，返回 (行号数组, 相似度数组)
+        文本按store的词表和IDF投影为向量；IVF索引构建完成前（或exact为True时）使用精确检索
+        """
+        if not self._is_fitted:
+            raise NotFittedError("Vectorizer not fitted yet")
+        matrix = self.tfidf_matrix
+        vector = self.vectorizer.transform([processed_text])
+        self.schedule_ann(**ann_options)
+        index = self._ann
+        if exact or index is None:
+            return exact_search(matrix, vector, top)
+        return index.search(vector, top, nprobe)
+
+    def cluster_documents(self, n_clusters=20, refresh=False):
+        """
+        :param refresh: 缓存结果已过期（语料有更新）时重新聚类；否则返回带 "stale": True 的缓存结果
+        """
         try:
             if n_clusters <= 0:
                 raise ValueError("聚类数量必须大于0")
 
             cache_key = f"kmeans_{n_clusters}"
-            if cache_key in self.cluster_cache:
-                return self.cluster_cache[cache_key]
+            cached = self.cluster_cache.get(cache_key)
+            if cached is not None and not (refresh and cached["stale"]):
+                return cached
 
             normalizer = Normalizer(norm='l2')
             normalized_vectors = normalizer.fit_transform(self.tfidf_matrix)
@@ -87,7 +375,8 @@ class DocumentStore:
             
             self.cluster_cache[cache_key] = {
                 "clusters": sorted_clusters,
-                "model": kmeans
+                "model": kmeans,
+                "stale": False
             }
             
             return self.cluster_cache[cache_key]
@@ -0,0 +1,132 @@
+import threading
+import numpy as np
+from collections import Counter
+from scipy.sparse import csr_matrix, diags, vstack
+from sklearn.preprocessing import normalize
+from snapshot import create_vectorizer
+
+
+def idf_from_df(df, n_docs):
+    """与TfidfVectorizer(smooth_idf=True)相同的IDF公式"""
+    return np.log((1 + n_docs) / (1 + df)) + 1
+
+
+class IncrementalIndex:
+    """
+    可追加文档的TF-IDF索引，新文档不需要重新拟合整个语料
+    - 词表只追加：已有词的列号不变，新词追加到末尾，列数随之增加
+    - 文档频率流式累计，IDF由df按sklearn的平滑公式计算
+    - 新文档（或已有文档的新版本）先写入待合并的行块，merge()时一次性合并，
+      按最新的IDF重新计算权重并L2归一化，计算量与非零元素数成正比
+    - 行内保存的是未归一化的相对词频：TF-IDF归一化后与行的缩放无关，
+      因此可以由已拟合矩阵除以IDF得到，不需要原始词频
+    """
+
+    def __init__(self, vocabulary, df, n_docs, tf):
+        self.vocabulary = dict(vocabulary)
+        self.df = np.asarray(df, dtype=np.float64)
+        self.n_docs = n_docs
+        self.tf = csr_matrix(tf, dtype=np.float64)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_fitted(cls, vocabulary, idf, matrix):
+        """由已拟合的词表、IDF和TF-IDF矩阵（如快照）还原文档频率和相对词频"""
+        idf = np.asarray(idf, dtype=np.float64)
+        n_docs = matrix.shape[0]
+        df = np.rint((1 + n_docs) / np.exp(idf - 1) - 1)
+        tf = csr_matrix(matrix, dtype=np.float64) @ diags(1.0 / idf)
+        return cls(vocabulary, df, n_docs, tf)
+
+    def add(self, row, text):
+        """
+        登记一篇已分词的文档，merge()后生效
+        :param row: 文档的行号：已有文档为其原行号（更新），新文档从当前行数起连续编号
+        """
+        counts = Counter(text.split())
+        with self._lock:
+            columns = []
+            for term in counts:
+                column = self.vocabulary.get(term)
+                if column is None:
+                    column = self.vocabulary[term] = len(self.vocabulary)
+                columns.append(column)
+            self._pending.append((row, columns, list(counts.values())))
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def merge(self):
+        """
+        合并待处理的行块，返回 (TF-IDF矩阵, 新增行数)
+        矩阵为新对象，正在使用旧矩阵的请求不受影响
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            n_features = len(self.vocabulary)
+        if not pending:
+            return None, 0
+
+        tf = self._resize(self.tf, self.tf.shape[0], n_features)
+        df = np.zeros(n_features)
+        df[:len(self.df)] = self.df
+
+        # 同一文档多次更新时只保留最后一次
+        latest = {}
+        for row, columns, values in pending:
+            latest[row] = (columns, values)
+        n_rows = tf.shape[0]
+        updates = {row: entry for row, entry in latest.items() if row < n_rows}
+        appended = [latest[row] for row in sorted(row for row in latest if row >= n_rows)]
+
+        if updates:
+            rows = np.fromiter(updates, dtype=np.int64)
+            # 旧版本不再计入文档频率
+            df -= np.asarray((tf[rows] > 0).sum(axis=0)).ravel()
+            keep = np.ones(n_rows)
+            keep[rows] = 0
+            tf = diags(keep) @ tf + self._block(list(updates.values()), n_features, rows, n_rows)
+        if appended:
+            tf = vstack([tf, self._block(appended, n_features)], format='csr')
+        for columns, _ in latest.values():
+            df[columns] += 1
+
+        with self._lock:
+            self.tf, self.df = tf.tocsr(), df
+            self.n_docs = self.tf.shape[0]
+        return self.matrix(), len(appended)
+
+    def matrix(self):
+        """按当前文档频率计算的L2归一化TF-IDF矩阵"""
+        idf = idf_from_df(self.df, self.n_docs)
+        return normalize(self.tf @ diags(idf), norm='l2', copy=False).tocsr()
+
+    def vectorizer(self):
+        """与当前索引一致的向量化器（用于转换新文本）"""
+        with self._lock:
+            # 只包含已合并的词，尚未合并的新词没有IDF
+            n_features = len(self.df)
+            vocabulary = {term: column for term, column in self.vocabulary.items() if column < n_features}
+            idf = idf_from_df(self.df, self.n_docs)
+        vectorizer = create_vectorizer(vocabulary)
+        vectorizer.idf_ = idf
+        return vectorizer
+
+    @staticmethod
+    def _resize(matrix, n_rows, n_columns):
+        """词表增长后扩展列数（CSR的数组不变）"""
+        return csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(n_rows, n_columns))
+
+    @staticmethod
+    def _block(rows, n_features, positions=None, n_rows=None):
+        """由 [(列号列表, 词频列表)] 构造行块；给出positions时把各行放到对应的行号上"""
+        indptr = np.cumsum([0] + [len(columns) for columns, _ in rows])
+        indices = np.fromiter((c for columns, _ in rows for c in columns), dtype=np.int64, count=indptr[-1])
+        data = np.fromiter((v for _, values in rows for v in values), dtype=np.float64, count=indptr[-1])
+        block = csr_matrix((data, indices, indptr), shape=(len(rows), n_features))
+        if positions is None:
+            return block
+        coo = block.tocoo()
+        return csr_matrix((coo.data, (positions[coo.row], coo.col)), shape=(n_rows, n_features))
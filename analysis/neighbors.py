@@ -0,0 +1,120 @@
+"""
+文档的top-k近邻图：预先计算每篇文档最相似的k篇文档，/api/similar 只需切片和阈值过滤
+
+    indices  (n, k) int32    近邻的行号，按相似度从高到低排列，不足k个时以-1填充
+    scores   (n, k) float32  对应的相似度，填充位置为0
+
+按行分块计算 block @ matrix.T，每块转为float32稠密数组后用argpartition取前k个，
+内存占用为 block_size × n × 4 字节，与k无关。
+近邻图可保存在TF-IDF快照目录中，随快照一起失效。
+"""
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+from joblib import Parallel, delayed
+
+DEFAULT_K = 50
+# 每块的行数：10万篇文档时单块稠密数组约100MB
+DEFAULT_BLOCK_SIZE = 256
+_FILES = {'indices': 'neighbors_indices.npy', 'scores': 'neighbors_scores.npy'}
+
+
+class NeighborGraph:
+    """
+    已计算的近邻图
+    :param version: 构建时DocumentStore的矩阵版本，用于判断是否过期
+    """
+
+    def __init__(self, indices, scores, version=None):
+        self.indices = indices
+        self.scores = scores
+        self.version = version
+
+    @property
+    def n_docs(self):
+        return self.indices.shape[0]
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def neighbors(self, doc_index, top=5, threshold=0.0):
+        """返回 (行号数组, 相似度数组)，最多top个且相似度不低于threshold"""
+        indices = self.indices[doc_index, :top]
+        scores = self.scores[doc_index, :top]
+        # 相似度已降序排列，阈值过滤即截断
+        count = np.searchsorted(-scores, -threshold, side='right')
+        count = min(count, np.count_nonzero(indices >= 0))
+        return indices[:count], scores[:count]
+
+    def save(self, directory):
+        """先写临时文件再替换，正在映射旧文件的进程不受影响"""
+        for name, array in (('indices', self.indices), ('scores', self.scores)):
+            path = os.path.join(directory, _FILES[name])
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, directory, version=None):
+        """从快照目录映射加载，不存在时返回None"""
+        try:
+            indices = np.load(os.path.join(directory, _FILES['indices']), mmap_mode='r')
+            scores = np.load(os.path.join(directory, _FILES['scores']), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return cls(indices, scores, version)
+
+
+def _top_k_block(matrix, start, stop, k):
+    """一个行块的前k个近邻（不含自身）"""
+    block = (matrix[start:stop] @ matrix.T).astype(np.float32).toarray()
+    rows = np.arange(stop - start)
+    block[rows, rows + start] = -np.inf
+
+    top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+    scores = np.take_along_axis(block, top, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    indices = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    scores = np.take_along_axis(scores, order, axis=1)
+
+    # 没有共同词的文档不算近邻
+    empty = scores <= 0
+    indices[empty] = -1
+    scores[empty] = 0
+    return indices, scores
+
+
+def build_neighbor_graph(matrix, k=DEFAULT_K, block_size=DEFAULT_BLOCK_SIZE, n_jobs=1, version=None):
+    """
+    :param matrix: 行已L2归一化的稀疏矩阵
+    :param n_jobs: 并行计算的行块数（joblib，-1为全部CPU核心）
+    """
+    matrix = csr_matrix(matrix, dtype=np.float32)
+    n_rows = matrix.shape[0]
+    k = max(min(k, n_rows - 1), 0)
+    if k == 0:
+        return NeighborGraph(np.full((n_rows, 0), -1, dtype=np.int32), np.zeros((n_rows, 0), dtype=np.float32),
+                             version)
+
+    blocks = [(start, min(start + block_size, n_rows)) for start in range(0, n_rows, block_size)]
+    if n_jobs == 1 or len(blocks) <= 1:
+        parts = [_top_k_block(matrix, start, stop, k) for start, stop in blocks]
+    else:
+        parts = Parallel(n_jobs=n_jobs)(delayed(_top_k_block)(matrix, start, stop, k) for start, stop in blocks)
+    return NeighborGraph(
+        np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts]), version
+    )
+
+
+def search_row(matrix, doc_index, top=5, threshold=0.0):
+    """单篇文档的精确近邻（近邻图尚未包含该文档或top超过k时使用）"""
+    scores = np.asarray((matrix[doc_index] @ matrix.T).todense()).ravel()
+    scores[doc_index] = -np.inf
+    top = min(top, scores.size - 1)
+    if top <= 0:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    candidates = np.argpartition(-scores, top - 1)[:top]
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    candidates = candidates[(scores[candidates] >= threshold) & (scores[candidates] > 0)]
+    return candidates.astype(np.int32), scores[candidates].astype(np.float32)
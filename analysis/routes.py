@@ -5,15 +5,29 @@ from document_store import DocumentStore
 from flask import jsonify, request, render_template, current_app
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
-from utils import get_files, calculate_silhouette_score
+from utils import get_files, read_document, calculate_silhouette_score
+from configs import ANALYZE, CN_SEGMENTER
+from text_processor import TextProcessor
+
+# 文档语言到TextProcessor语言的映射
+PROCESSOR_LANGUAGES = {'zh': 'cn', 'en': 'en'}
 
 def init_routes(app):
+    # 各语言的文本处理器，首次查询时创建
+    processors = {}
+
+    def get_processor(lang):
+        if lang not in processors:
+            processors[lang] = TextProcessor(PROCESSOR_LANGUAGES[lang], ANALYZE, CN_SEGMENTER)
+        return processors[lang]
+
     @app.before_request
     def initialize_data():
         if not hasattr(current_app, '_initialized'):
-            files = get_files()
-            current_app.document_store.load_documents(files)
-            print(f"成功加载 {len(files)} 个文档")
+            # 优先映射加载TF-IDF快照，语料变化后才重新拟合
+            current_app.document_store.load(**current_app.config['DOCUMENT_STORE'])
+            print(f"成功加载 {len(current_app.document_store.documents)} 个文档")
+            current_app.document_store.schedule_neighbors(**current_app.config['NEIGHBORS'])
             current_app._initialized = True
 
     @app.route('/')
@@ -23,22 +37,20 @@ def init_routes(app):
     @app.route('/api/duplicates', methods=['GET'])
     def find_duplicates():
         threshold = request.args.get('threshold', default=0.8, type=float)
-        results = []
-        
-        cosine_matrix = cosine_similarity(current_app.document_store.tfidf_matrix)
-        n = cosine_matrix.shape[0]
-
-        for i in range(n):
-            for j in range(i + 1, n):
-                if cosine_matrix[i][j] >= threshold:
-                    results.append({
-                        'doc1': current_app.document_store.documents[i]['name'],
-                        'doc2': current_app.document_store.documents[j]['name'],
-                        'similarity': float(cosine_matrix[i][j]),
-                        'lang': current_app.document_store.documents[i]['lang']
-                    })
+        store = current_app.document_store
+        # 分块稀疏相似度连接，只返回达到阈值的文档对，结果按阈值缓存
+        try:
+            rows, cols, scores = store.find_duplicates(threshold, **current_app.config['SIMILARITY_JOIN'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        return jsonify(sorted(results, key=lambda x: -x['similarity']))
+        documents = store.documents
+        return jsonify([{
+            'doc1': documents[i]['name'],
+            'doc2': documents[j]['name'],
+            'similarity': float(score),
+            'lang': documents[i]['lang']
+        } for i, j, score in zip(rows.tolist(), cols.tolist(), scores.tolist())])
 
     # 其他路由保持类似结构，通过current_app访问资源
     # ...
@@ -51,35 +63,53 @@ def init_routes(app):
         threshold = request.args.get('threshold', default=0.6, type=float)
         top_n = request.args.get('top', default=5, type=int)
 
+        store = current_app.document_store
+        # 从预先计算的top-k近邻图中切片
         try:
-            similarities = cosine_similarity(
-                current_app.document_store.tfidf_matrix[doc_index], 
-                current_app.document_store.tfidf_matrix
-            )
+            indices, scores = store.similar_documents(doc_index, top_n, threshold, **current_app.config['NEIGHBORS'])
         except IndexError:
             return jsonify({'error': 'Invalid document index'}), 400
 
-        # 获取相似度结果并排序
-        sim_scores = list(enumerate(similarities[0]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-
-        # 过滤结果
-        results = []
-        for idx, score in sim_scores:
-            if idx == doc_index:  # 跳过自身
-                continue
-            if score < threshold:
-                break
-            results.append({
-                'document': current_app.document_store.documents[idx]['name'],
-                'similarity': float(score),
-                'lang': current_app.document_store.documents[idx]['lang']
-            })
-            if len(results) >= top_n:
-                break
-
-        return jsonify(results)
+        documents = store.documents
+        return jsonify([{
+            'document': documents[idx]['name'],
+            'similarity': score,
+            'lang': documents[idx]['lang']
+        } for idx, score in zip(indices.tolist(), scores.tolist())])
     
+    @app.route('/api/more_like_this', methods=['POST'])
+    def more_like_this():
+        """查找与任意文本相似的文档：文本经爬虫相同的分词流程处理后在IVF近似索引中检索"""
+        data = request.get_json(silent=True) or {}
+        text = (data.get('text') or '').strip()
+        lang = data.get('lang', 'en')
+        if not text:
+            return jsonify({'error': 'Empty text'}), 400
+        if lang not in PROCESSOR_LANGUAGES:
+            return jsonify({'error': f'Unsupported language: {lang}'}), 400
+        try:
+            top_n = int(data.get('top', 10))
+            nprobe = int(data.get('nprobe', current_app.config['ANN']['nprobe']))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid top or nprobe'}), 400
+
+        store = current_app.document_store
+        options = {key: value for key, value in current_app.config['ANN'].items() if key != 'nprobe'}
+        try:
+            processed = get_processor(lang).process_text(text)
+            indices, scores = store.more_like_this(
+                processed, top_n, nprobe, exact=bool(data.get('exact', False)), **options
+            )
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+        documents = store.documents
+        return jsonify([{
+            'document': documents[idx]['name'],
+            'similarity': score,
+            'lang': documents[idx]['lang']
+        } for idx, score in zip(indices.tolist(), scores.tolist())])
+
     @app.route('/api/files', methods=['GET'])
     def api_files():
         """获取文件列表接口"""
@@ -88,8 +118,10 @@ def init_routes(app):
         return jsonify([{
             'name': f['name'],
             'lang': f['lang'],
-            'processed_path': f['processed_path'],
-            'original_path': f['original_path']
+            'processed_path': f.get('processed_path'),
+            'original_path': f.get('original_path'),
+            'url': f.get('url'),
+            'segment_path': f.get('segment_path')
         } for f in files])
     
     
@@ -106,10 +138,8 @@ def init_routes(app):
 
         try:
             # 读取预处理内容
-            with open(file1['processed_path'], 'r', encoding='utf-8') as f:
-                doc1 = f.read().strip()
-            with open(file2['processed_path'], 'r', encoding='utf-8') as f:
-                doc2 = f.read().strip()
+            doc1 = read_document(file1, 'processed').strip()
+            doc2 = read_document(file2, 'processed').strip()
 
             # 计算TF-IDF向量
             vectorizer = TfidfVectorizer(tokenizer=lambda x: x.split(), lowercase=False)
@@ -118,10 +148,8 @@ def init_routes(app):
             distance = 1 - similarity
 
             # 读取原始内容
-            with open(file1['original_path'], 'r', encoding='utf-8') as f:
-                content1 = f.read()
-            with open(file2['original_path'], 'r', encoding='utf-8') as f:
-                content2 = f.read()
+            content1 = read_document(file1, 'original')
+            content2 = read_document(file2, 'original')
 
             return jsonify({
                 'similarity': similarity,
@@ -140,6 +168,8 @@ def init_routes(app):
         try:
             n_clusters_list = list(map(int, request.args.get('n_clusters', '20').split(',')))
             lang_filter = request.args.get('lang', None)
+            # 语料增量更新后缓存的聚类结果标记为stale，refresh=1时重新聚类
+            refresh = request.args.get('refresh', default=0, type=int) == 1
             
             results = {}
             for n_clusters in n_clusters_list:
@@ -147,7 +177,7 @@ def init_routes(app):
                     continue
                     
                 try:
-                    cluster_result = current_app.document_store.cluster_documents(n_clusters)
+                    cluster_result = current_app.document_store.cluster_documents(n_clusters, refresh)
                     
                     # 重构过滤逻辑
                     doc_indices = [
@@ -175,9 +205,12 @@ def init_routes(app):
                             } for idx in cluster_docs]
                         })
                     
+                    # 过期的结果只覆盖聚类时已有的文档
+                    labels_count = len(cluster_result["model"].labels_)
                     results[str(n_clusters)] = {
                         "top_clusters": sorted(clusters, key=lambda x: -x["size"]),
-                        "silhouette": calculate_silhouette_score(current_app.document_store.tfidf_matrix, cluster_result["model"])
+                        "silhouette": calculate_silhouette_score(current_app.document_store.tfidf_matrix[:labels_count], cluster_result["model"]),
+                        "stale": cluster_result["stale"]
                     }
 
                 except Exception as e:
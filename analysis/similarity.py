@@ -0,0 +1,116 @@
+"""
+阈值相似度连接：找出余弦相似度不低于阈值的全部文档对，不生成n×n的稠密矩阵
+
+TF-IDF矩阵的行已L2归一化，余弦相似度即点积。按行分块计算，每块只与行号不小于块起点的文档相乘，
+内存占用与块大小成正比；每对文档只输出一次（i < j）。
+
+剪枝（All-Pairs前缀过滤）：
+- 每个词的上界 maxw_t 为该词在所有文档中的最大权重，x与任意文档的相似度不超过 Σ x_t·maxw_t
+- 把每行的词按文档频率从高到低累加上界，累计不足阈值的高频词划为后缀，其余为前缀：
+  与x相似度达到阈值的文档至少包含x前缀中的一个词，因此只用前缀矩阵生成候选对，高频词不再产生大量候选
+- 候选对的后缀部分不超过 min(后缀上界, 后缀范数)（后者由柯西-施瓦茨不等式得到），
+  前缀得分加上该上界仍低于阈值的候选直接丢弃，剩余候选再计算精确相似度
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+from joblib import Parallel, delayed
+
+# 每块的行数，决定单块候选矩阵的内存上限
+DEFAULT_BLOCK_SIZE = 2048
+# 浮点误差余量，避免相似度恰好等于阈值（如完全重复的文档在阈值1.0时）的文档对被剪掉或丢弃
+_EPSILON = 1e-9
+
+
+def split_prefix(matrix, threshold):
+    """
+    把每行拆分为前缀和后缀
+    :return: (前缀矩阵, 每行后缀的相似度上界)
+    """
+    # 复制一份：前缀矩阵不能与调用方（可能是只读mmap的快照）共用indices/indptr
+    matrix = csr_matrix(matrix, dtype=np.float64, copy=True)
+    n_rows, n_features = matrix.shape
+    if matrix.nnz == 0:
+        return matrix, np.zeros(n_rows)
+
+    max_weight = np.zeros(n_features)
+    np.maximum.at(max_weight, matrix.indices, matrix.data)
+    df = np.bincount(matrix.indices, minlength=n_features)
+    # 文档频率越高排名越靠前，优先划入后缀
+    rank = np.empty(n_features, dtype=np.int64)
+    rank[np.argsort(-df, kind='stable')] = np.arange(n_features)
+
+    counts = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(n_rows), counts)
+    # 行内按词的排名排序，行的起止位置不变
+    order = np.lexsort((rank[matrix.indices], rows))
+    bound = matrix.data[order] * max_weight[matrix.indices[order]]
+    squares = matrix.data[order] ** 2
+    # 行内累计上界（每行从0开始）
+    nonempty = counts > 0
+    row_start = matrix.indptr[:-1][nonempty]
+    cumulative = np.cumsum(bound)
+    cumulative -= np.repeat(cumulative[row_start] - bound[row_start], counts[nonempty])
+    suffix = cumulative < threshold
+
+    suffix_bound = np.bincount(rows[order], weights=np.where(suffix, bound, 0), minlength=n_rows)
+    suffix_norm = np.sqrt(np.bincount(rows[order], weights=np.where(suffix, squares, 0), minlength=n_rows))
+
+    keep = np.zeros(matrix.nnz, dtype=bool)
+    keep[order[~suffix]] = True
+    prefix = csr_matrix(
+        (np.where(keep, matrix.data, 0), matrix.indices.copy(), matrix.indptr.copy()), shape=matrix.shape
+    )
+    prefix.eliminate_zeros()
+    return prefix, np.minimum(suffix_bound, suffix_norm)
+
+
+def _join_block(matrix, prefix, suffix_bound, start, stop, threshold):
+    """一个行块与其后全部文档的连接，返回块内满足阈值的 (行, 列, 相似度)"""
+    block = prefix[start:stop]
+    others = matrix[start:]
+    candidates = (block @ others.T).tocoo()
+
+    rows = candidates.row + start
+    cols = candidates.col + start
+    # 只保留 i < j，并按前缀得分 + 后缀上界剪枝
+    mask = (cols > rows) & (candidates.data + suffix_bound[rows] >= threshold - _EPSILON)
+    rows, cols = rows[mask], cols[mask]
+    if rows.size == 0:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    scores = np.asarray(matrix[rows].multiply(matrix[cols]).sum(axis=1)).ravel()
+    mask = scores >= threshold - _EPSILON
+    return rows[mask].astype(np.int32), cols[mask].astype(np.int32), scores[mask].astype(np.float32)
+
+
+def similarity_join(matrix, threshold, block_size=DEFAULT_BLOCK_SIZE, n_jobs=1):
+    """
+    找出相似度不低于threshold的全部文档对
+    :param matrix: 行已L2归一化的稀疏矩阵
+    :param threshold: (0, 1] 之间的相似度阈值
+    :param n_jobs: 并行计算的行块数（joblib，-1为全部CPU核心）
+    :return: (行号, 列号, 相似度) 三个数组，按相似度从高到低排列，行号小于列号
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("相似度阈值必须在(0, 1]之间")
+    matrix = csr_matrix(matrix, dtype=np.float64)
+    n_rows = matrix.shape[0]
+    prefix, suffix_bound = split_prefix(matrix, threshold)
+
+    blocks = [(start, min(start + block_size, n_rows)) for start in range(0, n_rows, block_size)]
+    if n_jobs == 1 or len(blocks) <= 1:
+        parts = [_join_block(matrix, prefix, suffix_bound, start, stop, threshold) for start, stop in blocks]
+    else:
+        parts = Parallel(n_jobs=n_jobs)(
+            delayed(_join_block)(matrix, prefix, suffix_bound, start, stop, threshold) for start, stop in blocks
+        )
+    if not parts:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+
+    rows = np.concatenate([part[0] for part in parts])
+    cols = np.concatenate([part[1] for part in parts])
+    scores = np.concatenate([part[2] for part in parts])
+    order = np.argsort(-scores, kind='stable')
+    return rows[order], cols[order], scores[order]
@@ -0,0 +1,149 @@
+"""
+TF-IDF模型与矩阵的磁盘快照，分析服务启动时直接映射加载，不再读取全部文档重新拟合
+
+    crawler/.tfidf/CURRENT                 当前快照的目录名
+    crawler/.tfidf/v1-<语料摘要>/meta.json  格式版本、语料摘要、矩阵形状
+    crawler/.tfidf/v1-<语料摘要>/terms.txt  词表（每行一个词，行号即列号）
+    crawler/.tfidf/v1-<语料摘要>/idf.npy    IDF权重
+    crawler/.tfidf/v1-<语料摘要>/data.npy, indices.npy, indptr.npy   TF-IDF矩阵的CSR数组
+    crawler/.tfidf/v1-<语料摘要>/catalog.json   文档目录（与矩阵行一一对应）
+
+语料摘要由各站点存储文件的大小和修改时间计算（见utils.corpus_manifest），语料变化后快照自动失效
+
+用法: python snapshot.py build   重新拟合并保存快照
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# 快照格式版本，格式变化时递增，旧版本快照不再加载
+SNAPSHOT_VERSION = 1
+DEFAULT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../crawler/.tfidf'))
+CURRENT_FILE = 'CURRENT'
+_ARRAYS = ('idf', 'data', 'indices', 'indptr')
+
+
+def create_vectorizer(vocabulary=None):
+    """与DocumentStore一致的向量化器：文本已分词，按空格切分"""
+    return TfidfVectorizer(tokenizer=lambda x: x.split(), lowercase=False, vocabulary=vocabulary)
+
+
+class Snapshot:
+    """
+    已加载的快照：矩阵数组以只读mmap方式打开，加载时间与语料规模无关
+    词表只在需要转换新文本时才读取
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in _ARRAYS}
+        self.idf = arrays['idf']
+        self.matrix = csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(self.meta['shape']), copy=False
+        )
+        with open(os.path.join(path, 'catalog.json'), 'r', encoding='utf-8') as f:
+            self.documents = json.load(f)
+        self._terms = None
+
+    @property
+    def digest(self):
+        return self.meta['corpus_digest']
+
+    @property
+    def cursors(self):
+        """快照拟合前各站点的读取位置，增量更新从这里继续"""
+        return self.meta.get('cursors')
+
+    @property
+    def terms(self):
+        if self._terms is None:
+            with open(os.path.join(self.path, 'terms.txt'), 'r', encoding='utf-8') as f:
+                self._terms = f.read().split('\n')[:self.meta['shape'][1]]
+        return self._terms
+
+    def vectorizer(self):
+        """还原已拟合的向量化器（用于转换新文本）"""
+        vectorizer = create_vectorizer({term: i for i, term in enumerate(self.terms)})
+        vectorizer.idf_ = np.asarray(self.idf)
+        return vectorizer
+
+
+def load_snapshot(corpus_digest=None, directory=DEFAULT_DIR):
+    """加载当前快照；不存在、版本不符或与语料摘要不一致时返回None"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            path = os.path.join(directory, f.read().strip())
+        snapshot = Snapshot(path)
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f'Ignoring unreadable TF-IDF snapshot: {str(e)}')
+        return None
+    if snapshot.meta.get('version') != SNAPSHOT_VERSION:
+        return None
+    if corpus_digest is not None and snapshot.digest != corpus_digest:
+        return None
+    return snapshot
+
+
+def save_snapshot(corpus_digest, documents, vectorizer, matrix, cursors=None, directory=DEFAULT_DIR):
+    """写入新快照并切换CURRENT，完成前旧快照保持可用；返回快照目录"""
+    name = f'v{SNAPSHOT_VERSION}-{corpus_digest[:16]}'
+    path = os.path.join(directory, name)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    os.makedirs(tmp_path, exist_ok=True)
+
+    matrix = csr_matrix(matrix)
+    matrix.sort_indices()
+    terms = vectorizer.get_feature_names_out()
+    with open(os.path.join(tmp_path, 'terms.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(terms))
+    np.save(os.path.join(tmp_path, 'idf.npy'), vectorizer.idf_)
+    np.save(os.path.join(tmp_path, 'data.npy'), matrix.data)
+    np.save(os.path.join(tmp_path, 'indices.npy'), matrix.indices)
+    np.save(os.path.join(tmp_path, 'indptr.npy'), matrix.indptr)
+    with open(os.path.join(tmp_path, 'catalog.json'), 'w', encoding='utf-8') as f:
+        json.dump(documents, f, ensure_ascii=False)
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': SNAPSHOT_VERSION,
+            'corpus_digest': corpus_digest,
+            'shape': list(matrix.shape),
+            'nnz': int(matrix.nnz),
+            'cursors': cursors,
+            'created_at': time.time()
+        }, f)
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    current_tmp = os.path.join(directory, CURRENT_FILE + '.tmp')
+    with open(current_tmp, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+    _remove_stale(directory, keep=name)
+    return path
+
+
+def _remove_stale(directory, keep):
+    """删除旧快照（已打开的mmap在删除后仍然有效）"""
+    for entry in os.listdir(directory):
+        entry_path = os.path.join(directory, entry)
+        if entry != keep and entry.startswith('v') and '.tmp' not in entry and os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        sys.exit(__doc__)
+    from document_store import DocumentStore
+    started = time.perf_counter()
+    store = DocumentStore()
+    store.load(rebuild=True)
+    print(f'{len(store.documents)} documents in {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,20 @@
+import os
+import sys
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ann import IVFIndex, exact_search
+
+
+def test_build_on_read_only_input():
+    """快照加载的矩阵数组是只读mmap"""
+    matrix = normalize(sp.random(500, 200, density=0.05, format='csr', random_state=1))
+    for array in (matrix.data, matrix.indices, matrix.indptr):
+        array.flags.writeable = False
+    index = IVFIndex.build(matrix)
+    # 查询全部簇时与精确检索一致
+    for row in (0, 3, 42):
+        found, _ = index.search(matrix[row], 5, nprobe=index.n_lists)
+        expected, _ = exact_search(matrix, matrix[row], 5)
+        assert found.tolist() == expected.tolist()
@@ -0,0 +1,54 @@
+import os
+import sys
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from similarity import similarity_join
+
+
+def random_matrix(n_rows=200, n_features=100, density=0.1, seed=1):
+    return normalize(sp.random(n_rows, n_features, density=density, format='csr', random_state=seed))
+
+
+def brute_force_pairs(matrix, threshold):
+    scores = cosine_similarity(matrix)
+    rows, cols = np.triu_indices(matrix.shape[0], 1)
+    mask = scores[rows, cols] >= threshold
+    return set(zip(rows[mask].tolist(), cols[mask].tolist()))
+
+
+def test_matches_brute_force():
+    matrix = random_matrix()
+    for threshold in (0.2, 0.3, 0.5):
+        for block_size in (37, 2048):
+            rows, cols, scores = similarity_join(matrix, threshold, block_size=block_size)
+            assert set(zip(rows.tolist(), cols.tolist())) == brute_force_pairs(matrix, threshold)
+            assert np.all(np.diff(scores) <= 0)
+
+
+def test_input_unchanged():
+    matrix = random_matrix()
+    data, indices, indptr = matrix.data.copy(), matrix.indices.copy(), matrix.indptr.copy()
+    similarity_join(matrix, 0.3)
+    assert np.array_equal(matrix.data, data)
+    assert np.array_equal(matrix.indices, indices)
+    assert np.array_equal(matrix.indptr, indptr)
+
+
+def test_read_only_input():
+    """快照加载的矩阵数组是只读mmap"""
+    matrix = random_matrix()
+    for array in (matrix.data, matrix.indices, matrix.indptr):
+        array.flags.writeable = False
+    rows, _, _ = similarity_join(matrix, 0.3)
+    assert len(rows) == len(brute_force_pairs(matrix, 0.3))
+
+
+def test_exact_duplicates_at_threshold_one():
+    matrix = random_matrix(n_rows=15)
+    duplicated = sp.vstack([matrix, matrix]).tocsr()
+    rows, cols, _ = similarity_join(duplicated, 1.0)
+    assert {(i, i + 15) for i in range(15)} <= set(zip(rows.tolist(), cols.tolist()))
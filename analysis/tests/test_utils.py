@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils
+from segment_store import SegmentStore
+
+
+def test_get_files_and_iter_documents_agree(tmp_path, monkeypatch):
+    store = SegmentStore(str(tmp_path / 'en' / 'site' / 'segments'))
+    store.put('https://example.com/a', '<html>a</html>', 'alpha')
+    store.put('https://example.com/b', '<html>b</html>', 'beta')
+    store.put('https://example.com/a', '<html>a2</html>', 'alpha two')
+    store.close()
+    monkeypatch.setattr(utils, 'CRAWLER_DIR', str(tmp_path))
+
+    documents = list(utils.iter_documents())
+    assert [file for file, _ in documents] == utils.get_files()
+    assert [text for _, text in documents] == ['beta', 'alpha two']
+
+
+def test_pages_written_after_first_read_are_listed(tmp_path, monkeypatch):
+    segment_path = str(tmp_path / 'zh' / 'site' / 'segments')
+    writer = SegmentStore(segment_path)
+    writer.put('https://example.com/a', '<html>a</html>', 'alpha')
+    monkeypatch.setattr(utils, 'CRAWLER_DIR', str(tmp_path))
+    assert [file['url'] for file in utils.get_files()] == ['https://example.com/a']
+
+    writer.put('https://example.com/b', '<html>b</html>', 'beta')
+    writer.put('https://example.com/a', '<html>a2</html>', 'alpha two')
+    writer.close()
+
+    assert [file['url'] for file in utils.get_files()] == ['https://example.com/b', 'https://example.com/a']
+    assert [text for _, text in utils.iter_documents()] == ['beta', 'alpha two']
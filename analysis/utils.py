@@ -1,35 +1,206 @@
 import os
+import sys
+import json
+import hashlib
+from functools import lru_cache
 from sklearn.metrics import silhouette_score
 
-def get_files():
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../crawler'))
-    files = []
+# 爬虫的打包存储格式定义在spider目录
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../spider')))
+from segment_store import SegmentStore
+
+
+@lru_cache(maxsize=None)
+def open_segment_store(path):
+    """以只读方式打开站点的打包存储，同一目录只打开一次"""
+    return SegmentStore(path, readonly=True)
+
+
+def current_segment_store(path):
+    """打开站点的打包存储，并载入爬虫在上次读取之后写入的索引"""
+    store = open_segment_store(path)
+    store.refresh()
+    return store
+
+
+def read_document(file, field):
+    """
+    读取文档内容，兼容打包存储与.txt存储
+    :param field: 'processed' 或 'original'
+    """
+    if file.get('segment_path'):
+        record = open_segment_store(file['segment_path']).get(file['url'])
+        if record is None:
+            raise KeyError(f"{file['url']} not found in {file['segment_path']}")
+        return getattr(record, field)
+    with open(file[f'{field}_path'], 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+CRAWLER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../crawler'))
+
 
+def corpus_manifest():
+    """
+    语料清单：各站点存储文件的大小和修改时间，以及由此计算的摘要
+    打包存储只检查 pages.seg/pages.idx（追加写入，任何变化都会改变大小或修改时间），不读取文档内容
+    """
+    entries = {}
     for lang in ['zh', 'en']:
-        lang_dir = os.path.join(base_dir, lang)
+        lang_dir = os.path.join(CRAWLER_DIR, lang)
         if not os.path.exists(lang_dir):
             continue
 
-        for website in os.listdir(lang_dir):
+        for website in sorted(os.listdir(lang_dir)):
             website_path = os.path.join(lang_dir, website)
-            processed_dir = os.path.join(website_path, 'downloads', 'processed')
-            original_dir = os.path.join(website_path, 'downloads', 'original')
-
-            for filename in os.listdir(processed_dir):
-                if (filename.endswith('_e.txt') and lang == 'en') or (filename.endswith('_c.txt') and lang == 'zh'):
-                    processed_path = os.path.join(processed_dir, filename)
-                    original_filename = filename[:-6] + '_org.txt'
-                    original_path = os.path.join(original_dir, original_filename)
-
-                    if os.path.isfile(original_path):
-                        files.append({
-                            'name': original_filename,
-                            'lang': lang,
-                            'processed_path': processed_path,
-                            'original_path': original_path
-                        })
+            segment_path = os.path.join(website_path, 'segments')
+            if os.path.isdir(segment_path):
+                paths = [os.path.join(segment_path, name) for name in ('pages.seg', 'pages.idx')]
+            else:
+                paths = []
+                for sub_dir in ('processed', 'original'):
+                    directory = os.path.join(website_path, 'downloads', sub_dir)
+                    if os.path.isdir(directory):
+                        paths.extend(os.path.join(directory, name) for name in os.listdir(directory))
+
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries[os.path.relpath(path, CRAWLER_DIR)] = [stat.st_size, stat.st_mtime_ns]
+
+    digest = hashlib.sha1(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()
+    return {'digest': digest, 'files': entries}
+
+
+def _iter_sites():
+    """遍历站点目录，产出 (语言, 站点目录)"""
+    for lang in ['zh', 'en']:
+        lang_dir = os.path.join(CRAWLER_DIR, lang)
+        if not os.path.exists(lang_dir):
+            continue
+        for website in os.listdir(lang_dir):
+            yield lang, os.path.join(lang_dir, website)
+
+
+def _segment_file(segment_path, lang, url):
+    return {'name': url, 'lang': lang, 'url': url, 'segment_path': segment_path}
+
+
+def _txt_file(website_path, lang, filename):
+    """处理后文件对应的文档条目，不是该语言的文件或原始文件不存在时返回None"""
+    if not ((filename.endswith('_e.txt') and lang == 'en') or (filename.endswith('_c.txt') and lang == 'zh')):
+        return None
+    original_filename = filename[:-6] + '_org.txt'
+    original_path = os.path.join(website_path, 'downloads', 'original', original_filename)
+    if not os.path.isfile(original_path):
+        return None
+    return {
+        'name': original_filename,
+        'lang': lang,
+        'processed_path': os.path.join(website_path, 'downloads', 'processed', filename),
+        'original_path': original_path
+    }
+
+
+def _iter_txt_files(website_path, lang):
+    processed_dir = os.path.join(website_path, 'downloads', 'processed')
+    if not os.path.isdir(processed_dir):
+        return
+    for filename in os.listdir(processed_dir):
+        file = _txt_file(website_path, lang, filename)
+        if file is not None:
+            yield file
+
+
+def get_files():
+    """文档列表；打包存储只解压每条记录开头的URL，不读取正文"""
+    files = []
+
+    for lang, website_path in _iter_sites():
+        # 优先读取打包存储，流式遍历每个URL的最新记录
+        segment_path = os.path.join(website_path, 'segments')
+        if os.path.isdir(segment_path):
+            for url in current_segment_store(segment_path).urls():
+                files.append(_segment_file(segment_path, lang, url))
+            continue
+        files.extend(_iter_txt_files(website_path, lang))
     return files
 
+
+def iter_documents():
+    """
+    一次流式遍历产出 (文档条目, 处理后文本)，供全量拟合使用
+    打包存储每条记录只解压一次，不再先列出URL、再按URL逐条读取
+    """
+    for lang, website_path in _iter_sites():
+        segment_path = os.path.join(website_path, 'segments')
+        if os.path.isdir(segment_path):
+            for record in current_segment_store(segment_path):
+                yield _segment_file(segment_path, lang, record.url), record.processed
+            continue
+        for file in _iter_txt_files(website_path, lang):
+            try:
+                yield file, read_document(file, 'processed')
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error loading {file['name']}: {str(e)}")
+
+
+def corpus_cursors():
+    """
+    各站点当前的读取位置，供read_new_documents增量读取之后写入的文档
+    打包存储为数据文件大小；.txt存储为处理后文件的最大修改时间
+    """
+    cursors = {}
+    for _, website_path in _iter_sites():
+        segment_path = os.path.join(website_path, 'segments')
+        if os.path.isdir(segment_path):
+            data_path = os.path.join(segment_path, 'pages.seg')
+            cursors[website_path] = os.path.getsize(data_path) if os.path.isfile(data_path) else 0
+            continue
+        processed_dir = os.path.join(website_path, 'downloads', 'processed')
+        if os.path.isdir(processed_dir):
+            cursors[website_path] = max(
+                (entry.stat().st_mtime_ns for entry in os.scandir(processed_dir)), default=0
+            )
+    return cursors
+
+
+def read_new_documents(cursors):
+    """
+    读取cursors之后新写入或更新的文档
+    :return: ([(文档条目, 处理后文本)], 新的cursors)；同一URL的新记录表示页面已更新
+    """
+    documents = {}
+    cursors = dict(cursors)
+    for lang, website_path in _iter_sites():
+        segment_path = os.path.join(website_path, 'segments')
+        if os.path.isdir(segment_path):
+            store = open_segment_store(segment_path)
+            position = cursors.get(website_path, 0)
+            for position, record in store.iter_from(position):
+                documents[record.url] = (_segment_file(segment_path, lang, record.url), record.processed)
+            if position != cursors.get(website_path, 0):
+                # 新记录需要出现在只读索引中，read_document才能按URL读取
+                store.refresh()
+            cursors[website_path] = position
+            continue
+
+        processed_dir = os.path.join(website_path, 'downloads', 'processed')
+        if not os.path.isdir(processed_dir):
+            continue
+        since = cursors.get(website_path, 0)
+        for entry in os.scandir(processed_dir):
+            mtime = entry.stat().st_mtime_ns
+            if mtime <= since:
+                continue
+            file = _txt_file(website_path, lang, entry.name)
+            if file is not None:
+                documents[file['name']] = (file, read_document(file, 'processed'))
+            cursors[website_path] = max(cursors.get(website_path, 0), mtime)
+    return list(documents.values()), cursors
+
 def calculate_silhouette_score(X, model):
     try:
         return silhouette_score(X, model.labels_, metric='cosine')
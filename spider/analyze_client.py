@@ -0,0 +1,200 @@
+import re
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+import requests
+from requests.adapters import HTTPAdapter
+
+# 切分长文本时优先在句末标点或空白处断开
+_BREAK_CHARS = re.compile(r'[。！？；\n!?;\s]')
+
+
+def split_text(text, chunk_chars):
+    """将长文本切成不超过chunk_chars的片段，尽量不在词中间断开"""
+    chunks = []
+    start = 0
+    while len(text) - start > chunk_chars:
+        end = start + chunk_chars
+        # 在片段后半部分寻找最后一个断点
+        breaks = [m.end() for m in _BREAK_CHARS.finditer(text, start + chunk_chars // 2, end)]
+        end = breaks[-1] if breaks else end
+        chunks.append(text[start:end])
+        start = end
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
+
+
+# 合并请求时插在片段之间的分隔文本，按其词元把结果切回各片段
+# 不依赖偏移量：IK的end()把最终偏移设为最后一个词元的结尾而不是文本结尾，后续文本的偏移会整体前移
+SENTINEL = 'zqxsplitmarkerzqx'
+
+
+class AnalyzeClient:
+    """
+    通过ES的_analyze接口批量分词
+    - 复用长连接池，不再每页新建连接
+    - 长文本按max_token_count切片；多个线程同时提交的片段合并为一次请求（text为数组）
+    - 同时在途的请求数不超过max_concurrency
+    - 记录请求延迟与降级比例
+    :param max_token_count: 单次请求允许的最大词元数（ES默认index.analyze.max_token_count为10000）
+    :param tokens_per_char: 每个字符最多产生的词元数估计，ik_max_word会输出重叠的词
+    :param max_batch_texts: 单次请求最多合并的片段数
+    :param linger: 等待更多片段合并的最长秒数
+    :param wait_timeout: 调用方等待分词结果的最长秒数，超时按失败降级，默认为请求超时的两倍
+    """
+
+    def __init__(self, endpoint='http://localhost:9200', analyzer='ik_max_word', max_token_count=10000,
+                 tokens_per_char=2, max_batch_texts=32, linger=0.005, max_concurrency=4, timeout=30,
+                 wait_timeout=None):
+        self.url = f'{endpoint}/_analyze'
+        self.analyzer = analyzer
+        self.chunk_chars = max(max_token_count // tokens_per_char, 1)
+        self.max_batch_texts = max_batch_texts
+        self.linger = linger
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout if wait_timeout is not None else timeout * 2
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._stats = {'requests': 0, 'texts': 0, 'chunks': 0, 'failed_requests': 0, 'fallbacks': 0}
+
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def analyze(self, text):
+        """
+        分词一段文本
+        :return: 词元列表；请求失败时返回None，由调用方降级处理
+        """
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts):
+        """分词多段文本，所有片段一起提交以便合并请求"""
+        pending = []
+        for text in texts:
+            futures = []
+            for chunk in split_text(text, self.chunk_chars):
+                future = Future()
+                self._queue.put((chunk, future))
+                futures.append(future)
+            pending.append(futures)
+
+        # 分派线程异常退出时不能让调用方永远等待
+        deadline = time.monotonic() + self.wait_timeout
+        results = []
+        for futures in pending:
+            tokens = []
+            for future in futures:
+                try:
+                    chunk_tokens = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except FutureTimeout:
+                    chunk_tokens = None
+                if chunk_tokens is None:
+                    tokens = None
+                    break
+                tokens.extend(chunk_tokens)
+            results.append(tokens)
+
+        with self._stats_lock:
+            self._stats['texts'] += len(texts)
+            self._stats['chunks'] += sum(len(futures) for futures in pending)
+            self._stats['fallbacks'] += sum(1 for tokens in results if tokens is None)
+        return results
+
+    def _dispatch(self):
+        """合并队列中的片段，总长度不超过chunk_chars，保证单次请求的词元数在限制内"""
+        carry = None
+        while True:
+            item = carry or self._queue.get()
+            carry = None
+            batch, size = [item], len(item[0])
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch_texts:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if size + len(item[0]) > self.chunk_chars:
+                    carry = item
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._slots.acquire()
+            future = self._executor.submit(self._send, batch)
+            future.add_done_callback(lambda _: self._slots.release())
+
+    def _post(self, texts):
+        response = self.session.post(
+            self.url,
+            json={'analyzer': self.analyzer, 'text': texts},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return [token['token'] for token in response.json()['tokens']]
+
+    def _analyze_batch(self, texts):
+        """
+        一次请求分析多个片段，片段之间插入分隔文本，按分隔词元切回各片段
+        分隔词元数不符（如片段本身含分隔文本、分析器改写了分隔词）时逐个片段请求
+        """
+        if len(texts) == 1:
+            return [self._post(texts)]
+        if not any(SENTINEL in text for text in texts):
+            joined = []
+            for text in texts:
+                joined.extend((text, SENTINEL))
+            results = [[]]
+            for token in self._post(joined[:-1]):
+                if token == SENTINEL:
+                    results.append([])
+                else:
+                    results[-1].append(token)
+            if len(results) == len(texts):
+                return results
+        return [self._post([text]) for text in texts]
+
+    def _send(self, batch):
+        texts = [chunk for chunk, _ in batch]
+        start = time.monotonic()
+        try:
+            results = self._analyze_batch(texts)
+        except Exception as e:
+            print(f"ES分词失败：{str(e)}")
+            with self._stats_lock:
+                self._stats['requests'] += 1
+                self._stats['failed_requests'] += 1
+            for _, future in batch:
+                future.set_result(None)
+            return
+
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._latencies.append(time.monotonic() - start)
+
+        for (_, future), chunk_tokens in zip(batch, results):
+            future.set_result(chunk_tokens)
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self._stats)
+        stats['fallback_rate'] = round(stats['fallbacks'] / stats['texts'], 3) if stats['texts'] else 0.0
+        stats['avg_latency_ms'] = round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0
+        stats['p95_latency_ms'] = round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 1) if latencies else 0.0
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
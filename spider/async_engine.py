@@ -0,0 +1,211 @@
+import ssl
+import time
+import asyncio
+import certifi
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
+from spider import FetchResult
+from domain import get_domain_name
+from configs import SESSION_POOL
+from main import create_spider, print_spider_status, project_dir
+from session_pool import SessionPool
+from scheduler import create_scheduler, LANE_RETRY
+from retry_queue import RETRY_STATUS, classify_exception, parse_retry_after
+
+
+class AsyncCrawlerMaster:
+    """
+    基于asyncio的爬取引擎：单个事件循环内保持大量并发请求，
+    HTML解析、分词、存储等阻塞步骤交给线程池执行
+    """
+
+    def __init__(self, config, connection_limit=None):
+        self.config = config
+        self.connection_limit = connection_limit
+        self.project_name = project_dir(config)
+        self.domain_name = get_domain_name(config['homepage'])
+        self.session_pool = SessionPool(
+            **{**SESSION_POOL, **config.get('session_pool', {})},
+            connection_limit=connection_limit
+        )
+        self.concurrency = config.get('concurrency', 200)
+        self.spider = create_spider(
+            config, self.session_pool, initial_slots=max(self.concurrency // 4, 1), max_slots=self.concurrency
+        )
+        self.executor = ThreadPoolExecutor(max_workers=config.get('executor_workers', 4))
+        self.scheduler = None
+        self.in_flight = set()
+
+    def start(self):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        # 与线程引擎共用按主机限速的调度器（robots.txt通过同步会话池读取）
+        self.scheduler = create_scheduler(self.config, self.session_pool)
+        self.spider.retry_queue.start(self._requeue_retry)
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._refill)
+
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.config.get('per_host_limit', 0),
+            ssl=self._ssl_context()
+        )
+        timeout = aiohttp.ClientTimeout(total=20)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(self._worker(session)) for _ in range(self.concurrency)]
+            monitor = asyncio.create_task(self._monitor())
+
+            # 达到页面上限，或队列耗尽且没有进行中的请求时结束
+            await self._wait_until_done()
+
+            for task in workers + [monitor]:
+                task.cancel()
+            await asyncio.gather(*workers, monitor, return_exceptions=True)
+
+        self.executor.shutdown(wait=True)
+        self.spider.close()
+        print(f"[{self.config['name']}] Finished: {self.spider.crawled_count}/{self.spider.max_pages}")
+
+    def _requeue_retry(self, url):
+        """重试到期的URL进入调度器的重试通道（在重试队列的后台线程中调用，不在事件循环上）"""
+        self.scheduler.put(url, self.spider.frontier.depth(url), LANE_RETRY)
+
+    def _refill(self):
+        """
+        内存队列不足时从持久化队列按批取出URL，内存占用与并发数成正比
+        在线程池中执行：新主机入队时调度器会同步读取robots.txt（Crawl-delay），不能阻塞事件循环
+        """
+        if self.scheduler.qsize() < self.concurrency:
+            self.spider.requeue_due_pages()
+            for url, depth in self.spider.frontier.lease(self.concurrency * 2):
+                self.scheduler.put(url, depth)
+
+    async def _wait_until_done(self):
+        loop = asyncio.get_running_loop()
+        while not self.spider.is_finished():
+            # 持久化队列不足时在线程池中读取站点地图和订阅源，不阻塞事件循环
+            if self.spider.frontier.pending_count() < self.concurrency:
+                await loop.run_in_executor(self.executor, self.spider.seed_frontier, self.concurrency * 2)
+            await loop.run_in_executor(self.executor, self._refill)
+            if self.scheduler.empty() and not self.in_flight and not self.spider.retry_queue.pending():
+                break
+            await asyncio.sleep(0.5)
+
+    async def _worker(self, session):
+        loop = asyncio.get_running_loop()
+        while not self.spider.is_finished():
+            url = await self._next_url()
+            if url in self.in_flight:
+                continue
+
+            self.in_flight.add(url)
+            try:
+                # 达到上限后只处理到期重访的页面
+                previous = self.spider.frontier.get_page(url)
+                if self.spider._reach_crawl_limit() and previous is None:
+                    continue
+                result = await self._fetch(session, url, previous)
+
+                # 解析、分词与存储在线程池中执行，避免阻塞事件循环；新链接写入持久化队列
+                await loop.run_in_executor(self.executor, self.spider.complete_fetch, url, result, previous)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 失败的请求进入延迟重试队列，协程立即处理下一个URL
+                print(f'Fetch failed at {url}: {str(e)}')
+                await loop.run_in_executor(self.executor, self.spider.schedule_retry, url, classify_exception(e))
+
+            except Exception as e:
+                print(f'Critical error at {url}: {str(e)}')
+                await loop.run_in_executor(self.executor, self.spider._handle_crawl_error, url)
+            finally:
+                self.in_flight.discard(url)
+
+    async def _next_url(self):
+        """从调度器取出URL，所有主机都被限速或队列为空时异步等待"""
+        while True:
+            url, wait = self.scheduler.poll()
+            if url is not None:
+                return url
+            await asyncio.sleep(min(wait, 0.5) if wait is not None else 0.5)
+
+    async def _fetch(self, session, page_url, previous=None):
+        """执行一次条件请求，请求异常由调用方安排重试"""
+        headers = {**self.spider._generate_headers(page_url), **self.spider.conditional_headers(previous)}
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        controller = self.spider.concurrency
+        await self._acquire_slot()
+        # 等待全局连接配额时被取消（如关闭时），槽位同样要归还
+        try:
+            await self._acquire_connection()
+            start = time.monotonic()
+            try:
+                async with session.get(page_url, headers=headers, allow_redirects=True) as response:
+                    result = await self._read_response(page_url, response)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                controller.record(time.monotonic() - start, error=True)
+                raise
+            finally:
+                self._release_connection()
+        finally:
+            controller.release()
+        latency = time.monotonic() - start
+        controller.record(latency, error=result.status in RETRY_STATUS)
+        self.spider.session_pool.record_latency(page_url, latency)
+        return result
+
+    async def _read_response(self, page_url, response):
+        """与同步引擎一致：过滤非HTML内容，流式读取不超过max_bytes的正文并解码"""
+        decoder = self.spider.decoder
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if response.status == 304 or response.status in RETRY_STATUS:
+            return FetchResult(
+                response.status, None, etag, last_modified, parse_retry_after(response.headers.get('Retry-After'))
+            )
+        content_type = response.headers.get('Content-Type')
+        if not decoder.accepts(content_type):
+            return FetchResult(response.status, None, etag, last_modified, skipped=content_type)
+
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(decoder.chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= decoder.max_bytes:
+                truncated = True
+                break
+        if truncated:
+            print(f'Truncated {page_url} at {decoder.max_bytes} bytes')
+        body = b''.join(chunks)[:decoder.max_bytes]
+        return FetchResult(response.status, decoder.decode(body, content_type), etag, last_modified)
+
+    async def _acquire_slot(self):
+        """等待AIMD控制器的请求槽位"""
+        while not self.spider.concurrency.try_acquire():
+            await asyncio.sleep(0.05)
+
+    async def _acquire_connection(self):
+        """获取跨进程的全局连接配额，等待时不阻塞事件循环"""
+        if self.connection_limit is None:
+            return
+        while not self.connection_limit.acquire(False):
+            await asyncio.sleep(0.05)
+
+    def _release_connection(self):
+        if self.connection_limit is not None:
+            self.connection_limit.release()
+
+    async def _monitor(self):
+        while True:
+            print(f"[{self.config['name']}] Progress: {self.spider.crawled_count}/{self.spider.max_pages} "
+                  f"| Queue: {self.scheduler.qsize()} | In flight: {len(self.in_flight)} "
+                  f"| Throughput: {self.scheduler.stats()['pages_per_sec']} pages/s")
+            print_spider_status(self.spider)
+            await asyncio.sleep(5)
+
+    @staticmethod
+    def _ssl_context():
+        """与同步引擎一致：使用certifi证书并允许旧版TLS重协商"""
+        ctx = ssl.create_default_context(cafile=certifi.where())
+        ctx.options |= 0x4  # OP_LEGACY_SERVER_CONNECT
+        return ctx
@@ -0,0 +1,82 @@
+"""
+线程引擎与asyncio引擎的对比基准：在本地启动一个带人工延迟的测试HTTP服务器，
+分别用两种引擎以相同的并发数爬取相同数量的页面并输出吞吐量
+
+用法: python bench_engines.py [页面数] [服务器延迟秒数] [并发数]
+"""
+import sys
+import time
+import shutil
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from main import create_master, project_dir
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    fanout = 5
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        try:
+            page_id = int(self.path.rstrip('/').rsplit('/', 1)[-1])
+        except ValueError:
+            page_id = 0
+        links = ''.join(
+            f'<a href="/page/{page_id * self.fanout + i}">page {page_id * self.fanout + i}</a>'
+            for i in range(1, self.fanout + 1)
+        )
+        body = (f'<html><head><title>Page {page_id}</title></head><body>'
+                f'<p>benchmark page {page_id} with some sample text for tokenization</p>'
+                f'{links}</body></html>').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_engine(engine, homepage, max_pages, concurrency):
+    # 固定AIMD槽位：线程引擎按max_slots创建工作线程，异步引擎按concurrency创建协程，两者同时在途的请求数相同
+    config = {
+        'name': f'bench-{engine}',
+        'homepage': homepage,
+        'max_pages': max_pages,
+        'language': 'en',
+        'threads': concurrency,
+        'concurrency': concurrency,
+        'aimd': {'initial_slots': concurrency, 'max_slots': concurrency},
+        'engine': engine
+    }
+    # 上次中断的运行遗留的数据目录会使爬取立即结束
+    shutil.rmtree(project_dir(config), ignore_errors=True)
+    master = create_master(config)
+    started = time.monotonic()
+    runner = threading.Thread(target=master.start, daemon=True)
+    runner.start()
+    while master.spider.crawled_count < max_pages and runner.is_alive():
+        time.sleep(0.1)
+    elapsed = time.monotonic() - started
+    # 引擎结束时会关闭Spider（写出索引队列、关闭存储），之后才能删除数据目录
+    runner.join()
+    shutil.rmtree(master.project_name, ignore_errors=True)
+    return elapsed
+
+
+if __name__ == '__main__':
+    max_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    _PageHandler.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    homepage = f'http://127.0.0.1:{server.server_port}/page/0'
+
+    for engine in ('thread', 'async'):
+        elapsed = run_engine(engine, homepage, max_pages, concurrency)
+        print(f'{engine:>6} (concurrency {concurrency}): {max_pages} pages in {elapsed:.2f}s ({max_pages / elapsed:.1f} pages/s)')
+
+    server.shutdown()
@@ -0,0 +1,97 @@
+"""
+本地词典分词与ES _analyze接口的对比基准：对同一批中文页面分别分词，
+输出吞吐量以及本地分词结果与ik_max_word结果的词语重合度（Jaccard）
+
+用法: python bench_segmenter.py [打包存储目录或原始文本目录] [最多文档数]
+默认读取 crawler/zh 下所有站点的 segments 打包存储（txt格式的站点读取 downloads/original）
+"""
+import re
+import sys
+import time
+from pathlib import Path
+from analyze_client import AnalyzeClient
+from cn_segmenter import ChineseSegmenter
+from segment_store import SegmentStore, DATA_FILE
+
+_HAN = re.compile(r'[\u4e00-\u9fa5]')
+
+
+def _read_segments(directory, limit):
+    store = SegmentStore(str(directory), readonly=True)
+    try:
+        return [record.original for _, record in zip(range(limit), store)]
+    finally:
+        store.close()
+
+
+def _read_txt(files, limit):
+    return [path.read_text(encoding='utf-8', errors='replace') for path in sorted(files)[:limit]]
+
+
+def load_documents(directory, limit):
+    if directory:
+        directory = Path(directory)
+        if (directory / DATA_FILE).is_file():
+            return _read_segments(directory, limit)
+        return _read_txt(directory.glob('*.txt'), limit)
+
+    texts = []
+    root = Path(__file__).parent.parent / 'crawler' / 'zh'
+    for site in sorted(root.iterdir()) if root.is_dir() else []:
+        if len(texts) >= limit:
+            break
+        if (site / 'segments' / DATA_FILE).is_file():
+            texts.extend(_read_segments(site / 'segments', limit - len(texts)))
+        else:
+            texts.extend(_read_txt((site / 'downloads' / 'original').glob('*.txt'), limit - len(texts)))
+    return texts
+
+
+def chinese_tokens(tokens):
+    return {token for token in tokens if _HAN.match(token)}
+
+
+def report(name, texts, elapsed):
+    chars = sum(len(text) for text in texts)
+    print(f'{name:>16}: {len(texts)} docs in {elapsed:.2f}s '
+          f'({len(texts) / elapsed:.1f} docs/s, {chars / elapsed / 1000:.1f}k chars/s)')
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    texts = load_documents(directory, limit)
+    if not texts:
+        sys.exit('No documents found')
+
+    start = time.perf_counter()
+    segmenter = ChineseSegmenter()
+    print(f'Dictionary loaded in {time.perf_counter() - start:.2f}s ({segmenter.dict_path})')
+
+    start = time.perf_counter()
+    local_results = [segmenter.cut(text) for text in texts]
+    report('local', texts, time.perf_counter() - start)
+
+    client = AnalyzeClient()
+    start = time.perf_counter()
+    es_results = [client.analyze(text) for text in texts]
+    report('es (per doc)', texts, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    client.analyze_many(texts)
+    report('es (batched)', texts, time.perf_counter() - start)
+    print(f"ES latency avg/p95: {client.stats()['avg_latency_ms']}/{client.stats()['p95_latency_ms']}ms")
+    client.close()
+
+    # 与ik_max_word输出的重合度
+    scores = []
+    for local_tokens, es_tokens in zip(local_results, es_results):
+        if es_tokens is None:
+            continue
+        local_set, es_set = chinese_tokens(local_tokens), chinese_tokens(es_tokens)
+        if local_set or es_set:
+            scores.append(len(local_set & es_set) / len(local_set | es_set))
+    if scores:
+        print(f'Token overlap with ik_max_word: {sum(scores) / len(scores):.3f} (Jaccard, {len(scores)} docs)')
+    else:
+        print('ES unavailable, overlap not measured')
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# 可重试的单条写入状态：限流和服务端错误
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class BulkIndexer:
+    """
+    后台批量索引器：爬取线程只做一次入队，写入Elasticsearch全部在后台完成
+    - 按文档数、字节数或时间间隔（先到者为准）组成一批，通过_bulk接口写入
+    - 最多同时有max_in_flight个请求在途；队列满时入队阻塞，形成背压
+    - 只重试失败的条目（429/5xx），映射错误等不可重试的条目记录后丢弃
+    - Elasticsearch不可达时整批写入磁盘暂存文件，恢复后自动回放
+    :param es_client: ElasticsearchClient
+    :param spool_path: 暂存文件路径（JSON Lines）
+    :param on_indexed: 回调 func(count)，每批成功写入后调用
+    """
+
+    def __init__(self, es_client, spool_path, max_docs=500, max_bytes=5 * 1024 * 1024, flush_interval=2.0,
+                 max_in_flight=2, max_retries=3, queue_size=10000, replay_interval=30, on_indexed=None):
+        self.es_client = es_client
+        self.spool_path = spool_path
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.replay_interval = replay_interval
+        self.on_indexed = on_indexed
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._spool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {'batches': 0, 'indexed': 0, 'retried': 0, 'dropped': 0, 'spooled': 0, 'replayed': 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, doc_id, document):
+        """入队一个文档；队列满时阻塞直到后台消化"""
+        self._queue.put((doc_id, document))
+
+    def _run(self):
+        batch, size = [], 0
+        deadline = time.monotonic() + self.flush_interval
+        next_replay = time.monotonic()
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # 单个条目或一次回放出错不能终止后台线程，否则add()会在队列满后永远阻塞
+            try:
+                if item is not None:
+                    try:
+                        size += len(json.dumps(item[1], ensure_ascii=False).encode('utf-8'))
+                        batch.append(item)
+                    except (TypeError, ValueError) as e:
+                        print(f"文档无法序列化，已丢弃：{item[0]} {str(e)}")
+                        self._incr('dropped')
+
+                now = time.monotonic()
+                if batch and (len(batch) >= self.max_docs or size >= self.max_bytes or now >= deadline):
+                    pending, batch, size = batch, [], 0
+                    self._submit(pending)
+                if now >= deadline:
+                    deadline = now + self.flush_interval
+
+                if now >= next_replay:
+                    next_replay = now + self.replay_interval
+                    self._replay_spool()
+            except Exception as e:
+                print(f"批量索引线程异常：{str(e)}")
+
+            if self._stop.is_set() and self._queue.empty() and not batch:
+                return
+
+    def _submit(self, batch):
+        # 在途请求数达到上限时在此等待
+        self._in_flight.acquire()
+        try:
+            future = self._executor.submit(self._send, batch)
+        except Exception:
+            self._in_flight.release()
+            raise
+        future.add_done_callback(lambda _: self._in_flight.release())
+        return future
+
+    def _send(self, batch):
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                results = self.es_client.bulk_index(pending)
+            except Exception as e:
+                print(f"ES批量写入异常，写入暂存文件：{str(e)}")
+                self._spool(pending)
+                return
+
+            retry = []
+            indexed = 0
+            for item, (status, error) in zip(pending, results):
+                if status < 300:
+                    indexed += 1
+                elif status in RETRYABLE_STATUS:
+                    retry.append(item)
+                else:
+                    print(f"索引失败：{item[1].get('url')} {error}")
+                    self._incr('dropped')
+            self._incr('batches')
+            self._record_indexed(indexed)
+
+            if not retry:
+                return
+            pending = retry
+            self._incr('retried', len(retry))
+            time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.5))
+
+        # 多次重试仍然失败，留待下次回放
+        self._spool(pending)
+
+    def _record_indexed(self, count):
+        if count:
+            self._incr('indexed', count)
+            if self.on_indexed:
+                self.on_indexed(count)
+
+    def _spool(self, items):
+        with self._spool_lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                for doc_id, document in items:
+                    f.write(json.dumps({'id': doc_id, 'doc': document}, ensure_ascii=False) + '\n')
+        self._incr('spooled', len(items))
+
+    def _replay_spool(self):
+        """Elasticsearch恢复后分批回放暂存文件（回放失败的条目会重新写入暂存文件）"""
+        replay_path = self.spool_path + '.replay'
+        if not (os.path.isfile(self.spool_path) or os.path.isfile(replay_path)) or not self.es_client.ping():
+            return
+        with self._spool_lock:
+            # 上次回放中断时先处理遗留文件
+            if not os.path.isfile(replay_path):
+                os.replace(self.spool_path, replay_path)
+
+        batch, count, futures = [], 0, []
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                batch.append((record['id'], record['doc']))
+                count += 1
+                if len(batch) >= self.max_docs:
+                    futures.append(self._submit(batch))
+                    batch = []
+        if batch:
+            futures.append(self._submit(batch))
+        # 回放的批次写入ES或重新写入暂存文件后才能删除，期间中断时下次从遗留文件重新回放
+        wait(futures)
+        if any(future.exception() for future in futures):
+            print(f"回放暂存文件失败，保留 {replay_path} 待下次回放")
+            return
+        self._incr('replayed', count)
+        os.remove(replay_path)
+
+    def _incr(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            return {**self._stats, 'queued': self._queue.qsize()}
+
+    def close(self, timeout=60):
+        """写出剩余文档并等待在途请求完成"""
+        self._stop.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,245 @@
+import os
+import re
+import math
+import marshal
+import importlib.util
+from array import array
+from bisect import bisect_left
+
+# 中文连续片段用词典切分；英文单词和数字整体作为一个词元；其余字符（标点等）丢弃
+_BLOCK = re.compile(r'([\u4e00-\u9fa5]+|[a-zA-Z0-9]+(?:[.+#\-][a-zA-Z0-9]+)*)')
+_HAN = re.compile(r'[\u4e00-\u9fa5]')
+
+# 本地默认词典位置（jieba格式："词 词频 [词性]"）
+DEFAULT_DICT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dict.txt')
+# 词典缓存目录（项目的crawler目录下，不写入词典所在目录）
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../crawler/.cache'))
+# 缓存格式版本，格式变化时递增
+_CACHE_VERSION = 2
+
+
+def find_dictionary(dict_path=None):
+    """按顺序查找词典：显式指定 → spider/dict.txt → 已安装jieba自带的dict.txt"""
+    if dict_path:
+        return dict_path
+    if os.path.isfile(DEFAULT_DICT):
+        return DEFAULT_DICT
+    spec = importlib.util.find_spec('jieba')
+    if spec and spec.origin:
+        path = os.path.join(os.path.dirname(spec.origin), 'dict.txt')
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class ChineseSegmenter:
+    """
+    进程内中文分词，不依赖Elasticsearch
+    - 词典为按字典序排列的词数组和并列的词频数组：以某个片段为前缀的词在数组中连续，
+      二分查找即可判断能否继续匹配，不需要展开全部前缀
+    - 构建句子的所有成词路径（DAG），按词频取概率最大的切分
+    - max_word模式额外输出路径之外的所有词典词，接近ik_max_word的细粒度输出
+    - 首次加载后词数组（一个换行分隔的字符串）和词频数组缓存到 crawler/.cache，之后启动只需切分字符串
+    - 没有可用词典时退化为重叠二元切分（与ES的cjk分析器相同）
+    :param dict_path: 主词典路径，None时自动查找
+    :param user_dict: 用户词典路径（"词 [词频]"，每行一个）
+    :param cache_dir: 词典缓存目录，默认 crawler/.cache
+    """
+
+    def __init__(self, dict_path=None, user_dict=None, cache_dir=None):
+        self.dict_path = find_dictionary(dict_path)
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.words, self.counts, self.total = self._load(self.dict_path)
+        # 首字 -> 以该字开头的词在数组中的区间 (起, 止)，二分查找只在区间内进行
+        self._ranges = None
+        self.log_total = math.log(self.total) if self.total else 0.0
+        if self.dict_path is None:
+            print('No Chinese dictionary found, falling back to bigram segmentation')
+        if user_dict:
+            self.load_user_dict(user_dict)
+
+    def _cache_path(self, dict_path):
+        return os.path.join(self.cache_dir, os.path.basename(dict_path) + '.cache')
+
+    def _load(self, dict_path):
+        if dict_path is None:
+            return [], array('q'), 0
+
+        cache_path = self._cache_path(dict_path)
+        mtime = os.path.getmtime(dict_path)
+        try:
+            with open(cache_path, 'rb') as f:
+                version, cached_path, cached_mtime, words, counts, total = marshal.load(f)
+            if (version, cached_path, cached_mtime) == (_CACHE_VERSION, os.path.abspath(dict_path), mtime):
+                return words.split('\n'), array('q', counts), total
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        freq = {}
+        with open(dict_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(' ')
+                if len(parts) < 2 or not parts[1].isdigit():
+                    continue
+                freq[parts[0]] = int(parts[1])
+        words = sorted(freq)
+        counts = array('q', (freq[word] for word in words))
+        total = sum(counts)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(
+                    (_CACHE_VERSION, os.path.abspath(dict_path), mtime, '\n'.join(words), counts.tobytes(), total), f
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f'Failed to cache dictionary: {str(e)}')
+        return words, counts, total
+
+    def _lookup(self, fragment, lo=0):
+        """
+        二分查找片段，返回 (位置, 是否为词典词, 是否为某个词的前缀)
+        位置可作为更长片段（以该片段开头）查找的下界
+        """
+        i = bisect_left(self.words, fragment, lo)
+        if i == len(self.words) or not self.words[i].startswith(fragment):
+            return i, False, False
+        return i, self.words[i] == fragment, True
+
+    def word_freq(self, word, default=0):
+        """词典词的词频；只是某个词的前缀时为0；不在词典中时为default"""
+        i, found, is_prefix = self._lookup(word)
+        if found:
+            return self.counts[i]
+        return 0 if is_prefix else default
+
+    def load_user_dict(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(' ')
+                if parts[0]:
+                    self.add_word(parts[0], int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None)
+
+    def add_word(self, word, freq=None):
+        """添加词语；不指定词频时取刚好能使其作为整体切出的词频"""
+        if freq is None:
+            freq = self.suggest_freq(word)
+        i, found, _ = self._lookup(word)
+        if found:
+            self.total += freq - self.counts[i]
+            self.counts[i] = freq
+        else:
+            self.total += freq
+            self.words.insert(i, word)
+            self.counts.insert(i, freq)
+            self._ranges = None
+        self.log_total = math.log(self.total) if self.total else 0.0
+
+    def suggest_freq(self, word):
+        if not self.total:
+            return 1
+        probability = 1.0
+        for segment in self._cut_block(word):
+            probability *= self.word_freq(segment, 1) / self.total
+        return max(int(probability * self.total) + 1, self.word_freq(word, 1))
+
+    def _char_ranges(self):
+        """按首字划分的区间，添加新词后重新计算"""
+        if self._ranges is None:
+            ranges = {}
+            i, n = 0, len(self.words)
+            while i < n:
+                first = self.words[i][0]
+                # 数组有序，下一个首字的起点即第一个不小于 chr(首字+1) 的词
+                end = bisect_left(self.words, chr(ord(first) + 1), i) if ord(first) < 0x10ffff else n
+                ranges[first] = (i, end)
+                i = end
+            self._ranges = ranges
+        return self._ranges
+
+    def _dag(self, block):
+        """每个起点能成词的所有终点及其词频 [(终点, 词频)]（含单字，单字不在词典中时词频为0）"""
+        words, counts, ranges = self.words, self.counts, self._char_ranges()
+        n = len(block)
+        dag = []
+        for k in range(n):
+            span = ranges.get(block[k])
+            if span is None:
+                dag.append([(k, 0)])
+                continue
+            lo, hi = span
+            # 单字若是词典词，一定排在区间首位
+            ends = [(k, counts[lo] if words[lo] == block[k] else 0)]
+            for i in range(k + 1, n):
+                fragment = block[k:i + 1]
+                lo = bisect_left(words, fragment, lo, hi)
+                if lo == hi or not words[lo].startswith(fragment):
+                    break
+                if counts[lo] and words[lo] == fragment:
+                    ends.append((i, counts[lo]))
+            dag.append(ends)
+        return dag
+
+    def _route(self, block, dag):
+        """从后往前动态规划，求对数概率最大的切分"""
+        n = len(block)
+        route = [(0.0, 0)] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            route[k] = max(
+                (math.log(freq or 1) - self.log_total + route[x + 1][0], x)
+                for x, freq in dag[k]
+            )
+        return route
+
+    def _cut_block(self, block):
+        dag = self._dag(block)
+        route = self._route(block, dag)
+        words = []
+        k = 0
+        while k < len(block):
+            end = route[k][1] + 1
+            words.append(block[k:end])
+            k = end
+        return words
+
+    def _cut_block_max_word(self, block):
+        """输出所有长度不小于2的词典词；未被任何多字词覆盖的字单独输出"""
+        dag = self._dag(block)
+        covered = [False] * len(block)
+        spans = []
+        for k, ends in enumerate(dag):
+            for end, _ in ends:
+                if end > k:
+                    spans.append((k, end))
+                    for i in range(k, end + 1):
+                        covered[i] = True
+        for k, is_covered in enumerate(covered):
+            if not is_covered:
+                spans.append((k, k))
+        spans.sort()
+        return [block[start:end + 1] for start, end in spans]
+
+    @staticmethod
+    def _bigrams(block):
+        if len(block) == 1:
+            return [block]
+        return [block[i:i + 2] for i in range(len(block) - 1)]
+
+    def cut(self, text, max_word=True):
+        """
+        分词
+        :param max_word: True输出细粒度的所有可能词（类似ik_max_word），False只输出最优切分（类似ik_smart）
+        """
+        tokens = []
+        for block in _BLOCK.findall(text):
+            if not _HAN.match(block):
+                tokens.append(block.lower())
+            elif not self.total:
+                tokens.extend(self._bigrams(block))
+            elif max_word:
+                tokens.extend(self._cut_block_max_word(block))
+            else:
+                tokens.extend(self._cut_block(block))
+        return tokens
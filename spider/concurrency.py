@@ -0,0 +1,128 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class AIMDController:
+    """
+    按站点自适应调整并发请求数（AIMD：加性增、乘性减）
+    - 每个请求结束后记录耗时以及是否为错误（超时、连接失败、429/5xx）
+    - 每隔interval秒根据最近window个请求的延迟分位数和错误率调整一次：
+      错误率超过max_error_rate，或p95延迟超过基准p50的latency_factor倍（或超过target_latency）时并发数乘以decrease；
+      否则若并发已被占满，则加increase
+    - 基准p50取运行以来观测到的最小p50，即主机未拥塞时的响应时间，无需手动配置
+    :param min_slots: 并发下限
+    :param max_slots: 并发上限（线程引擎据此创建工作线程数）
+    :param initial_slots: 初始并发数
+    """
+
+    def __init__(self, min_slots=1, max_slots=32, initial_slots=None, increase=1, decrease=0.5,
+                 max_error_rate=0.05, latency_factor=3.0, target_latency=None, window=100, min_samples=10, interval=5.0):
+        self.min_slots = min_slots
+        self.max_slots = max_slots
+        self.limit = min(max(initial_slots or min_slots, min_slots), max_slots)
+        self.increase = increase
+        self.decrease = decrease
+        self.max_error_rate = max_error_rate
+        self.latency_factor = latency_factor
+        self.target_latency = target_latency
+        self.min_samples = min_samples
+        self.interval = interval
+
+        self.in_use = 0
+        self._cond = threading.Condition()
+        self._samples = deque(maxlen=window)
+        self._saturated = False
+        self._baseline = None
+        self._adjusted_at = time.monotonic()
+        self._last = {'p50': 0.0, 'p95': 0.0, 'error_rate': 0.0}
+        self.decisions = deque(maxlen=20)
+
+    def try_acquire(self):
+        """非阻塞地占用一个请求槽位（供asyncio引擎轮询）"""
+        with self._cond:
+            if self.in_use >= self.limit:
+                self._saturated = True
+                return False
+            self.in_use += 1
+            if self.in_use >= self.limit:
+                self._saturated = True
+            return True
+
+    def acquire(self):
+        with self._cond:
+            while self.in_use >= self.limit:
+                self._saturated = True
+                self._cond.wait()
+            self.in_use += 1
+            if self.in_use >= self.limit:
+                self._saturated = True
+
+    def release(self):
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, latency, error=False):
+        """记录一次请求结果，到达调整周期时调整并发数"""
+        with self._cond:
+            self._samples.append((latency, error))
+            if time.monotonic() - self._adjusted_at >= self.interval and len(self._samples) >= self.min_samples:
+                self._adjust()
+
+    def _adjust(self):
+        """调用方需持有锁"""
+        latencies = sorted(latency for latency, error in self._samples if not error)
+        errors = sum(1 for _, error in self._samples if error)
+        error_rate = errors / len(self._samples)
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0
+        if latencies:
+            self._baseline = p50 if self._baseline is None else min(self._baseline, p50)
+
+        previous = self.limit
+        if error_rate > self.max_error_rate:
+            reason = f'error rate {error_rate:.1%}'
+            self.limit = max(self.min_slots, int(self.limit * self.decrease))
+        elif self._congested(p95):
+            reason = f'p95 {p95 * 1000:.0f}ms (baseline {self._baseline * 1000:.0f}ms)'
+            self.limit = max(self.min_slots, int(self.limit * self.decrease))
+        elif self._saturated:
+            reason = 'all slots busy'
+            self.limit = min(self.max_slots, self.limit + self.increase)
+        else:
+            reason = 'slots idle'
+
+        if self.limit != previous:
+            self.decisions.append(f'{time.strftime("%H:%M:%S")} {previous}->{self.limit} ({reason})')
+            # 清空样本，下一周期只观察新并发数下的表现
+            self._samples.clear()
+            self._cond.notify_all()
+        self._last = {'p50': p50, 'p95': p95, 'error_rate': error_rate}
+        self._saturated = False
+        self._adjusted_at = time.monotonic()
+
+    def _congested(self, p95):
+        if self.target_latency is not None and p95 > self.target_latency:
+            return True
+        return bool(self._baseline) and p95 > self._baseline * self.latency_factor
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_use': self.in_use,
+                'p50_ms': round(self._last['p50'] * 1000, 1),
+                'p95_ms': round(self._last['p95'] * 1000, 1),
+                'error_rate': round(self._last['error_rate'], 3),
+                'last_decision': self.decisions[-1] if self.decisions else None
+            }
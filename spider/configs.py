@@ -1,5 +1,123 @@
 max_pages = 10  # 设置最大爬取页面数
 
+# 长连接池默认配置（可在单个站点配置中用 'session_pool' 覆盖）
+SESSION_POOL = {
+    'pool_size': 10,        # 每个主机保持的最大连接数
+    'keep_alive': True,     # 是否复用连接
+    'idle_timeout': 60      # 主机会话空闲淘汰时间（秒）
+}
+
+# 已见URL集合（可扩展布隆过滤器）默认配置（可在单个站点配置中用 'seen_set' 覆盖）
+SEEN_SET = {
+    'capacity': 1_000_000,          # 第一层容量，之后每层翻倍
+    'error_rate': 0.001,            # 目标误判率
+    'max_bytes': 64 * 1024 * 1024   # 内存上限
+}
+
+# 多站点并发爬取配置（每个站点或 'group' 相同的一组站点运行在独立进程中）
+ORCHESTRATOR = {
+    'max_processes': None,      # 同时运行的进程数，None表示CPU核数
+    'max_connections': 64,      # 所有进程共享的并发连接上限
+    'stall_timeout': 600        # 进度停滞多少秒后终止该站点进程
+}
+
+# 增量重爬：条件请求 + 自适应重访间隔（秒），站点可通过 'revisit' 覆盖
+REVISIT = {
+    'enabled': False,
+    'initial_interval': 86400,
+    'min_interval': 3600,
+    'max_interval': 30 * 86400
+}
+
+# 近似重复检测（SimHash），站点可通过 'dedup' 覆盖
+DEDUP = {
+    'enabled': True,
+    'threshold': 0.95,      # 相似度阈值（1 - 汉明距离/64），0.95约等于汉明距离不超过3
+    'shingle_size': 5       # 字符shingle长度
+}
+
+# 后台批量索引（_bulk），站点可通过 'bulk_indexer' 覆盖
+BULK_INDEXER = {
+    'max_docs': 500,                # 每批最多文档数
+    'max_bytes': 5 * 1024 * 1024,   # 每批最大字节数
+    'flush_interval': 2.0,          # 最长等待秒数
+    'max_in_flight': 2,             # 同时在途的_bulk请求数
+    'max_retries': 3,               # 失败条目的重试次数
+    'queue_size': 10000             # 内存队列上限，满时爬取线程阻塞
+}
+
+# 中文分词（ES _analyze）客户端，站点可通过 'analyze' 覆盖
+ANALYZE = {
+    'analyzer': 'ik_max_word',
+    'max_token_count': 10000,   # 与ES的index.analyze.max_token_count一致
+    'max_batch_texts': 32,      # 单次请求最多合并的片段数
+    'max_concurrency': 4,       # 同时在途的请求数
+    'timeout': 30
+}
+
+# 进程内中文分词，站点可通过 'cn_segmenter' 覆盖
+CN_SEGMENTER = {
+    'mode': 'es',           # 'es'：ES分词，失败时用本地分词降级；'local'：只用本地分词，不访问ES
+    'max_word': True,       # 细粒度输出（类似ik_max_word）
+    'dict_path': None,      # 主词典（jieba格式），None时使用spider/dict.txt或jieba自带词典
+    'user_dict': None       # 用户词典
+}
+
+# 页面存储，站点可通过 'storage' 覆盖
+STORAGE = {
+    'format': 'segment',    # 'segment'：打包压缩存储（segments/）；'txt'：downloads/下每个URL两个.txt文件
+    'compress_level': 6
+}
+
+# 各类错误的重试策略（max_attempts含首次请求，等待 base_delay*2^(n-1) 秒并加抖动），站点可通过 'retry' 覆盖
+RETRY_POLICIES = {
+    'timeout': {'max_attempts': 3, 'base_delay': 2, 'max_delay': 60},
+    'connection': {'max_attempts': 4, 'base_delay': 5, 'max_delay': 120},
+    'rate_limited': {'max_attempts': 5, 'base_delay': 30, 'max_delay': 600},   # 429，遵守Retry-After
+    'server_error': {'max_attempts': 3, 'base_delay': 10, 'max_delay': 300},
+    'other': {'max_attempts': 2, 'base_delay': 5, 'max_delay': 60}
+}
+
+# 流式获取页面（站点可通过 'fetch' 覆盖）
+FETCH = {
+    'max_bytes': 2 * 1024 * 1024,  # 正文最多读取的字节数，超出部分丢弃
+    'content_types': ['text/html', 'application/xhtml+xml'],  # 接受的内容类型，其余只读响应头
+    'sniff_bytes': 4096,  # 在正文开头查找<meta charset>的范围
+    'detect_sample': 32 * 1024  # 未声明编码时用于统计检测的样本大小
+}
+
+# 从站点地图和RSS/Atom订阅源补充种子URL（站点可通过 'seeder' 覆盖）
+SEEDER = {
+    'enabled': True,
+    'use_robots': True,  # 读取robots.txt中的Sitemap指令，都没有时尝试 /sitemap.xml
+    'sitemaps': [],  # 额外的站点地图（支持站点地图索引和.gz）
+    'feeds': [],  # RSS/Atom订阅源
+    'max_sitemaps': 100,  # 每轮最多读取的站点地图/订阅源数量
+    'refresh_interval': 3600  # 来源耗尽后重新读取的间隔（秒）
+}
+
+# 自适应并发（AIMD）：每个周期按最近请求的延迟和错误率增减同时进行的请求数，站点可通过 'aimd' 覆盖
+# 线程引擎以 'threads' 为初始并发、按max_slots创建工作线程；async引擎以 'concurrency' 为上限
+AIMD = {
+    'min_slots': 1,
+    'max_slots': 32,
+    'increase': 1,  # 并发占满且无拥塞时每周期增加的槽位数
+    'decrease': 0.5,  # 拥塞时并发数乘以该系数
+    'max_error_rate': 0.05,  # 超时、连接失败、429/5xx占比超过该值视为拥塞
+    'latency_factor': 3.0,  # p95延迟超过观测到的最低p50的倍数时视为拥塞
+    'target_latency': None,  # 可选的p95延迟上限（秒）
+    'window': 100,  # 参与统计的最近请求数
+    'interval': 5.0  # 调整周期（秒）
+}
+
+# 流水线引擎（'engine': 'pipeline'）各阶段的工作线程数与输入队列长度，站点可通过 'pipeline' 按阶段覆盖
+# 抓取阶段的线程数取AIMD的max_slots；processes为True时该阶段使用同样数量的子进程（站点进程为守护进程时退回线程）
+PIPELINE = {
+    'parse': {'workers': 2, 'queue_size': 200, 'processes': False},  # HTML解析
+    'process': {'workers': 4, 'queue_size': 200, 'processes': False},  # 分词（中文走ES时为IO密集，线程即可）
+    'store': {'workers': 2, 'queue_size': 500}  # 存储、索引队列与新链接
+}
+
 # 配置多个爬虫任务
 CRAWLER_CONFIGS = [
     # CN
@@ -9,7 +127,11 @@ CRAWLER_CONFIGS = [
         'max_pages': max_pages,  # 控制爬取数量
         'language': 'cn',  # en/cn
         'threads': 4,
-        'delay': (1, 3)  # 自定义延迟范围
+        'delay': (1, 3),  # 同一主机两次请求的间隔范围（秒），也可用 'rate' 指定每秒请求数
+        'burst': 1,  # 令牌桶容量
+        'respect_crawl_delay': True,  # 遵守robots.txt中的Crawl-delay
+        'engine': 'thread',  # thread/async/pipeline，async引擎使用 'concurrency' 控制并发请求数
+        'html_backend': 'html.parser'  # html.parser/lxml（需安装lxml）
     },
     {
         'name': 'baidu',      # 百度
@@ -0,0 +1,139 @@
+import re
+import codecs
+
+# 默认接受的页面类型
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+# <meta charset="..."> 或 <meta http-equiv="Content-Type" content="text/html; charset=...">
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+# GB2312/GBK页面中经常混有超出声明字符集的字符，统一按其超集GB18030解码；
+# 声明为ASCII/Latin-1的页面按cp1252解码（正文实际是UTF-8时见 ContentDecoder.encoding_for）
+# 键为codecs.lookup规范化后的名称（如 'latin-1' → 'iso8859-1'），与normalize_encoding的查找一致
+_SUPERSETS = {
+    codecs.lookup(name).name: superset
+    for name, superset in {'gb2312': 'gb18030', 'gbk': 'gb18030', 'ascii': 'cp1252', 'latin-1': 'cp1252'}.items()
+}
+
+# 统计检测库为可选依赖（requests会安装其中之一）
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+try:
+    import chardet
+except ImportError:
+    chardet = None
+
+
+def parse_content_type(header):
+    """拆分Content-Type头，返回 (小写的MIME类型, 字符集或None)"""
+    if not header:
+        return '', None
+    mime, _, params = header.partition(';')
+    charset = None
+    for param in params.split(';'):
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = value.strip().strip('"\'') or None
+    return mime.strip().lower(), charset
+
+
+def normalize_encoding(name):
+    """返回Python可用的编码名，无法识别时返回None"""
+    if not name:
+        return None
+    try:
+        encoding = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return _SUPERSETS.get(encoding, encoding)
+
+
+def bom_encoding(head):
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+
+def sniff_charset(head):
+    """从正文开头的<meta charset>中取得编码"""
+    match = _META_CHARSET.search(head)
+    return normalize_encoding(match.group(1).decode('ascii')) if match else None
+
+
+def detect_charset(sample):
+    """对样本做统计检测，没有安装检测库时返回None"""
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(sample).best()
+        return best.encoding if best else None
+    if chardet is not None:
+        return chardet.detect(sample).get('encoding')
+    return None
+
+
+class ContentDecoder:
+    """
+    流式获取页面时的内容类型过滤、大小限制和解码
+    - 只接受content_types中的类型，未给出Content-Type时视为HTML
+    - 正文最多读取max_bytes字节，超出部分丢弃
+    - 编码依次取自BOM、Content-Type头、前sniff_bytes字节中的<meta charset>；
+      都没有时先尝试UTF-8，再对前detect_sample字节做统计检测，不再对整个正文检测
+    :param fallback_encoding: 检测不可用或失败时使用的编码
+    """
+
+    def __init__(self, max_bytes=2 * 1024 * 1024, content_types=HTML_TYPES, sniff_bytes=4096,
+                 detect_sample=32 * 1024, chunk_size=64 * 1024, fallback_encoding='utf-8'):
+        self.max_bytes = max_bytes
+        self.content_types = tuple(content_types)
+        self.sniff_bytes = sniff_bytes
+        self.detect_sample = detect_sample
+        self.chunk_size = chunk_size
+        self.fallback_encoding = fallback_encoding
+
+    def accepts(self, content_type):
+        mime, _ = parse_content_type(content_type)
+        return not mime or mime in self.content_types
+
+    def read(self, chunks):
+        """从字节块迭代器读取正文，返回 (正文, 是否被截断)"""
+        buffer = bytearray()
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= self.max_bytes:
+                return bytes(buffer[:self.max_bytes]), True
+        return bytes(buffer), False
+
+    def encoding_for(self, body, content_type=None):
+        head = body[:self.sniff_bytes]
+        _, charset = parse_content_type(content_type)
+        encoding = bom_encoding(head)
+        if encoding:
+            return encoding
+        encoding = normalize_encoding(charset) or sniff_charset(head)
+        if encoding == 'cp1252' and not body[:self.detect_sample].isascii() and self._is_utf8(body):
+            # 声明为ASCII/Latin-1/cp1252、实际为UTF-8的页面很常见，非ASCII部分是合法UTF-8时按UTF-8解码
+            return 'utf-8'
+        return encoding or self.detect(body)
+
+    def _is_utf8(self, body):
+        """前detect_sample字节是否为合法UTF-8（增量解码允许样本末尾截断的多字节字符）"""
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(body[:self.detect_sample], final=False)
+            return True
+        except UnicodeDecodeError:
+            return False
+
+    def detect(self, body):
+        """无声明编码时的检测：只检查前detect_sample字节"""
+        if self._is_utf8(body):
+            return 'utf-8'
+        return normalize_encoding(detect_charset(body[:self.detect_sample])) or self.fallback_encoding
+
+    def decode(self, body, content_type=None):
+        return body.decode(self.encoding_for(body, content_type), errors='replace')
@@ -0,0 +1,38 @@
+import threading
+
+
+class CrawlCounters:
+    """
+    线程安全的爬取计数器，读取为常数时间
+    - fetched: 成功获取的页面
+    - saved: 已保存到磁盘的新页面（用于max_pages判断）
+    - updated: 重访时内容有变化、已重新保存的页面
+    - unchanged: 重访时返回304或内容哈希未变、跳过处理的页面
+    - duplicates: 与已收录页面近似重复、跳过存储和索引的页面
+    - skipped: 内容类型不是HTML、未下载正文的URL
+    - indexed: 已写入Elasticsearch的页面
+    - retried: 安排重试的次数
+    - failed: 获取或处理失败的页面
+    """
+
+    FIELDS = ('fetched', 'saved', 'updated', 'unchanged', 'duplicates', 'skipped', 'indexed', 'retried', 'failed')
+
+    def __init__(self, initial=None):
+        self._lock = threading.Lock()
+        self._values = {name: 0 for name in self.FIELDS}
+        if initial:
+            for name, value in initial.items():
+                if name in self._values:
+                    self._values[name] = int(value)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] += amount
+            return self._values[name]
+
+    def get(self, name):
+        return self._values[name]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
@@ -1,15 +1,31 @@
+import threading
 from datetime import datetime
 from elasticsearch import Elasticsearch
 
 class ElasticsearchClient:
+    """
+    构造时不连接Elasticsearch：索引和pipeline在第一次写入时创建，
+    启动时ES不可达也能正常爬取（BulkIndexer先写入暂存文件，恢复后回放）
+    """
+
     def __init__(self, endpoint="http://localhost:9200"):
         self.es = Elasticsearch(
             [endpoint],
             verify_certs=False,
             ssl_show_warn=False
         )
-        self._ensure_pipeline()
-        self._ensure_index()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def _ensure_ready(self):
+        """确保pipeline和索引存在，连接异常直接抛出"""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if not self._ready:
+                self._ensure_pipeline()
+                self._ensure_index()
+                self._ready = True
 
     def _ensure_index(self):
         if not self.es.indices.exists(index="search_craft"):
@@ -54,6 +70,8 @@ class ElasticsearchClient:
                     "analyze": {
                         "max_token_count": 50000  # 设置为需要的最大值
                     },
+                    # 爬取期间持续批量写入，降低刷新频率
+                    "refresh_interval": "30s",
                     "number_of_shards": 1,
                     "number_of_replicas": 1
                 }
@@ -87,10 +105,12 @@ class ElasticsearchClient:
             }
             self.es.ingest.put_pipeline(id=pipeline_id, body=pipeline_body)
 
-    def index_document(self, document):
+    def index_document(self, document, doc_id=None):
         try:
+            self._ensure_ready()
             return self.es.index(
                 index="search_craft",
+                id=doc_id,
                 document=document,
                 pipeline="search_craft_pipeline",
                 timeout='30s'
@@ -98,3 +118,26 @@ class ElasticsearchClient:
         except Exception as e:
             print(f"ES写入异常：{str(e)}")
             return None
+
+    def bulk_index(self, items):
+        """
+        通过_bulk接口批量写入，连接异常直接抛出由调用方处理
+        :param items: [(doc_id, document), ...]
+        :return: 与items一一对应的结果列表，每项为 (status, error)
+        """
+        self._ensure_ready()
+        operations = []
+        for doc_id, document in items:
+            operations.append({"index": {"_index": "search_craft", "_id": doc_id}})
+            operations.append(document)
+        response = self.es.bulk(operations=operations, pipeline="search_craft_pipeline", timeout='30s')
+        return [
+            (item['index']['status'], item['index'].get('error'))
+            for item in response['items']
+        ]
+
+    def ping(self):
+        try:
+            return self.es.ping()
+        except Exception:
+            return False
@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# URL状态
+QUEUED = 0      # 等待爬取
+LEASED = 1      # 已取出交给工作线程
+CRAWLED = 2     # 爬取完成
+FAILED = 3      # 爬取失败
+
+
+class Frontier:
+    """
+    基于SQLite(WAL)的持久化爬取边界，替代每页全量重写的queue.txt/crawled.txt
+    - 每次状态变化只追加写入WAL，不再排序、重写整个文件
+    - 定期执行checkpoint和增量vacuum进行压缩
+    - 异常退出后，已取出但未完成的URL会在下次启动时重新入队
+    - 待爬队列保存在磁盘上，内存中只保留按批取出的部分
+    """
+
+    def __init__(self, project_name, base_url, compact_every=1000):
+        self.db_path = os.path.join(project_name, 'frontier.db')
+        self.compact_every = compact_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        is_new = not os.path.isfile(self.db_path)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        if is_new:
+            self._conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                state INTEGER NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_state ON urls(state)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        # 已抓取页面的校验信息与重访计划
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                fetched_at REAL NOT NULL,
+                revisit_interval REAL NOT NULL,
+                next_visit REAL NOT NULL,
+                checks INTEGER NOT NULL DEFAULT 1,
+                changes INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_next_visit ON pages(next_visit)')
+        # 页面内容指纹；canonical非空表示该页面是canonical页面的近似重复
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                simhash INTEGER NOT NULL,
+                canonical TEXT
+            )
+        ''')
+
+        if is_new:
+            self._import_legacy_files(project_name)
+        else:
+            # 崩溃恢复：上次运行中未完成的URL重新入队
+            self._conn.execute('UPDATE urls SET state = ? WHERE state = ?', (QUEUED, LEASED))
+        self.add([base_url], depth=0)
+
+    @contextmanager
+    def _transaction(self):
+        """单个事务内完成多次写入（调用方需持有锁）"""
+        self._conn.execute('BEGIN')
+        try:
+            yield
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+
+    def _import_legacy_files(self, project_name):
+        """首次启动时导入旧版queue.txt/crawled.txt中的进度"""
+        legacy = [
+            (os.path.join(project_name, 'queue.txt'), QUEUED),
+            (os.path.join(project_name, 'crawled.txt'), CRAWLED)
+        ]
+        now = time.time()
+        with self._lock, self._transaction():
+            for path, state in legacy:
+                if not os.path.isfile(path):
+                    continue
+                with open(path, 'rt') as f:
+                    rows = ((line.strip(), state, now) for line in f if line.strip())
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO urls (url, state, updated_at) VALUES (?, ?, ?)', rows
+                    )
+
+    def add(self, urls, depth=0):
+        """添加新URL到队列，返回实际新增的URL（已存在的忽略）"""
+        added = []
+        now = time.time()
+        with self._lock:
+            with self._transaction():
+                for url in urls:
+                    cursor = self._conn.execute(
+                        'INSERT OR IGNORE INTO urls (url, state, depth, updated_at) VALUES (?, ?, ?, ?)',
+                        (url, QUEUED, depth, now)
+                    )
+                    if cursor.rowcount:
+                        added.append(url)
+            self._after_write(len(added))
+        return added
+
+    def lease(self, limit):
+        """按入队顺序取出一批待爬URL，返回 [(url, depth)]"""
+        with self._lock:
+            with self._transaction():
+                rows = self._conn.execute(
+                    'SELECT rowid, url, depth FROM urls WHERE state = ? ORDER BY rowid LIMIT ?', (QUEUED, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    'UPDATE urls SET state = ? WHERE rowid = ?', ((LEASED, row[0]) for row in rows)
+                )
+            self._after_write(len(rows))
+        return [(url, depth) for _, url, depth in rows]
+
+    def mark_crawled(self, url):
+        self._set_state(url, CRAWLED)
+
+    def mark_failed(self, url):
+        self._set_state(url, FAILED)
+
+    def _set_state(self, url, state):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO urls (url, state, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at',
+                (url, state, time.time())
+            )
+            self._after_write(1)
+
+    def is_crawled(self, url):
+        return self._state_of(url) == CRAWLED
+
+    def depth(self, url):
+        with self._lock:
+            row = self._conn.execute('SELECT depth FROM urls WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else 0
+
+    def _state_of(self, url):
+        with self._lock:
+            row = self._conn.execute('SELECT state FROM urls WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def iter_urls(self, batch_size=10000):
+        """分批遍历所有已记录的URL，不会一次性载入内存"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT rowid, url FROM urls WHERE rowid > ? ORDER BY rowid LIMIT ?', (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for _, url in rows:
+                yield url
+
+    def pending_count(self):
+        return self._count(QUEUED)
+
+    def crawled_count(self):
+        return self._count(CRAWLED)
+
+    def _count(self, state):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM urls WHERE state = ?', (state,)).fetchone()[0]
+
+    def clear_pending(self):
+        """清空待爬队列（保留等待重访的已抓取页面）"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM urls WHERE state = ? AND url NOT IN (SELECT url FROM pages)', (QUEUED,)
+            )
+            self._after_write(cursor.rowcount)
+
+    def get_page(self, url):
+        """读取页面上次抓取的校验信息，未抓取过返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, content_hash, fetched_at, revisit_interval, next_visit '
+                'FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('etag', 'last_modified', 'content_hash', 'fetched_at', 'revisit_interval', 'next_visit')
+        return dict(zip(keys, row))
+
+    def record_visit(self, url, etag, last_modified, content_hash, changed, interval):
+        """记录一次抓取结果，并安排下次重访时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO pages (url, etag, last_modified, content_hash, fetched_at, revisit_interval, next_visit) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET '
+                'etag = COALESCE(excluded.etag, etag), '
+                'last_modified = COALESCE(excluded.last_modified, last_modified), '
+                'content_hash = COALESCE(excluded.content_hash, content_hash), '
+                'fetched_at = excluded.fetched_at, '
+                'revisit_interval = excluded.revisit_interval, '
+                'next_visit = excluded.next_visit, '
+                'checks = checks + 1, '
+                'changes = changes + ?',
+                (url, etag, last_modified, content_hash, now, interval, now + interval, int(changed))
+            )
+            self._after_write(1)
+
+    def requeue_due(self, now=None):
+        """将到达重访时间的已抓取页面重新入队，返回入队数量"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE urls SET state = ?, updated_at = ? WHERE state = ? '
+                'AND url IN (SELECT url FROM pages WHERE next_visit <= ?)',
+                (QUEUED, time.time(), CRAWLED, now or time.time())
+            )
+            self._after_write(cursor.rowcount)
+            return cursor.rowcount
+
+    def requeue_modified(self, entries):
+        """
+        站点地图/订阅源给出的lastmod晚于上次抓取时间的已爬页面重新入队，返回入队数量
+        :param entries: [(url, lastmod时间戳)]
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.executemany(
+                'UPDATE urls SET state = ?, updated_at = ? WHERE url = ? AND state = ? '
+                'AND url IN (SELECT url FROM pages WHERE url = ? AND fetched_at < ?)',
+                ((QUEUED, now, url, CRAWLED, url, lastmod) for url, lastmod in entries)
+            )
+            self._after_write(cursor.rowcount)
+            return cursor.rowcount
+
+    def has_pending_revisits(self):
+        """是否还有已入队但未完成的重访页面"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM urls JOIN pages ON pages.url = urls.url WHERE urls.state IN (?, ?) LIMIT 1',
+                (QUEUED, LEASED)
+            ).fetchone()
+        return row is not None
+
+    def record_fingerprint(self, url, fingerprint, canonical=None):
+        """保存页面指纹，近似重复页面同时记录其对应的canonical页面"""
+        # SQLite的INTEGER为有符号64位
+        value = fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO fingerprints (url, simhash, canonical) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET simhash = excluded.simhash, canonical = excluded.canonical',
+                (url, value, canonical)
+            )
+            self._after_write(1)
+
+    def iter_fingerprints(self, batch_size=10000):
+        """分批遍历canonical页面的指纹 (url, fingerprint)"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT rowid, url, simhash FROM fingerprints WHERE rowid > ? AND canonical IS NULL '
+                    'ORDER BY rowid LIMIT ?', (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for _, url, value in rows:
+                yield url, value & ((1 << 64) - 1)
+
+    def clear_fingerprints(self):
+        """删除全部页面指纹（指纹算法变化后旧指纹不可比较）"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM fingerprints')
+            self._after_write(cursor.rowcount)
+
+    def duplicate_count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM fingerprints WHERE canonical IS NOT NULL').fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        """读取与爬取状态一同持久化的附加信息（如计数器）"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO meta (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, json.dumps(value))
+            )
+            self._after_write(1)
+
+    def _after_write(self, count):
+        """累计写入次数，达到阈值后压缩（调用方需持有锁）"""
+        self._writes += count
+        if self._writes >= self.compact_every:
+            self._writes = 0
+            self._compact()
+
+    def _compact(self):
+        self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self._conn.execute('PRAGMA incremental_vacuum')
+
+    def close(self):
+        with self._lock:
+            self._compact()
+            self._conn.close()
@@ -0,0 +1,160 @@
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib import parse
+from domain import get_domain_name
+
+# lxml为可选的更快解析后端
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+# 单次解析的结果：可见文本、同域链接、标题、meta标签
+ParsedPage = namedtuple('ParsedPage', ['text', 'links', 'title', 'meta'])
+
+# 内容不属于可见文本的标签
+SKIP_TAGS = {'script', 'style', 'template'}
+
+
+class PageExtractor(HTMLParser):
+    """一次遍历同时提取可见文本、链接、标题和meta标签"""
+
+    def __init__(self, page_url, domain_name=None):
+        super().__init__(convert_charrefs=True)
+        self.base_url = page_url
+        self.domain_name = domain_name
+        self.texts = []
+        self.links = set()
+        self.title_parts = []
+        self.meta = {}
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self._add_link(href)
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            self._add_meta(dict(attrs))
+        elif tag == 'base':
+            href = dict(attrs).get('href')
+            if href:
+                self.base_url = parse.urljoin(self.base_url, href)
+
+    def handle_startendtag(self, tag, attrs):
+        # 自闭合标签不会进入跳过区域
+        if tag not in SKIP_TAGS:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+        data = data.strip()
+        if data:
+            self.texts.append(data)
+
+    def _add_link(self, href):
+        url = parse.urljoin(self.base_url, href.strip())
+        if self.domain_name is None or get_domain_name(url) == self.domain_name:
+            self.links.add(url)
+
+    def _add_meta(self, attrs):
+        key = attrs.get('name') or attrs.get('property') or attrs.get('http-equiv')
+        if key and 'content' in attrs:
+            self.meta[key.lower()] = attrs['content']
+        elif 'charset' in attrs:
+            self.meta['charset'] = attrs['charset']
+
+    def error(self, message):
+        pass
+
+    def result(self):
+        return ParsedPage(
+            text=' '.join(self.texts),
+            links=self.links,
+            title=''.join(self.title_parts).strip(),
+            meta=self.meta
+        )
+
+
+def _parse_with_html_parser(html, page_url, domain_name):
+    extractor = PageExtractor(page_url, domain_name)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.result()
+
+
+def _parse_with_lxml(html, page_url, domain_name):
+    try:
+        root = lxml.html.fromstring(html)
+    except (ValueError, etree.ParserError):
+        # 带编码声明的字符串或空文档，退回标准库解析器
+        return _parse_with_html_parser(html, page_url, domain_name)
+
+    base_url = page_url
+    for base in root.iter('base'):
+        if base.get('href'):
+            base_url = parse.urljoin(page_url, base.get('href'))
+            break
+
+    # 删除不可见元素（保留其后的文本）后再收集文本
+    etree.strip_elements(root, etree.Comment, *SKIP_TAGS, with_tail=False)
+    texts = [text.strip() for text in root.itertext() if text.strip()]
+
+    links = set()
+    for anchor in root.iter('a'):
+        href = anchor.get('href')
+        if not href:
+            continue
+        url = parse.urljoin(base_url, href.strip())
+        if domain_name is None or get_domain_name(url) == domain_name:
+            links.add(url)
+
+    meta = {}
+    for tag in root.iter('meta'):
+        key = tag.get('name') or tag.get('property') or tag.get('http-equiv')
+        if key and tag.get('content') is not None:
+            meta[key.lower()] = tag.get('content')
+        elif tag.get('charset'):
+            meta['charset'] = tag.get('charset')
+
+    title = root.findtext('.//title') or ''
+    return ParsedPage(text=' '.join(texts), links=links, title=title.strip(), meta=meta)
+
+
+# 可插拔的解析后端：name -> func(html, page_url, domain_name) -> ParsedPage
+BACKENDS = {
+    'html.parser': _parse_with_html_parser
+}
+if lxml is not None:
+    BACKENDS['lxml'] = _parse_with_lxml
+
+
+def register_backend(name, func):
+    """注册自定义解析后端"""
+    BACKENDS[name] = func
+
+
+def extract_page(html, page_url, domain_name=None, backend='html.parser'):
+    """
+    单次解析页面
+    :param domain_name: 只保留该域名下的链接，None表示不过滤
+    :param backend: 解析后端名称，未安装时退回标准库 html.parser
+    """
+    parser = BACKENDS.get(backend, _parse_with_html_parser)
+    return parser(html, page_url, domain_name)
@@ -1,135 +1,375 @@
+import os
 import time
-import random
 import queue
+import signal
 import threading
-from queue import Queue
+import traceback
+import multiprocessing
 from pathlib import Path
 from spider import Spider
 from domain import *
 from general import *
-from configs import CRAWLER_CONFIGS
+from configs import (
+    CRAWLER_CONFIGS, SESSION_POOL, SEEN_SET, ORCHESTRATOR, REVISIT, DEDUP,
+    BULK_INDEXER, ANALYZE, CN_SEGMENTER, STORAGE, RETRY_POLICIES, AIMD, FETCH, SEEDER
+)
 from file_manager import FileManager
+from session_pool import SessionPool
+from scheduler import create_scheduler, LANE_RETRY
+
+def project_dir(config):
+    """站点的数据目录：crawler/<zh|en>/<name>-crawler"""
+    project_root = Path(__file__).parent.parent
+    return str(project_root / 'crawler' / ('zh' if config['language']=='cn' else 'en') / f"{config['name']}-crawler")
+
+
+def create_spider(config, session_pool, **slots):
+    """
+    各引擎共用的Spider构造：全局配置与站点配置合并
+    :param slots: 引擎决定的AIMD槽位参数（initial_slots/max_slots），站点的 'aimd' 配置优先
+    """
+    return Spider(
+        project_dir(config),
+        config['homepage'],
+        get_domain_name(config['homepage']),
+        max_pages=config['max_pages'],
+        language=config['language'],
+        session_pool=session_pool,
+        seen_set_options={**SEEN_SET, **config.get('seen_set', {})},
+        html_backend=config.get('html_backend', 'html.parser'),
+        revisit_options={**REVISIT, **config.get('revisit', {})},
+        dedup_options={**DEDUP, **config.get('dedup', {})},
+        indexer_options={**BULK_INDEXER, **config.get('bulk_indexer', {})},
+        analyze_options={**ANALYZE, **config.get('analyze', {})},
+        segmenter_options={**CN_SEGMENTER, **config.get('cn_segmenter', {})},
+        storage_options={**STORAGE, **config.get('storage', {})},
+        retry_policies={**RETRY_POLICIES, **config.get('retry', {})},
+        concurrency_options={**AIMD, **slots, **config.get('aimd', {})},
+        fetch_options={**FETCH, **config.get('fetch', {})},
+        seed_options={**SEEDER, **config.get('seeder', {})}
+    )
+
+
+def print_spider_status(spider):
+    """各引擎共用的监控输出：计数器、重试、种子、并发控制、近似重复、索引与分词"""
+    counters = spider.counters.snapshot()
+    print(f"  Fetched: {counters['fetched']} | Saved: {counters['saved']} | Updated: {counters['updated']} "
+          f"| Unchanged: {counters['unchanged']} | Indexed: {counters['indexed']} | Skipped: {counters['skipped']} "
+          f"| Failed: {counters['failed']}")
+    retry = spider.retry_queue.stats()
+    print(f"  Retries pending: {retry['pending']} | Scheduled: {retry['scheduled']} "
+          f"| Exhausted: {retry['exhausted']}")
+    if spider.seeder:
+        seeder = spider.seeder.stats()
+        print(f"  Seeds added: {seeder['added']} | Sitemaps/feeds read: {seeder['sources']} "
+              f"| Pending sources: {seeder['pending_sources']} | Errors: {seeder['errors']}")
+    aimd = spider.concurrency.stats()
+    print(f"  Concurrency: {aimd['in_use']}/{aimd['limit']} | Latency p50/p95: {aimd['p50_ms']}/{aimd['p95_ms']}ms "
+          f"| Errors: {aimd['error_rate']:.1%} | Last change: {aimd['last_decision'] or '-'}")
+    dedup = spider.dedup_stats()
+    print(f"  Near-duplicates: {dedup['duplicates']} ({dedup['duplicate_rate']:.1%}) "
+          f"| Fingerprints: {dedup['fingerprints']}")
+    indexer = spider.indexer.stats()
+    print(f"  Index queue: {indexer['queued']} | Batches: {indexer['batches']} | Retried: {indexer['retried']} "
+          f"| Spooled: {indexer['spooled']} | Replayed: {indexer['replayed']}")
+    if spider.text_processor.analyze_client:
+        analyze = spider.text_processor.analyze_client.stats()
+        print(f"  Analyze requests: {analyze['requests']} | Texts: {analyze['texts']} "
+              f"| Latency avg/p95: {analyze['avg_latency_ms']}/{analyze['p95_latency_ms']}ms "
+              f"| Fallback: {analyze['fallback_rate']:.1%}")
+
 
 class CrawlerMaster:
-    def __init__(self, config):
+    def __init__(self, config, connection_limit=None):
         self.config = config
-        project_root = Path(__file__).parent.parent
-        project_name = project_root / 'crawler' / ('zh' if config['language']=='cn' else 'en') / f"{config['name']}-crawler"
-        self.project_name = str(project_name)
+        self.project_name = project_dir(config)
         self.domain_name = get_domain_name(config['homepage'])
-        self.spider = Spider(
-            self.project_name,
-            config['homepage'],
-            self.domain_name,
-            max_pages=config['max_pages'],
-            language=config['language']
+        # 所有工作线程共享同一个长连接池
+        self.session_pool = SessionPool(
+            **{**SESSION_POOL, **config.get('session_pool', {})},
+            connection_limit=connection_limit
         )
-        self.queue = Queue()
+        self.spider = create_spider(config, self.session_pool, initial_slots=config['threads'])
+        # 按主机限速的优先级调度器
+        self.scheduler = create_scheduler(config, self.session_pool)
         self.threads = []
+        # 每次从持久化队列取出的URL数量，限制内存中的队列长度
+        self.batch_size = config.get('queue_batch', 100)
 
     def create_workers(self):
-        # 创建多个线程
-        for _ in range(self.config['threads']):
+        # 按并发上限创建线程，实际同时进行的请求数由AIMD控制器的槽位决定
+        for _ in range(self.spider.concurrency.max_slots):
             t = threading.Thread(target=self.worker, daemon=True)
             t.start()
             self.threads.append(t)
 
     def worker(self):
         # 每个线程从队列中获取 URL
-        while self.spider.crawled_count < self.spider.max_pages:
+        while not self.spider.is_finished():
             try:
-                url = self.queue.get(timeout=10)
-                if url is None:
-                    break
-
+                # 只会取到当前未被限速的主机的URL
+                url = self.scheduler.get(timeout=10)
                 self.spider.crawl_page(threading.current_thread().name, url)
-                self.queue.task_done()
-
-                # 动态限速（不同站点不同速度）
-                # time.sleep(self.config.get('delay', random.uniform(1, 3)))
             except queue.Empty:
                 print(f"{self.config['name']} queue is empty, refilling...")
                 self.refill_queue()
             except Exception as e:
                 print(f"{self.config['name']} worker error: {str(e)}")
-                self.queue.task_done()
 
     # 创建并启动线程池
     def start(self):
+        self.spider.retry_queue.start(self.requeue_retry)   # 到期的重试交回调度器
         self.load_queue()       # 初始化队列
         self.create_workers()   # 创建工作线程
         self.monitor()          # 监控爬虫状态
 
+        # 等待工作线程处理完当前页面，再写出待索引文档
+        for t in self.threads:
+            t.join(timeout=60)
+        self.spider.close()
+
+    def requeue_retry(self, url):
+        """重试到期的URL进入调度器的重试通道，工作线程不会因退避而空等"""
+        self.scheduler.put(url, self.spider.frontier.depth(url), LANE_RETRY)
+
     def load_queue(self):
-        queued = file_to_set(self.spider.queue_file)
-        for url in queued:
-            self.queue.put(url)
+        self.spider.seed_frontier(self.batch_size * 2)
+        for url, depth in self.spider.frontier.lease(self.batch_size):
+            self.scheduler.put(url, depth)
 
     def monitor(self):
-        while self.spider.crawled_count < self.spider.max_pages:
-            remaining = self.spider.max_pages - self.spider.crawled_count
+        while not self.spider.is_finished():
+            remaining = max(self.spider.max_pages - self.spider.crawled_count, 1)
             print(f"[{self.config['name']}] Progress: {self.spider.crawled_count}/{self.spider.max_pages} "
-                  f"| Queue: {self.queue.qsize()}")
+                  f"| Queue: {self.scheduler.qsize()}")
+            print_spider_status(self.spider)
+            scheduler_stats = self.scheduler.stats()
+            print(f"  Throughput: {scheduler_stats['pages_per_sec']} pages/s")
+            for host, stats in scheduler_stats['hosts'].items():
+                print(f"  [{host}] queued: {stats['queued']} | dispatched: {stats['dispatched']} "
+                      f"| avg wait: {stats['avg_wait']}s | max wait: {stats['max_wait']}s")
+            self.print_engine_status()
+            for host, stats in self.session_pool.stats().items():
+                print(f"  [{host}] requests: {stats['requests']} | handshakes: {stats['handshakes']} "
+                      f"| reused: {stats['reused']} | avg fetch: {stats['avg_fetch_ms']}ms")
 
             # 动态调整队列
-            if self.queue.qsize() < remaining * 2:
+            if self.scheduler.qsize() < remaining * 2:
                 self.refill_queue()
 
             time.sleep(5)
 
+    def print_engine_status(self):
+        """引擎特有的监控输出（流水线引擎输出各阶段状态）"""
+
     # 智能队列补充机制
     def refill_queue(self):
-        current_queued = file_to_set(self.spider.queue_file)
-
-        # 添加深度优先补充策略
-        if len(current_queued) < self.config['max_pages'] // 2:
-            print("智能补充种子URL")
-            seed_urls = [
-                self.config['homepage'] + '/hot',
-                self.config['homepage'] + '/explore',
-                self.config['homepage'] + '/roundtable'
-            ]
-            current_queued.update(seed_urls)
+        frontier = self.spider.frontier
+
+        # 待爬URL不足一批时，从robots.txt声明的站点地图和RSS/Atom订阅源补充
+        if frontier.pending_count() < self.batch_size:
+            self.spider.seed_frontier(self.batch_size * 2)
 
         # 添加分页发现逻辑
         if '/page=' in self.config['homepage']:
-            max_page = self.config.get('max_pages', 10)
-            current_page = len(current_queued)
+            current_page = frontier.pending_count()
             new_urls = [f"{self.config['homepage']}?page={i}" for i in range(current_page, current_page + 5)]
-            current_queued.update(new_urls)
+            self.spider._add_new_links(new_urls, depth=1)
 
-        # 写入更新后的队列
-        set_to_file(current_queued, self.spider.queue_file)
+        # 到期的重访页面重新入队
+        self.spider.requeue_due_pages()
 
-        # 加载到内存队列
-        for url in current_queued:
-            if not self.queue.full():
-                self.queue.put(url)
+        # 从持久化队列按批取出，加载到调度器
+        for url, depth in frontier.lease(self.batch_size):
+            self.scheduler.put(url, depth)
 
+def create_master(config, connection_limit=None):
+    """根据配置中的engine选择爬取引擎（thread/async/pipeline）"""
+    engine = config.get('engine', 'thread')
+    if engine == 'async':
+        # 按需导入，线程引擎不依赖aiohttp
+        from async_engine import AsyncCrawlerMaster
+        return AsyncCrawlerMaster(config, connection_limit)
+    if engine == 'pipeline':
+        from pipeline import PipelineCrawlerMaster
+        return PipelineCrawlerMaster(config, connection_limit)
+    return CrawlerMaster(config, connection_limit)
 
-if __name__ == '__main__':
-    masters = []
-    for config in CRAWLER_CONFIGS:
-        master = CrawlerMaster(config)
+
+def _start_master(name, master, progress_queue):
+    try:
         master.start()
-        masters.append(master)
+    except Exception:
+        progress_queue.put((name, 'error', traceback.format_exc()))
+
+
+def _terminate_children(signum, frame):
+    """站点进程被终止时一并终止它创建的进程池工作进程，避免成为孤儿进程"""
+    for child in multiprocessing.active_children():
+        child.terminate()
+    os._exit(1)
+
+
+def run_site_group(configs, progress_queue, connection_limit, report_interval=5):
+    """子进程入口：在同一进程内并发爬取一组站点，并定期上报进度"""
+    signal.signal(signal.SIGTERM, _terminate_children)
+    masters = {}
+    for config in configs:
+        try:
+            masters[config['name']] = create_master(config, connection_limit)
+        except Exception:
+            progress_queue.put((config['name'], 'error', traceback.format_exc()))
+
+    threads = []
+    for name, master in masters.items():
+        t = threading.Thread(target=_start_master, args=(name, master, progress_queue), daemon=True)
+        t.start()
+        threads.append(t)
+
+    while True:
+        running = any(t.is_alive() for t in threads)
+        for name, master in masters.items():
+            progress_queue.put((name, 'progress', {
+                **master.spider.counters.snapshot(),
+                'max_pages': master.spider.max_pages,
+                'queued': master.scheduler.qsize() if master.scheduler else 0
+            }))
+        if not running:
+            break
+        time.sleep(report_interval)
+
+    for name in masters:
+        progress_queue.put((name, 'done', None))
 
+
+class CrawlOrchestrator:
+    """
+    多站点并发爬取：每个站点（或配置了相同 'group' 的一组站点）运行在独立进程中
+    - 所有进程共享一个信号量，限制全局并发连接数
+    - 各进程的进度汇总到同一个队列，由主进程统一输出
+    - 进程崩溃或长时间没有进展时只影响该组站点
+    - 站点进程不是守护进程，流水线引擎可以在其中创建进程池；主进程退出（包括异常和中断）时显式终止仍在运行的站点进程
+    :param max_processes: 同时运行的进程数
+    :param max_connections: 全局并发连接上限
+    :param stall_timeout: 进度停滞多少秒后终止该进程
+    """
+
+    def __init__(self, configs, max_processes=None, max_connections=64, stall_timeout=600, status_interval=10):
+        self.groups = {}
+        for config in configs:
+            self.groups.setdefault(config.get('group', config['name']), []).append(config)
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.max_connections = max_connections
+        self.stall_timeout = stall_timeout
+        self.status_interval = status_interval
+        self.status = {
+            config['name']: {'state': 'pending', 'saved': 0, 'max_pages': config['max_pages'], 'changed': None}
+            for config in configs
+        }
+
+    def run(self):
+        progress_queue = multiprocessing.Queue()
+        connection_limit = multiprocessing.BoundedSemaphore(self.max_connections)
+        pending = list(self.groups.items())
+        running = {}
+        last_report = time.monotonic()
+
+        try:
+            while pending or running:
+                # 启动新的站点进程
+                while pending and len(running) < self.max_processes:
+                    group, configs = pending.pop(0)
+                    process = multiprocessing.Process(
+                        target=run_site_group,
+                        args=(configs, progress_queue, connection_limit),
+                        name=f'crawler-{group}'
+                    )
+                    process.start()
+                    running[group] = process
+                    for config in configs:
+                        self._update(config['name'], state='running', changed=time.monotonic())
+
+                self._drain(progress_queue)
+                self._reap(running)
+
+                if time.monotonic() - last_report >= self.status_interval:
+                    self.print_status()
+                    last_report = time.monotonic()
+        finally:
+            self._terminate(running)
+
+        self._drain(progress_queue, timeout=0)
+        self.print_status()
+
+    @staticmethod
+    def _terminate(running):
+        """终止仍在运行的站点进程（各进程在SIGTERM处理中终止自己的进程池）"""
+        for group, process in running.items():
+            if process.is_alive():
+                print(f"[{group}] terminating")
+                process.terminate()
+        for process in running.values():
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+
+    def _update(self, name, **fields):
+        self.status[name].update(fields)
+
+    def _drain(self, progress_queue, timeout=1):
+        """读取子进程上报的进度"""
+        while True:
+            try:
+                name, kind, payload = progress_queue.get(timeout=timeout)
+            except queue.Empty:
+                return
+            timeout = 0
+
+            if kind == 'progress':
+                if payload['saved'] != self.status[name]['saved']:
+                    self._update(name, changed=time.monotonic())
+                self._update(name, **payload)
+            elif kind == 'error':
+                print(f"[{name}] failed:\n{payload}")
+                self._update(name, state='failed')
+            elif kind == 'done' and self.status[name]['state'] == 'running':
+                self._update(name, state='done')
+
+    def _reap(self, running):
+        """回收已退出的进程，终止长时间没有进展的进程"""
+        now = time.monotonic()
+        for group, process in list(running.items()):
+            names = [config['name'] for config in self.groups[group]]
+            if not process.is_alive():
+                for name in names:
+                    if self.status[name]['state'] == 'running':
+                        self._update(name, state='done' if process.exitcode == 0 else f'crashed({process.exitcode})')
+                del running[group]
+            elif all(now - self.status[name]['changed'] > self.stall_timeout for name in names):
+                print(f"[{group}] no progress for {self.stall_timeout}s, terminating")
+                process.terminate()
+                process.join(5)
+                for name in names:
+                    if self.status[name]['state'] == 'running':
+                        self._update(name, state='stalled')
+                del running[group]
+
+    def print_status(self):
+        print("\n=== Current Status ===")
+        for name, status in self.status.items():
+            print(f"{name}: {status['saved']}/{status['max_pages']} pages "
+                  f"| near-duplicates: {status.get('duplicates', 0)} [{status['state']}]")
+
+
+if __name__ == '__main__':
     try:
-        # 保持主线程运行
-        while any(m.spider.crawled_count < m.spider.max_pages for m in masters):
-            time.sleep(10)
-            print("\n=== Current Status ===")
-            for m in masters:
-                print(f"{m.config['name']}: {m.spider.crawled_count} pages")
-                
+        # 所有站点并发爬取，单个站点失败不影响其他站点
+        CrawlOrchestrator(CRAWLER_CONFIGS, **ORCHESTRATOR).run()
+
     finally:
         # 所有任务完成后执行清理
         print("=== Starting cleanup ===")
         for config in CRAWLER_CONFIGS:
-            project_name = Path(__file__).parent.parent / 'crawler' / f"{'zh' if config['language']=='cn' else 'en'}" / f"{config['name']}-crawler"
-            file_manager = FileManager(project_name)
+            file_manager = FileManager(project_dir(config))
             file_manager.clean_small_files(1)
         print("=== All cleanup operations completed ===")
-
-
-
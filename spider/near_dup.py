@@ -0,0 +1,121 @@
+import re
+import threading
+import numpy as np
+
+FINGERPRINT_BITS = 64
+# 指纹算法版本：算法变化后旧指纹不可比较，frontier中保存的指纹需要清除
+FINGERPRINT_VERSION = 2
+_MASK = (1 << FINGERPRINT_BITS) - 1
+_WHITESPACE = re.compile(r'\s+')
+# shingle多项式哈希的乘数（奇数，uint64运算自然按2^64取模）
+_PRIME = np.uint64(0x100000001b3)
+# 每批处理的shingle数，位矩阵占用 64 × _CHUNK 字节
+_CHUNK = 1 << 16
+
+
+def _mix(x):
+    """splitmix64终结函数：把多项式哈希打散成各位均匀分布的64位哈希"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def shingle_hashes(text, size=5):
+    """字符级shingle（对中英文都适用，不依赖分词）的64位哈希数组，按窗口向量化计算"""
+    text = _WHITESPACE.sub(' ', text).strip().lower()
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    count = max(codes.size - size + 1, 1) if codes.size else 0
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(min(size, codes.size)):
+        hashes = hashes * _PRIME + codes[offset:offset + count]
+    return _mix(hashes)
+
+
+def simhash(text, shingle_size=5):
+    """
+    64位SimHash指纹，相似文本的指纹汉明距离小
+    每个shingle出现一次计一次权重；哈希展开为位矩阵后按列求和，不逐位循环
+    """
+    hashes = shingle_hashes(text, shingle_size)
+    ones = np.zeros(FINGERPRINT_BITS, dtype=np.int64)
+    for start in range(0, hashes.size, _CHUNK):
+        chunk = hashes[start:start + _CHUNK].astype('<u8')
+        bits = np.unpackbits(chunk.view(np.uint8), bitorder='little').reshape(-1, FINGERPRINT_BITS)
+        ones += bits.sum(axis=0, dtype=np.int64)
+    # 第k位：置位的shingle多于未置位的shingle时为1
+    positive = 2 * ones > hashes.size
+    return int.from_bytes(np.packbits(positive, bitorder='little').tobytes(), 'little')
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & _MASK).count('1')
+
+
+class SimHashIndex:
+    """
+    分段查找的SimHash索引
+    指纹被切成 max_distance + 1 段，由鸽巢原理，汉明距离不超过 max_distance 的两个指纹
+    至少有一段完全相同，因此只需比较同段桶里的候选，不用遍历全部指纹
+    :param threshold: 相似度阈值（1 - 汉明距离/64），达到阈值视为近似重复
+    """
+
+    def __init__(self, threshold=0.95):
+        self.max_distance = int((1 - threshold) * FINGERPRINT_BITS)
+        self.bands = self.max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self.bands)
+        self._tables = [{} for _ in range(self.bands)]
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (i * self._band_bits)) & mask for i in range(self.bands)]
+
+    def _find(self, url, fingerprint):
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            for candidate in table.get(key, ()):
+                if candidate != url and hamming_distance(fingerprint, self._fingerprints[candidate]) <= self.max_distance:
+                    return candidate
+        return None
+
+    def _insert(self, url, fingerprint):
+        self._remove(url)
+        self._fingerprints[url] = fingerprint
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            table.setdefault(key, set()).add(url)
+
+    def _remove(self, url):
+        fingerprint = self._fingerprints.pop(url, None)
+        if fingerprint is None:
+            return
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            bucket = table.get(key)
+            if bucket:
+                bucket.discard(url)
+                if not bucket:
+                    del table[key]
+
+    def add(self, url, fingerprint):
+        """直接加入索引（用于启动时从持久化数据恢复）"""
+        with self._lock:
+            self._insert(url, fingerprint)
+
+    def match_or_add(self, url, fingerprint):
+        """
+        查找近似重复页面；没有找到时将该页面加入索引
+        查找与加入在同一把锁内完成，两个并发处理的相似页面只会保留一个
+        :return: 已收录的近似页面URL，或None
+        """
+        with self._lock:
+            canonical = self._find(url, fingerprint)
+            if canonical is None:
+                self._insert(url, fingerprint)
+            else:
+                # 重访后变成重复页面时，不再作为其他页面的canonical
+                self._remove(url)
+            return canonical
+
+    def __len__(self):
+        return len(self._fingerprints)
@@ -0,0 +1,226 @@
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import requests
+from main import CrawlerMaster
+from configs import PIPELINE, ANALYZE, CN_SEGMENTER
+from html_extractor import extract_page
+from retry_queue import RETRY_STATUS, classify_exception
+from text_processor import _init_worker, _process_in_worker
+
+
+class Stage:
+    """
+    流水线中的一个阶段：独立的工作线程从有界队列取出任务交给handler处理，返回值放入下一阶段的队列
+    - 下一阶段队列已满时put阻塞，慢阶段的压力逐级传回抓取阶段
+    - processes为True时阶段带有同样大小的进程池，handler通过call()把CPU密集的纯函数交给子进程执行，绕开GIL
+    - 记录队列深度、平均处理耗时以及等待下一阶段的阻塞时间，用于定位瓶颈阶段
+    :param source: 不使用队列时获取任务的函数（抓取阶段从调度器取URL），超时返回None
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=100, processes=False, initializer=None, initargs=(),
+                 source=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = None if source else queue.Queue(maxsize=queue_size)
+        self.source = source or self._take
+        self.next = None
+        self.pool = None
+        if processes:
+            if multiprocessing.current_process().daemon:
+                # 守护进程不能再创建子进程（CrawlOrchestrator的站点进程不是守护进程，不受影响）
+                print(f'[{name}] running in threads: daemonic processes cannot start a process pool')
+            else:
+                self.pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+        self._threads = []
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'processed': 0, 'errors': 0, 'busy': 0, 'service_time': 0.0, 'blocked_time': 0.0}
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'{self.name}-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def call(self, fn, *args):
+        """在进程池（若有）中执行fn，否则在当前线程执行"""
+        if self.pool is None:
+            return fn(*args)
+        return self.pool.submit(fn, *args).result()
+
+    def _take(self):
+        try:
+            return self.queue.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        while True:
+            item = self.source()
+            if item is None:
+                if self._closing.is_set() and (self.queue is None or self.queue.empty()):
+                    return
+                continue
+
+            with self._lock:
+                self._stats['busy'] += 1
+            start = time.perf_counter()
+            result = None
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f'[{self.name}] error: {str(e)}')
+                with self._lock:
+                    self._stats['errors'] += 1
+            service_time = time.perf_counter() - start
+
+            blocked_time = 0.0
+            if result is not None and self.next is not None:
+                self.next.put(result)
+                blocked_time = time.perf_counter() - start - service_time
+            with self._lock:
+                self._stats['busy'] -= 1
+                self._stats['processed'] += 1
+                self._stats['service_time'] += service_time
+                self._stats['blocked_time'] += blocked_time
+
+    def close(self):
+        """处理完队列中剩余的任务后停止"""
+        self._closing.set()
+        for t in self._threads:
+            t.join()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def stats(self):
+        with self._lock:
+            processed = max(self._stats['processed'], 1)
+            return {
+                'queued': self.queue.qsize() if self.queue is not None else None,
+                'capacity': self.queue.maxsize if self.queue is not None else None,
+                'workers': self.workers,
+                'busy': self._stats['busy'],
+                'processed': self._stats['processed'],
+                'errors': self._stats['errors'],
+                'avg_service_ms': round(self._stats['service_time'] / processed * 1000, 1),
+                'avg_blocked_ms': round(self._stats['blocked_time'] / processed * 1000, 1)
+            }
+
+
+class PipelineCrawlerMaster(CrawlerMaster):
+    """
+    分阶段的爬取引擎：抓取 -> 解析 -> 分词 -> 存储/索引，阶段之间通过有界队列连接
+    - fetch: 按AIMD控制器的上限创建线程，请求完成后立即处理下一个URL，不等待解析和分词
+    - parse: HTML解析，可在进程池中执行
+    - process: 近似重复检测（主进程）与分词（可在进程池中执行）
+    - store: 保存页面、写入索引队列和新链接，frontier等状态只在该阶段和抓取阶段修改
+    各阶段的线程/进程数和队列长度由 'pipeline' 配置决定，监控中输出各阶段的队列深度和处理耗时
+    """
+
+    def __init__(self, config, connection_limit=None):
+        super().__init__(config, connection_limit)
+        options = {name: {**stage, **config.get('pipeline', {}).get(name, {})} for name, stage in PIPELINE.items()}
+        worker_args = (
+            config['language'],
+            {**ANALYZE, **config.get('analyze', {})},
+            {**CN_SEGMENTER, **config.get('cn_segmenter', {})}
+        )
+        self.stages = [
+            Stage('fetch', self.fetch, workers=self.spider.concurrency.max_slots, source=self._next_url),
+            Stage('parse', self.parse, **options['parse']),
+            Stage('process', self.process, **options['process'], initializer=_init_worker, initargs=worker_args),
+            Stage('store', self.store, **options['store'])
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next = next_stage
+        self.fetch_stage, self.parse_stage, self.process_stage, self.store_stage = self.stages
+
+    def create_workers(self):
+        for stage in self.stages:
+            stage.start()
+
+    def start(self):
+        self.spider.retry_queue.start(self.requeue_retry)
+        self.load_queue()
+        self.create_workers()
+        self.monitor()
+
+        # 抓取阶段先停止，其余阶段依次处理完队列中的页面
+        for stage in self.stages:
+            stage.close()
+        self.spider.close()
+
+    def _next_url(self):
+        if self.spider.is_finished():
+            # 等待monitor结束后关闭流水线
+            time.sleep(0.5)
+            return None
+        try:
+            return self.scheduler.get(timeout=10)
+        except queue.Empty:
+            print(f"{self.config['name']} queue is empty, refilling...")
+            self.refill_queue()
+            return None
+
+    def fetch(self, url):
+        spider = self.spider
+        if spider.frontier.is_crawled(url):
+            return None
+        previous = spider.frontier.get_page(url)
+        if spider._reach_crawl_limit() and previous is None:
+            return None
+
+        print(f'{threading.current_thread().name} now crawling {url}')
+        try:
+            result = spider._fetch(url, previous)
+        except requests.exceptions.RequestException as e:
+            print(f'Fetch failed at {url}: {str(e)}')
+            spider.schedule_retry(url, classify_exception(e))
+            return None
+
+        if result.status in RETRY_STATUS:
+            spider.complete_fetch(url, result, previous)
+            return None
+        spider.retry_queue.succeeded(url)
+        content_hash = spider.check_fetched(url, result, previous)
+        if content_hash is None:
+            spider.finish_page()
+            return None
+        return url, result, content_hash, previous
+
+    def parse(self, item):
+        url, result, content_hash, previous = item
+        spider = self.spider
+        page = self.parse_stage.call(extract_page, result.text, url, spider.domain_name, spider.html_backend)
+        # 后续阶段不再需要HTML，释放内存
+        return url, result._replace(text=None), content_hash, previous, page
+
+    def process(self, item):
+        url, result, content_hash, previous, page = item
+        processed = None
+        if not self.spider._is_near_duplicate(url, page.text):
+            if self.process_stage.pool is None:
+                processed = self.spider.text_processor.process_text(page.text)
+            else:
+                processed = self.process_stage.call(_process_in_worker, page.text)
+        return url, result, content_hash, previous, page, processed
+
+    def store(self, item):
+        url, result, content_hash, previous, page, processed = item
+        self.spider.store_page(url, result, content_hash, previous, page, processed)
+        self.spider.finish_page()
+
+    def print_engine_status(self):
+        for stage in self.stages:
+            stats = stage.stats()
+            queued = f"{stats['queued']}/{stats['capacity']}" if stats['queued'] is not None else self.scheduler.qsize()
+            print(f"  [{stage.name}] queue: {queued} | busy: {stats['busy']}/{stats['workers']} "
+                  f"| processed: {stats['processed']} | errors: {stats['errors']} "
+                  f"| avg service: {stats['avg_service_ms']}ms | blocked: {stats['avg_blocked_ms']}ms")
@@ -0,0 +1,56 @@
+"""
+离线重新处理已保存的原始文本（英文使用进程池并行）：
+打包存储（segments/）重写为只含最新记录的新存储；
+.txt存储读取 downloads/original 下的 _org 文件，覆盖 downloads/processed 中对应的文件
+
+用法: python reprocess.py <项目目录> <en|cn> [进程数]
+"""
+import sys
+import time
+from pathlib import Path
+from text_processor import TextProcessor
+from segment_store import SegmentStore
+
+
+def reprocess_segments(project_name, language, workers=None):
+    processor = TextProcessor(language)
+    store = SegmentStore(str(Path(project_name) / 'segments'))
+    try:
+        # 同一个处理器的进程池在所有批次间复用
+        store.compact(lambda records: processor.process_batch([record.original for record in records], workers=workers))
+    finally:
+        processor.close()
+    count = len(store)
+    store.close()
+    return count
+
+
+def reprocess_project(project_name, language, workers=None, batch_size=1000):
+    if (Path(project_name) / 'segments').is_dir():
+        return reprocess_segments(project_name, language, workers)
+
+    download_dir = Path(project_name) / 'downloads'
+    suffix = 'c' if language == 'cn' else 'e'
+    files = sorted((download_dir / 'original').glob('*_org.txt'))
+    processor = TextProcessor(language)
+
+    try:
+        for start in range(0, len(files), batch_size):
+            batch = files[start:start + batch_size]
+            texts = [path.read_text(encoding='utf-8', errors='replace') for path in batch]
+            for path, processed in zip(batch, processor.process_batch(texts, workers=workers)):
+                target = download_dir / 'processed' / (path.name[:-len('_org.txt')] + f'_{suffix}.txt')
+                target.write_text(processed, encoding='utf-8')
+            print(f'{min(start + batch_size, len(files))}/{len(files)} files reprocessed')
+    finally:
+        processor.close()
+    return len(files)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    started = time.perf_counter()
+    count = reprocess_project(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None)
+    elapsed = time.perf_counter() - started
+    print(f'{count} files in {elapsed:.2f}s ({count / max(elapsed, 1e-6):.1f} files/s)')
@@ -0,0 +1,124 @@
+import time
+import heapq
+import random
+import itertools
+import threading
+import requests
+
+# 错误类别
+TIMEOUT = 'timeout'
+CONNECTION = 'connection'
+RATE_LIMITED = 'rate_limited'
+SERVER_ERROR = 'server_error'
+OTHER = 'other'
+
+# 需要重试的响应状态码
+RETRY_STATUS = {408: TIMEOUT, 429: RATE_LIMITED, 500: SERVER_ERROR, 502: SERVER_ERROR,
+                503: SERVER_ERROR, 504: SERVER_ERROR}
+
+
+def classify_exception(exc):
+    """将请求异常归类，决定采用哪种重试策略"""
+    if isinstance(exc, requests.exceptions.Timeout):
+        return TIMEOUT
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return CONNECTION
+    # aiohttp等其他客户端的异常按名称粗略归类，避免在此引入可选依赖
+    name = type(exc).__name__
+    if 'Timeout' in name:
+        return TIMEOUT
+    if 'Connect' in name or 'Disconnect' in name:
+        return CONNECTION
+    return OTHER
+
+
+def parse_retry_after(value):
+    """解析Retry-After头（只支持秒数形式）"""
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """
+    带抖动的指数退避：第n次重试等待 base_delay * 2^(n-1)，不超过max_delay，再乘以 [1-jitter, 1+jitter] 的随机系数
+    :param max_attempts: 包括首次请求在内的最多尝试次数
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=60.0, jitter=0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, attempt, retry_after=None):
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        # 服务器指定了等待时间时至少等待这么久
+        return max(delay, retry_after or 0.0)
+
+
+class DelayedRetryQueue:
+    """
+    基于最小堆的延迟重试队列：工作线程登记重试后立即处理下一个URL，
+    后台线程在到期时调用sink(url)把URL交回调度器
+    """
+
+    def __init__(self, policies=None):
+        self.policies = {name: RetryPolicy(**options) for name, options in (policies or {}).items()}
+        self.default_policy = self.policies.get(OTHER, RetryPolicy())
+        self._heap = []
+        self._seq = itertools.count()
+        self._attempts = {}
+        self._cond = threading.Condition()
+        self._sink = None
+        self._thread = None
+        self._stats = {'scheduled': 0, 'released': 0, 'exhausted': 0}
+
+    def start(self, sink):
+        """设置到期回调并启动后台线程"""
+        self._sink = sink
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, url, error_class, retry_after=None):
+        """
+        登记一次失败
+        :return: 已安排重试时返回等待秒数；达到该类错误的最多尝试次数时返回None
+        """
+        policy = self.policies.get(error_class, self.default_policy)
+        with self._cond:
+            attempt = self._attempts.get(url, 0) + 1
+            if attempt >= policy.max_attempts:
+                self._attempts.pop(url, None)
+                self._stats['exhausted'] += 1
+                return None
+            self._attempts[url] = attempt
+            delay = policy.delay(attempt, retry_after)
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), url))
+            self._stats['scheduled'] += 1
+            self._cond.notify()
+        return delay
+
+    def succeeded(self, url):
+        """URL处理完成后清除其失败次数"""
+        with self._cond:
+            self._attempts.pop(url, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, url = heapq.heappop(self._heap)
+                self._stats['released'] += 1
+            self._sink(url)
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self):
+        with self._cond:
+            return {**self._stats, 'pending': len(self._heap)}
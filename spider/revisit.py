@@ -0,0 +1,22 @@
+class RevisitPolicy:
+    """
+    自适应重访间隔：页面发生变化时缩短间隔，未变化时延长间隔
+    :param initial_interval: 首次抓取后的重访间隔（秒）
+    :param min_interval: 最短重访间隔（秒）
+    :param max_interval: 最长重访间隔（秒）
+    :param shrink: 页面变化时间隔的缩放系数
+    :param grow: 页面未变化时间隔的缩放系数
+    """
+
+    def __init__(self, initial_interval=86400, min_interval=3600, max_interval=30 * 86400, shrink=0.5, grow=1.5):
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.shrink = shrink
+        self.grow = grow
+
+    def next_interval(self, previous_interval, changed):
+        if previous_interval is None:
+            return self.initial_interval
+        interval = previous_interval * (self.shrink if changed else self.grow)
+        return min(max(interval, self.min_interval), self.max_interval)
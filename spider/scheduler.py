@@ -0,0 +1,244 @@
+import time
+import heapq
+import queue
+import itertools
+import threading
+from urllib.parse import urlparse
+
+# 优先级通道：数值越小越优先
+LANE_NEW = 0     # 新发现的URL，按链接深度排序
+LANE_RETRY = 1   # 重试的URL
+
+
+class TokenBucket:
+    """令牌桶：rate为每秒补充的令牌数，burst为桶容量"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """距离下一个可用令牌还需等待的秒数"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class CrawlDelayResolver:
+    """读取robots.txt中的Crawl-delay，按主机缓存"""
+
+    def __init__(self, session_pool, user_agent='*'):
+        self.session_pool = session_pool
+        self.user_agent = user_agent.lower()
+        self._cache = {}
+
+    def __call__(self, url):
+        parts = urlparse(url)
+        host = parts.netloc
+        if host not in self._cache:
+            self._cache[host] = self._fetch(f'{parts.scheme}://{host}/robots.txt')
+        return self._cache[host]
+
+    def _fetch(self, robots_url):
+        try:
+            with self.session_pool.session(robots_url) as session:
+                response = session.get(robots_url, timeout=10)
+            if response.status_code != 200:
+                return None
+            return self._parse(response.text)
+        except Exception as e:
+            print(f'Failed to read {robots_url}: {str(e)}')
+            return None
+
+    def _parse(self, text):
+        """取匹配当前UA（或*）的分组中的Crawl-delay"""
+        delays = {}
+        agents = []
+        in_rules = False
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = (part.strip() for part in line.split(':', 1))
+            key = key.lower()
+            if key == 'user-agent':
+                if in_rules:
+                    agents, in_rules = [], False
+                agents.append(value.lower())
+            else:
+                in_rules = True
+                if key == 'crawl-delay':
+                    try:
+                        delay = float(value)
+                    except ValueError:
+                        continue
+                    for agent in agents:
+                        delays[agent] = delay
+        return delays.get(self.user_agent, delays.get('*'))
+
+
+class _HostQueue:
+    """单个主机的待爬URL与令牌桶"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.items = []
+
+
+class HostScheduler:
+    """
+    按主机限速的优先级调度器，替代单一FIFO队列
+    - 每个主机一个令牌桶，速率来自配置的delay/rate，可选遵守robots.txt的Crawl-delay
+    - 同一主机内按 (通道, 深度, 入队顺序) 出队
+    - 取URL时只考虑当前有令牌的主机，工作线程不会阻塞在被限速的主机上
+    :param delay: 同一主机两次请求的间隔范围 (min, max) 秒，取平均值作为令牌补充速率
+    :param rate: 每个主机每秒请求数，优先于delay
+    :param burst: 令牌桶容量
+    :param crawl_delay: 可调用对象 url -> Crawl-delay秒数或None
+    """
+
+    def __init__(self, delay=None, rate=None, burst=1, crawl_delay=None):
+        if rate is None and delay:
+            low, high = delay if isinstance(delay, (tuple, list)) else (delay, delay)
+            rate = 2 / max(low + high, 1e-6)
+        self.rate = rate
+        self.burst = burst
+        self.crawl_delay = crawl_delay
+
+        self._hosts = {}
+        self._size = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        # 统计信息
+        self._started = time.monotonic()
+        self._dispatched = 0
+        self._host_stats = {}
+
+    def put(self, url, depth=0, lane=LANE_NEW):
+        host = urlparse(url).netloc
+        bucket = None
+        if host not in self._hosts:
+            # 读取Crawl-delay可能涉及网络请求，放在锁外
+            bucket = self._create_bucket(url)
+
+        with self._cond:
+            host_queue = self._hosts.get(host)
+            if host_queue is None:
+                host_queue = self._hosts[host] = _HostQueue(bucket)
+                self._host_stats[host] = {'dispatched': 0, 'wait_time': 0.0, 'max_wait': 0.0}
+            heapq.heappush(host_queue.items, (lane, depth, next(self._seq), time.monotonic(), url))
+            self._size += 1
+            self._cond.notify()
+
+    def _create_bucket(self, url):
+        rate = self.rate
+        if self.crawl_delay is not None:
+            delay = self.crawl_delay(url)
+            if delay:
+                rate = min(rate, 1 / delay) if rate else 1 / delay
+        return TokenBucket(rate, self.burst) if rate else None
+
+    def poll(self):
+        """
+        非阻塞地取出一个URL
+        :return: (url, 0) 或 (None, 最短需等待秒数)；队列为空时等待时间为None
+        """
+        with self._cond:
+            return self._take(time.monotonic())
+
+    def get(self, timeout=None):
+        """阻塞直到某个主机有可用令牌，超时抛出queue.Empty"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                url, wait = self._take(now)
+                if url is not None:
+                    return url
+
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                if wait is None:
+                    wait = remaining
+                elif remaining is not None:
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def _take(self, now):
+        """从有令牌的主机中选出优先级最高的URL（调用方需持有锁）"""
+        best_host, best_item, min_wait = None, None, None
+        for host, host_queue in self._hosts.items():
+            if not host_queue.items:
+                continue
+            wait = host_queue.bucket.wait_time(now) if host_queue.bucket else 0.0
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+            head = host_queue.items[0]
+            if best_item is None or head[:3] < best_item[:3]:
+                best_host, best_item = host, head
+
+        if best_host is None:
+            return None, min_wait
+
+        host_queue = self._hosts[best_host]
+        heapq.heappop(host_queue.items)
+        if host_queue.bucket:
+            host_queue.bucket.consume(now)
+        self._size -= 1
+
+        waited = now - best_item[3]
+        stats = self._host_stats[best_host]
+        stats['dispatched'] += 1
+        stats['wait_time'] += waited
+        stats['max_wait'] = max(stats['max_wait'], waited)
+        self._dispatched += 1
+        return best_item[4], 0
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return self._size == 0
+
+    def stats(self):
+        """吞吐量与各主机的排队等待时间"""
+        with self._cond:
+            elapsed = max(time.monotonic() - self._started, 1e-6)
+            return {
+                'dispatched': self._dispatched,
+                'pages_per_sec': round(self._dispatched / elapsed, 2),
+                'hosts': {
+                    host: {
+                        'queued': len(self._hosts[host].items),
+                        'dispatched': stats['dispatched'],
+                        'avg_wait': round(stats['wait_time'] / stats['dispatched'], 2) if stats['dispatched'] else 0.0,
+                        'max_wait': round(stats['max_wait'], 2)
+                    }
+                    for host, stats in self._host_stats.items()
+                }
+            }
+
+
+def create_scheduler(config, session_pool):
+    """根据站点配置创建调度器：delay/rate控制每个主机的请求速率"""
+    crawl_delay = None
+    if config.get('respect_crawl_delay', True):
+        crawl_delay = CrawlDelayResolver(session_pool)
+    return HostScheduler(
+        delay=config.get('delay'),
+        rate=config.get('rate'),
+        burst=config.get('burst', 1),
+        crawl_delay=crawl_delay
+    )
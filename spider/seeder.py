@@ -0,0 +1,214 @@
+import io
+import time
+import gzip
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, urljoin
+import xml.etree.ElementTree as ET
+
+# 站点地图索引中的子站点地图
+SITEMAP = 'sitemap'
+# 站点地图、RSS或Atom中的页面
+PAGE = 'page'
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _local_name(tag):
+    """去掉XML命名空间：{http://www.sitemaps.org/schemas/sitemap/0.9}url -> url"""
+    return tag.rsplit('}', 1)[-1].lower() if isinstance(tag, str) else ''
+
+
+def parse_lastmod(value):
+    """解析W3C日期（站点地图、Atom）或RFC 822日期（RSS），返回时间戳，无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def iter_entries(stream):
+    """
+    流式解析站点地图、站点地图索引、RSS和Atom，逐条产出 (类型, URL, lastmod时间戳)
+    每处理完一个条目即释放其元素，内存占用与文件大小无关
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        name = _local_name(elem.tag)
+        if name in ('url', 'sitemap'):
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+            if fields.get('loc'):
+                yield (SITEMAP if name == 'sitemap' else PAGE), fields['loc'], parse_lastmod(fields.get('lastmod'))
+        elif name == 'item':
+            # RSS
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+            if fields.get('link'):
+                yield PAGE, fields['link'], parse_lastmod(fields.get('pubdate') or fields.get('date'))
+        elif name == 'entry':
+            # Atom：优先取rel="alternate"（或未指定rel）的链接
+            link, updated = None, None
+            for child in elem:
+                child_name = _local_name(child.tag)
+                if child_name == 'link' and child.get('rel', 'alternate') == 'alternate' and link is None:
+                    link = child.get('href')
+                elif child_name in ('updated', 'published') and updated is None:
+                    updated = parse_lastmod(child.text)
+            if link:
+                yield PAGE, link, updated
+        else:
+            continue
+        # 已处理的条目及时释放
+        elem.clear()
+        if root is not None:
+            root.clear()
+
+
+def robots_sitemaps(text):
+    """robots.txt中的Sitemap指令（与User-agent分组无关）"""
+    sitemaps = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(value.strip())
+    return sitemaps
+
+
+class Seeder:
+    """
+    从站点地图和订阅源为待爬队列补充种子URL
+    - 来源：robots.txt中的Sitemap指令、配置的sitemaps和feeds；都没有时尝试 /sitemap.xml
+    - 站点地图索引展开为子站点地图，按lastmod从新到旧处理；支持gzip压缩的站点地图
+    - 响应流式解析，条目按chunk_size批量交给sink(entries)写入队列，不在内存中保留整个文件
+    - 每次seed()只处理到新增URL达到limit为止，剩余来源留到下次补充；来源耗尽后每隔refresh_interval秒重新读取
+    :param max_sitemaps: 每轮最多读取的站点地图/订阅源数量
+    """
+
+    def __init__(self, session_pool, homepage, sitemaps=(), feeds=(), use_robots=True, max_sitemaps=100,
+                 refresh_interval=3600, chunk_size=1000, timeout=20, headers=None):
+        self.session_pool = session_pool
+        self.homepage = homepage
+        self.sitemaps = list(sitemaps)
+        self.feeds = list(feeds)
+        self.use_robots = use_robots
+        self.max_sitemaps = max_sitemaps
+        self.refresh_interval = refresh_interval
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.headers = headers or {}
+
+        self._sources = None
+        self._visited = set()
+        self._round_started = None
+        self._lock = threading.Lock()
+        self._stats = {'sources': 0, 'entries': 0, 'added': 0, 'errors': 0}
+
+    def seed(self, sink, limit):
+        """
+        处理来源直到新增limit个URL或来源耗尽，返回新增数量；其他线程正在补充时直接返回0
+        :param sink: 接收 [(url, lastmod)] 并返回实际入队数量的函数
+        """
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            if self._sources is None or (not self._sources and self._refresh_due()):
+                self._start_round()
+            added = 0
+            while self._sources and added < limit and len(self._visited) < self.max_sitemaps:
+                added += self._read_source(self._sources.popleft(), sink)
+            return added
+        finally:
+            self._lock.release()
+
+    def _refresh_due(self):
+        return time.monotonic() - self._round_started >= self.refresh_interval
+
+    def _start_round(self):
+        root = '{0.scheme}://{0.netloc}'.format(urlparse(self.homepage))
+        sources = list(self.feeds) + list(self.sitemaps)
+        if self.use_robots:
+            sources += self._robots_sitemaps(root + '/robots.txt')
+        if not sources:
+            sources.append(root + '/sitemap.xml')
+        self._sources = deque(dict.fromkeys(sources))
+        self._visited = set()
+        self._round_started = time.monotonic()
+
+    def _robots_sitemaps(self, robots_url):
+        try:
+            with self.session_pool.session(robots_url) as session:
+                response = session.get(robots_url, headers=self.headers, timeout=self.timeout)
+            return robots_sitemaps(response.text) if response.status_code == 200 else []
+        except Exception as e:
+            print(f'Failed to read {robots_url}: {str(e)}')
+            return []
+
+    def _read_source(self, source_url, sink):
+        """流式读取一个站点地图或订阅源，页面分批交给sink，子站点地图加入待处理来源"""
+        if source_url in self._visited:
+            return 0
+        self._visited.add(source_url)
+        self._stats['sources'] += 1
+
+        added = 0
+        batch = []
+        children = []
+        try:
+            with self.session_pool.session(source_url) as session:
+                with session.get(source_url, headers=self.headers, timeout=self.timeout, stream=True) as response:
+                    if response.status_code != 200:
+                        return 0
+                    for kind, url, lastmod in iter_entries(self._open_stream(response)):
+                        url = urljoin(source_url, url)
+                        if kind == SITEMAP:
+                            children.append((url, lastmod))
+                            continue
+                        self._stats['entries'] += 1
+                        batch.append((url, lastmod))
+                        if len(batch) >= self.chunk_size:
+                            added += sink(batch)
+                            batch = []
+        except Exception as e:
+            print(f'Failed to read {source_url}: {str(e)}')
+            self._stats['errors'] += 1
+        if batch:
+            added += sink(batch)
+
+        # 最近更新的子站点地图优先处理
+        children.sort(key=lambda child: child[1] or 0, reverse=True)
+        self._sources.extendleft(url for url, _ in reversed(children))
+        self._stats['added'] += added
+        print(f'Seeded {added} URLs from {source_url}')
+        return added
+
+    @staticmethod
+    def _open_stream(response):
+        """返回解压后的字节流：Content-Encoding由urllib3处理，.xml.gz等文件本身的gzip按魔数识别"""
+        response.raw.decode_content = True
+        # urllib3默认在读完时关闭流，BufferedReader随后的读取会报 "read of closed file"
+        response.raw.auto_close = False
+        stream = io.BufferedReader(response.raw)
+        if stream.peek(2)[:2] == _GZIP_MAGIC:
+            return gzip.GzipFile(fileobj=stream)
+        return stream
+
+    def stats(self):
+        return {**self._stats, 'pending_sources': len(self._sources or ())}
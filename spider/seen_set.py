@@ -0,0 +1,127 @@
+import os
+import math
+import struct
+import hashlib
+import threading
+
+_HEADER = struct.Struct('<4sIdQQI')     # magic, 层数, 误判率, 初始容量, 内存上限, 保留
+_LAYER = struct.Struct('<QQIQ')         # 容量, 位数, 哈希函数数, 已插入数量
+_MAGIC = b'SBF1'
+
+
+class _BloomLayer:
+    """固定容量的布隆过滤器"""
+
+    def __init__(self, capacity, error_rate, num_bits=None, num_hashes=None, count=0, bits=None):
+        self.capacity = capacity
+        self.num_bits = num_bits or max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = count
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, h1, h2):
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def contains(self, h1, h2):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h1, h2))
+
+    def add(self, h1, h2):
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+
+class SeenSet:
+    """
+    可扩展布隆过滤器实现的已见URL集合
+    每层容量按growth倍增长、误判率按tightening倍收紧，总误判率不超过 error_rate；
+    达到内存上限后不再新增层，此时误判率会逐渐升高，可通过 estimated_error_rate() 观察
+    :param capacity: 第一层容量
+    :param error_rate: 目标误判率
+    :param max_bytes: 内存上限（字节），None表示不限制
+    """
+
+    growth = 2
+    tightening = 0.5
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001, max_bytes=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_bytes = max_bytes
+        self.layers = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, url):
+        h1, h2 = self._hash(url)
+        with self._lock:
+            return any(layer.contains(h1, h2) for layer in self.layers)
+
+    def __len__(self):
+        return sum(layer.count for layer in self.layers)
+
+    def add(self, url):
+        """加入URL，已存在（或误判为存在）时返回False"""
+        h1, h2 = self._hash(url)
+        with self._lock:
+            if any(layer.contains(h1, h2) for layer in self.layers):
+                return False
+            self._writable_layer().add(h1, h2)
+            return True
+
+    @staticmethod
+    def _hash(url):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return h1, h2 | 1
+
+    def _writable_layer(self):
+        if self.layers and self.layers[-1].count < self.layers[-1].capacity:
+            return self.layers[-1]
+
+        index = len(self.layers)
+        layer_error = self.error_rate * (1 - self.tightening) * (self.tightening ** index)
+        candidate = _BloomLayer(self.capacity * self.growth ** index, layer_error)
+        if self.layers and self.max_bytes and self.nbytes() + len(candidate.bits) > self.max_bytes:
+            # 达到内存上限：继续写入最后一层
+            return self.layers[-1]
+        self.layers.append(candidate)
+        return candidate
+
+    def nbytes(self):
+        return sum(len(layer.bits) for layer in self.layers)
+
+    def estimated_error_rate(self):
+        """按各层实际填充量估算当前误判率"""
+        ok = 1.0
+        for layer in self.layers:
+            fill = 1 - math.exp(-layer.num_hashes * layer.count / layer.num_bits)
+            ok *= 1 - fill ** layer.num_hashes
+        return 1 - ok
+
+    def save(self, path):
+        """原子写入到文件"""
+        tmp_path = path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, len(self.layers), self.error_rate,
+                                     self.capacity, self.max_bytes or 0, 0))
+                for layer in self.layers:
+                    f.write(_LAYER.pack(layer.capacity, layer.num_bits, layer.num_hashes, layer.count))
+                    f.write(layer.bits)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, num_layers, error_rate, capacity, max_bytes, _ = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f'Invalid seen-set file: {path}')
+            seen = cls(capacity, error_rate, max_bytes or None)
+            for _ in range(num_layers):
+                layer_capacity, num_bits, num_hashes, count = _LAYER.unpack(f.read(_LAYER.size))
+                bits = bytearray(f.read((num_bits + 7) // 8))
+                seen.layers.append(_BloomLayer(layer_capacity, error_rate, num_bits, num_hashes, count, bits))
+        return seen
@@ -0,0 +1,310 @@
+"""
+打包存储爬取的页面，替代每个URL两个.txt小文件
+
+    <项目目录>/segments/pages.seg   追加写入的记录：[压缩长度 u32][crc32 u32][zlib压缩的记录]
+    <项目目录>/segments/pages.idx   偏移索引：每条 [URL哈希 u64][偏移 u64][记录长度 u32]
+
+同一URL重复写入时追加新记录，索引中后出现的条目覆盖之前的条目
+
+用法: python segment_store.py export <项目目录> <en|cn>   导出为原有的 downloads/*.txt 目录结构
+"""
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from collections import namedtuple
+
+Record = namedtuple('Record', ['url', 'timestamp', 'original', 'processed'])
+
+_HEADER = struct.Struct('<II')          # 压缩后长度, crc32
+_FIELDS = struct.Struct('<dIII')        # 时间戳, URL长度, 原文长度, 处理后文本长度
+_INDEX_ENTRY = struct.Struct('<QQI')    # URL哈希, 偏移, 记录总长度
+
+DATA_FILE = 'pages.seg'
+INDEX_FILE = 'pages.idx'
+
+
+def url_hash(url):
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _encode(record, level):
+    url, original, processed = (value.encode('utf-8') for value in (record.url, record.original, record.processed))
+    payload = zlib.compress(
+        _FIELDS.pack(record.timestamp, len(url), len(original), len(processed)) + url + original + processed,
+        level
+    )
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode(payload):
+    raw = zlib.decompress(payload)
+    timestamp, url_len, original_len, processed_len = _FIELDS.unpack_from(raw)
+    start = _FIELDS.size
+    url = raw[start:start + url_len].decode('utf-8')
+    start += url_len
+    original = raw[start:start + original_len].decode('utf-8')
+    start += original_len
+    processed = raw[start:start + processed_len].decode('utf-8')
+    return Record(url, timestamp, original, processed)
+
+
+def _decode_url(payload):
+    """只解压记录开头的定长字段和URL，不解压原文和处理后文本"""
+    decompressor = zlib.decompressobj()
+    fields = decompressor.decompress(payload, _FIELDS.size)
+    _, url_len, _, _ = _FIELDS.unpack(fields)
+    if not url_len:
+        # max_length为0表示不限长度
+        return ''
+    return decompressor.decompress(decompressor.unconsumed_tail, url_len).decode('utf-8')
+
+
+class SegmentStore:
+    """
+    追加写入的压缩页面存储
+    - 每条记录包含URL、时间戳、原始文本和处理后文本，单独zlib压缩并带crc32校验
+    - 旁路索引按URL哈希记录偏移，启动时载入内存；索引丢失或损坏时扫描数据文件重建
+    - 随机读取通过mmap完成，不需要为每次读取打开文件
+    - 顺序遍历不经过索引，可流式处理任意大小的存储
+    :param readonly: 只读打开（分析服务使用），目录不存在时视为空存储
+    """
+
+    def __init__(self, directory, compress_level=6, readonly=False):
+        self.directory = directory
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.compress_level = compress_level
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        self._index = {}
+        self._mmap = None
+        self._mmap_size = 0
+        if not self.readonly:
+            os.makedirs(self.directory, exist_ok=True)
+            self._data = open(self.data_path, 'ab')
+        self._load_index()
+        if not self.readonly:
+            self._index_file = open(self.index_path, 'ab')
+
+    def _data_size(self):
+        return os.path.getsize(self.data_path) if os.path.isfile(self.data_path) else 0
+
+    def _files_state(self):
+        """索引和数据文件的 (inode, 大小, 修改时间)，用于判断是否有其他进程写入"""
+        state = []
+        for path in (self.index_path, self.data_path):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    def _load_index(self):
+        self._state = self._files_state()
+        data_size = self._data_size()
+        valid = True
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                buffer = f.read()
+            usable = len(buffer) - len(buffer) % _INDEX_ENTRY.size
+            end = 0
+            for key, offset, length in _INDEX_ENTRY.iter_unpack(buffer[:usable]):
+                if offset + length > data_size:
+                    valid = False
+                    break
+                self._index[key] = (offset, length)
+                end = max(end, offset + length)
+            # 数据文件在最后一条索引之后还有完整记录（写索引前中断），需要重建
+            valid = valid and usable == len(buffer) and end == data_size
+        elif data_size:
+            valid = False
+
+        if not valid:
+            self.rebuild_index()
+
+    def rebuild_index(self):
+        """扫描数据文件重建索引，截掉末尾不完整的记录"""
+        self._index = {}
+        entries = []
+        end = 0
+        for offset, length, record in self._scan():
+            key = url_hash(record.url)
+            self._index[key] = (offset, length)
+            entries.append(_INDEX_ENTRY.pack(key, offset, length))
+            end = offset + length
+
+        if self.readonly:
+            return
+        if end < self._data_size():
+            print(f'Truncating incomplete record at {end} in {self.data_path}')
+            self._data.truncate(end)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(entries))
+        os.replace(tmp_path, self.index_path)
+
+    def _scan(self, start=0, decode=_decode):
+        """
+        从start开始按写入顺序读取记录 (偏移, 长度, 记录)，遇到损坏或不完整的记录时停止
+        :param decode: 记录的解码函数，_decode_url时只解出URL
+        """
+        if not os.path.isfile(self.data_path):
+            return
+        with open(self.data_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return
+                payload_len, crc = _HEADER.unpack(header)
+                payload = f.read(payload_len)
+                if len(payload) < payload_len or zlib.crc32(payload) != crc:
+                    return
+                length = _HEADER.size + payload_len
+                yield offset, length, decode(payload)
+                offset += length
+
+    def refresh(self):
+        """只读打开时重新载入索引，读取其他进程新写入的记录；文件未变化时不重新载入"""
+        if self.readonly:
+            with self._lock:
+                if self._files_state() == self._state:
+                    return
+                self._index = {}
+                self._load_index()
+
+    def iter_from(self, offset=0):
+        """
+        增量读取offset之后写入的记录（包括同一URL的旧版本），产出 (下一条记录的偏移, 记录)
+        调用方保存最后的偏移，下次从该位置继续
+        """
+        for record_offset, length, record in self._scan(offset):
+            yield record_offset + length, record
+
+    def put(self, url, original, processed, timestamp=None):
+        """追加一条记录，返回是否成功"""
+        data = _encode(Record(url, timestamp or time.time(), original, processed), self.compress_level)
+        try:
+            with self._lock:
+                offset = self._data.seek(0, os.SEEK_END)
+                self._data.write(data)
+                self._data.flush()
+                key = url_hash(url)
+                self._index_file.write(_INDEX_ENTRY.pack(key, offset, len(data)))
+                self._index_file.flush()
+                self._index[key] = (offset, len(data))
+            return True
+        except OSError as e:
+            print(f'Save failed: {url} - {str(e)}')
+            return False
+
+    def _view(self, end):
+        """返回覆盖到end的mmap，数据文件增长后重新映射"""
+        if self._mmap is None or end > self._mmap_size:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.data_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = len(self._mmap)
+        return self._mmap
+
+    def get(self, url):
+        """按URL随机读取最新记录，不存在时返回None"""
+        with self._lock:
+            location = self._index.get(url_hash(url))
+            if location is None:
+                return None
+            offset, length = location
+            view = self._view(offset + length)
+            payload = view[offset + _HEADER.size:offset + length]
+        record = _decode(payload)
+        # 64位哈希冲突时不返回其他URL的记录
+        return record if record.url == url else None
+
+    def __contains__(self, url):
+        return url_hash(url) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        """流式遍历每个URL的最新记录（按写入顺序）"""
+        for offset, _, record in self._scan():
+            location = self._index.get(url_hash(record.url))
+            if location is not None and location[0] == offset:
+                yield record
+
+    def urls(self):
+        """流式列出每个URL（按写入顺序，与__iter__一致），只解压记录开头的URL"""
+        for offset, _, url in self._scan(decode=_decode_url):
+            location = self._index.get(url_hash(url))
+            if location is not None and location[0] == offset:
+                yield url
+
+    def export_txt(self, file_manager, suffix):
+        """导出为原有的 original/<url>_org.txt 与 processed/<url>_<suffix>.txt 目录结构"""
+        count = 0
+        for record in self:
+            saved = file_manager.save_content(record.url, record.original, 'org')
+            saved = file_manager.save_content(record.url, record.processed, suffix) and saved
+            count += saved
+        return count
+
+    def compact(self, transform=None):
+        """
+        只保留每个URL的最新记录重写存储，可选地用transform(records) -> processed列表重新处理文本
+        写入临时目录后替换，完成前原存储保持可读
+        """
+        tmp_dir = self.directory.rstrip(os.sep) + '.compact'
+        target = SegmentStore(tmp_dir, self.compress_level)
+        batch = []
+        for record in self:
+            batch.append(record)
+            if len(batch) >= 1000:
+                self._copy_batch(target, batch, transform)
+                batch = []
+        self._copy_batch(target, batch, transform)
+        target.close()
+
+        self.close()
+        for name in (DATA_FILE, INDEX_FILE):
+            os.replace(os.path.join(tmp_dir, name), os.path.join(self.directory, name))
+        os.rmdir(tmp_dir)
+        self._open()
+
+    @staticmethod
+    def _copy_batch(target, records, transform):
+        if not records:
+            return
+        processed = transform(records) if transform else [record.processed for record in records]
+        for record, text in zip(records, processed):
+            target.put(record.url, record.original, text, record.timestamp)
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if not self.readonly:
+                self._data.close()
+                self._index_file.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4 or sys.argv[1] != 'export':
+        sys.exit(__doc__)
+    from file_manager import FileManager
+    project_name = sys.argv[2]
+    store = SegmentStore(os.path.join(project_name, 'segments'), readonly=True)
+    exported = store.export_txt(FileManager(project_name), 'c' if sys.argv[3] == 'cn' else 'e')
+    print(f'{exported} pages exported to {os.path.join(project_name, "downloads")}')
@@ -0,0 +1,174 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+import requests.adapters
+from urllib3.util.ssl_ import create_urllib3_context
+
+
+class TLSAdapter(requests.adapters.HTTPAdapter):
+    """兼容旧版服务器TLS重协商的适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        ctx = create_urllib3_context()
+        ctx.options |= 0x4  # OP_LEGACY_SERVER_CONNECT
+        kwargs['ssl_context'] = ctx
+        return super().init_poolmanager(*args, **kwargs)
+
+
+class _HostEntry:
+    """单个主机的会话及统计信息"""
+
+    def __init__(self, session, adapter):
+        self.session = session
+        self.adapter = adapter
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class SessionPool:
+    """
+    按主机划分的长连接会话池，供同一站点的所有工作线程共享
+    :param pool_size: 每个主机保持的最大连接数
+    :param keep_alive: 是否复用TCP/TLS连接
+    :param idle_timeout: 主机会话空闲多少秒后被淘汰
+    :param connection_limit: 跨进程共享的信号量，限制所有站点的并发连接总数
+    """
+
+    def __init__(self, pool_size=10, keep_alive=True, idle_timeout=60, connection_limit=None):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.connection_limit = connection_limit
+        self._hosts = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @contextmanager
+    def session(self, url):
+        """借出目标主机的会话，使用期间不会被淘汰"""
+        host = urlparse(url).netloc
+        if self.connection_limit is not None:
+            self.connection_limit.acquire()
+        try:
+            entry = self._checkout(host)
+        except BaseException:
+            # 创建会话失败时归还连接配额，否则配额会逐渐耗尽
+            if self.connection_limit is not None:
+                self.connection_limit.release()
+            raise
+        try:
+            yield entry.session
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+            if self.connection_limit is not None:
+                self.connection_limit.release()
+
+    def record_latency(self, url, seconds):
+        """记录一次请求耗时"""
+        host = urlparse(url).netloc
+        with self._lock:
+            stats = self._host_stats(host)
+            stats['fetches'] += 1
+            stats['fetch_time'] += seconds
+
+    def _checkout(self, host):
+        with self._lock:
+            self._evict_idle()
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._create_entry()
+                self._hosts[host] = entry
+                self._host_stats(host)['sessions'] += 1
+            entry.in_use += 1
+            entry.last_used = time.monotonic()
+            return entry
+
+    def _create_entry(self):
+        adapter = TLSAdapter(
+            pool_connections=4,  # 同一会话可能跟随重定向到http/https或其他主机
+            pool_maxsize=self.pool_size,
+            pool_block=False
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return _HostEntry(session, adapter)
+
+    def _host_stats(self, host):
+        if host not in self._stats:
+            self._stats[host] = {
+                'sessions': 0, 'evictions': 0, 'fetches': 0, 'fetch_time': 0.0,
+                # 已淘汰会话留下的累计值
+                'closed_requests': 0, 'closed_connections': 0
+            }
+        return self._stats[host]
+
+    def _evict_idle(self):
+        """淘汰空闲超时的主机会话（调用方需持有锁）"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_timeout / 2:
+            return
+        self._last_sweep = now
+
+        for host, entry in list(self._hosts.items()):
+            if entry.in_use == 0 and now - entry.last_used > self.idle_timeout:
+                requests_made, connections = self._pool_counters(entry)
+                stats = self._host_stats(host)
+                stats['closed_requests'] += requests_made
+                stats['closed_connections'] += connections
+                stats['evictions'] += 1
+                entry.session.close()
+                del self._hosts[host]
+
+    @staticmethod
+    def _pool_counters(entry):
+        """从urllib3连接池读取请求数与新建连接数"""
+        requests_made, connections = 0, 0
+        pools = entry.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_made += pool.num_requests
+            connections += pool.num_connections
+        return requests_made, connections
+
+    def stats(self):
+        """
+        返回每个主机的连接复用统计
+        handshakes为新建连接数（HTTPS下即TLS握手次数），reused为复用已有连接的请求数
+        """
+        with self._lock:
+            result = {}
+            for host, stats in self._stats.items():
+                requests_made = stats['closed_requests']
+                connections = stats['closed_connections']
+                entry = self._hosts.get(host)
+                if entry is not None:
+                    live_requests, live_connections = self._pool_counters(entry)
+                    requests_made += live_requests
+                    connections += live_connections
+                fetches = stats['fetches']
+                result[host] = {
+                    'requests': requests_made,
+                    'handshakes': connections,
+                    'reused': max(requests_made - connections, 0),
+                    'evictions': stats['evictions'],
+                    'avg_fetch_ms': round(stats['fetch_time'] / fetches * 1000, 1) if fetches else 0.0
+                }
+            return result
+
+    def close(self):
+        """关闭所有会话"""
+        with self._lock:
+            for entry in self._hosts.values():
+                entry.session.close()
+            self._hosts.clear()
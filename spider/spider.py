@@ -1,155 +1,390 @@
 import os
 import time
 import random
+import hashlib
 import certifi
+from collections import namedtuple
 from urllib import parse
 from datetime import datetime
 from urllib.error import HTTPError
 from urllib.request import urlopen, Request
 from domain import get_domain_name
 from general import *
-from link_finder import LinkFinder
-from bs4 import BeautifulSoup
 import requests
-import requests.adapters
-from urllib3.util.ssl_ import create_urllib3_context
 
 # 导入自定义模块
 from text_processor import TextProcessor
 from es_client import ElasticsearchClient
+from bulk_indexer import BulkIndexer
 from file_manager import FileManager
+from segment_store import SegmentStore
+from session_pool import SessionPool
+from frontier import Frontier
+from seen_set import SeenSet
+from url_normalizer import canonicalize_url
+from html_extractor import extract_page
+from crawl_stats import CrawlCounters
+from revisit import RevisitPolicy
+from near_dup import FINGERPRINT_VERSION, SimHashIndex, simhash
+from retry_queue import DelayedRetryQueue, RETRY_STATUS, classify_exception, parse_retry_after
+from concurrency import AIMDController
+from content_decoder import ContentDecoder
+from seeder import Seeder
+
+# 一次请求的结果：状态码、页面文本，以及用于条件请求的校验头；skipped为被拒绝的非HTML内容类型
+FetchResult = namedtuple(
+    'FetchResult', ['status', 'text', 'etag', 'last_modified', 'retry_after', 'skipped'], defaults=(None, None)
+)
 
 
 class Spider:
-    def __init__(self, project_name, base_url, domain_name, language='en', max_pages=100):
+    def __init__(self, project_name, base_url, domain_name, language='en', max_pages=100, session_pool=None,
+                 seen_set_options=None, html_backend='html.parser', revisit_options=None, dedup_options=None,
+                 indexer_options=None, analyze_options=None, segmenter_options=None, storage_options=None,
+                 retry_policies=None, concurrency_options=None, fetch_options=None, seed_options=None):
         # 基础配置
         self.project_name = project_name
         self.base_url = base_url
         self.domain_name = domain_name
         self.language = language
         self.max_pages = max_pages
-        self.crawled_count = 0
+        self.html_backend = html_backend
+        self.counters = None
 
         # 初始化模块
-        self.text_processor = TextProcessor(language)
+        self.text_processor = TextProcessor(language, analyze_options, segmenter_options)
         self.es_client = ElasticsearchClient()
+        self.indexer_options = indexer_options or {}
+        self.indexer = None
         self.file_manager = FileManager(project_name)
-
-        # 队列管理
-        self.queue_file = f'{project_name}/queue.txt'
-        self.crawled_file = f'{project_name}/crawled.txt'
-        self.queue = set()
-        self.crawled = set()
-
-        # 启动初始化
+        # 页面存储格式：'segment'为打包的压缩存储，'txt'为每个URL两个.txt文件
+        self.storage_options = dict(storage_options or {})
+        self.segment_store = None
+        # 所有工作线程共享的长连接池
+        self.session_pool = session_pool or SessionPool()
+        # 流式获取：过滤非HTML内容、限制正文大小，按声明的编码解码（中文站点未声明时默认GB18030）
+        self.decoder = ContentDecoder(**{'fallback_encoding': 'gb18030' if language == 'cn' else 'utf-8',
+                                         **(fetch_options or {})})
+
+        # 待爬队列不足时从站点地图和RSS/Atom订阅源补充种子
+        seed_options = dict(seed_options or {})
+        self.seeder = None
+        if seed_options.pop('enabled', True):
+            headers = {**self._generate_headers(base_url), 'Accept-Encoding': 'gzip, deflate'}
+            self.seeder = Seeder(self.session_pool, base_url, headers=headers, **seed_options)
+
+        # 队列管理（持久化在 frontier.db 中）
+        self.frontier = None
+
+        # 已见URL集合（布隆过滤器），避免重复入队
+        self.seen_file = os.path.join(project_name, 'seen.bloom')
+        self.seen_set_options = seen_set_options or {}
+        self.seen = None
+        self._seen_saved_at = time.monotonic()
+
+        # 失败的请求进入延迟重试队列，由引擎在到期后交回调度器，工作线程不再原地等待
+        self.retry_queue = DelayedRetryQueue(retry_policies)
+
+        # 自适应并发：按响应延迟和错误率调整同时进行的请求数
+        self.concurrency = AIMDController(**(concurrency_options or {}))
+
+        # 增量重爬：到期页面重新入队，并按变化频率调整重访间隔
+        revisit_options = dict(revisit_options or {})
+        self.revisit_enabled = revisit_options.pop('enabled', False)
+        self.revisit_policy = RevisitPolicy(**revisit_options)
+
+        # 近似重复检测：相似度达到阈值的页面不再存储和索引
+        dedup_options = dict(dedup_options or {})
+        self.dedup_enabled = dedup_options.get('enabled', True)
+        self.dedup_threshold = dedup_options.get('threshold', 0.95)
+        self.shingle_size = dedup_options.get('shingle_size', 5)
+        self.fingerprints = None
+
+        # 启动初始化（首页已写入持久化队列，由工作线程爬取）
         self._boot()
-        self.crawl_page('First spider', self.base_url)
 
     def _boot(self):
         """初始化爬虫环境"""
         create_project_dir(self.project_name)
-        create_data_files(self.project_name, self.base_url)
-        self.queue = file_to_set(self.queue_file)
-        self.crawled = file_to_set(self.crawled_file)
+        self.frontier = Frontier(self.project_name, canonicalize_url(self.base_url))
+        self.seen = self._load_seen_set()
+        self.fingerprints = self._load_fingerprints()
+        self.counters = CrawlCounters(self.frontier.get_meta('counters'))
+        if self.storage_options.get('format', 'segment') == 'segment':
+            self.segment_store = SegmentStore(
+                os.path.join(self.project_name, 'segments'),
+                compress_level=self.storage_options.get('compress_level', 6)
+            )
+        # 后台批量写入ES，ES不可达时暂存到磁盘
+        self.indexer = BulkIndexer(
+            self.es_client,
+            os.path.join(self.project_name, 'es_spool.jsonl'),
+            on_indexed=lambda count: self.counters.incr('indexed', count),
+            **self.indexer_options
+        )
+        self.requeue_due_pages()
+
+    @property
+    def crawled_count(self):
+        """已保存的页面数"""
+        return self.counters.get('saved')
+
+    def is_finished(self):
+        """新页面数量达到上限，且没有待处理的重访页面"""
+        if not self._reach_crawl_limit():
+            return False
+        return not (self.revisit_enabled and self.frontier.has_pending_revisits())
+
+    def requeue_due_pages(self):
+        """将到达重访时间的页面重新加入队列"""
+        if self.revisit_enabled:
+            count = self.frontier.requeue_due()
+            if count:
+                print(f'{count} pages due for revisit')
+
+    def _persist_counters(self):
+        """计数器与爬取状态一同持久化"""
+        self.frontier.set_meta('counters', self.counters.snapshot())
+
+    def _load_seen_set(self):
+        """加载已见URL集合，文件不存在或损坏时从frontier重建"""
+        if os.path.isfile(self.seen_file):
+            try:
+                return SeenSet.load(self.seen_file)
+            except Exception as e:
+                print(f'Failed to load {self.seen_file}, rebuilding: {str(e)}')
+
+        seen = SeenSet(**self.seen_set_options)
+        for url in self.frontier.iter_urls():
+            seen.add(url)
+        return seen
+
+    def _load_fingerprints(self):
+        """从持久化队列恢复canonical页面的指纹索引"""
+        index = SimHashIndex(self.dedup_threshold)
+        if self.frontier.get_meta('fingerprint_version', 1) != FINGERPRINT_VERSION:
+            # 旧算法的指纹与新指纹不可比较
+            self.frontier.clear_fingerprints()
+            self.frontier.set_meta('fingerprint_version', FINGERPRINT_VERSION)
+        if self.dedup_enabled:
+            for url, fingerprint in self.frontier.iter_fingerprints():
+                index.add(url, fingerprint)
+        return index
+
+    def dedup_stats(self):
+        """近似重复检测统计"""
+        duplicates = self.counters.get('duplicates')
+        checked = self.counters.get('saved') + self.counters.get('updated') + duplicates
+        return {
+            'fingerprints': len(self.fingerprints),
+            'duplicates': duplicates,
+            'duplicate_rate': round(duplicates / checked, 3) if checked else 0.0
+        }
 
     def crawl_page(self, thread_name, page_url):
         """核心爬取方法"""
-        if self._reach_crawl_limit():
+        if self.frontier.is_crawled(page_url):
             return
 
-        if page_url not in self.crawled:
-            try:
-                print(f'{thread_name} now crawling {page_url}')
-                html_content, links = self._fetch_and_parse(page_url)
-
-                if html_content:
-                    self._process_content(page_url, html_content)
-                    self._update_crawl_state(page_url, links)
-
-                if self._reach_crawl_limit():
-                    self._clear_queue()
-
-            except Exception as e:
-                print(f'Critical error at {page_url}: {str(e)}')
-                self._handle_crawl_error(page_url)
+        # 达到上限后只继续处理到期重访的页面
+        previous = self.frontier.get_page(page_url)
+        if self._reach_crawl_limit() and previous is None:
+            return
 
-    def _fetch_and_parse(self, page_url):
-        """获取页面内容并解析链接"""
-        session = None
         try:
-            # 创建带TLS指纹的会话
-            session = self._create_secure_session()
-            html_content = self._fetch_content(session, page_url)
-
-            if not html_content:
-                return None, set()
-
-            # 解析链接和保存内容
-            links = self._extract_links(page_url, html_content)
-            return html_content, links
-
-        finally:
-            if session:
-                session.close()
-
-    def _create_secure_session(self):
-        """创建安全会话"""
-
-        class TLSAdapter(requests.adapters.HTTPAdapter):
-            def init_poolmanager(self, *args, **kwargs):
-                ctx = create_urllib3_context()
-                ctx.options |= 0x4  # OP_LEGACY_SERVER_CONNECT
-                kwargs['ssl_context'] = ctx
-                return super().init_poolmanager(*args, **kwargs)
-
-        session = requests.Session()
-        session.mount('https://', TLSAdapter())
-        return session
-
-    def _fetch_content(self, session, page_url):
-        """执行带重试机制的请求"""
-        for attempt in range(3):
+            print(f'{thread_name} now crawling {page_url}')
+            result = self._fetch(page_url, previous)
+            self.complete_fetch(page_url, result, previous)
+
+        except requests.exceptions.RequestException as e:
+            print(f'Fetch failed at {page_url}: {str(e)}')
+            self.schedule_retry(page_url, classify_exception(e))
+
+        except Exception as e:
+            print(f'Critical error at {page_url}: {str(e)}')
+            self._handle_crawl_error(page_url)
+
+    def complete_fetch(self, page_url, result, previous=None):
+        """限流或服务端错误的响应安排重试，其余交给handle_page（供不同爬取引擎共用）"""
+        if result is not None and result.status in RETRY_STATUS:
+            print(f'HTTP {result.status} at {page_url}')
+            self.schedule_retry(page_url, RETRY_STATUS[result.status], result.retry_after)
+            return []
+        self.retry_queue.succeeded(page_url)
+        return self.handle_page(page_url, result, previous)
+
+    def schedule_retry(self, page_url, error_class, retry_after=None):
+        """按错误类别的退避策略安排重试，超过最多尝试次数时记录到error.log"""
+        delay = self.retry_queue.schedule(page_url, error_class, retry_after)
+        if delay is None:
+            print(f'Giving up on {page_url} ({error_class})')
+            self._handle_crawl_error(page_url, error_class)
+            return
+        self.counters.incr('retried')
+        print(f'Retrying {page_url} in {delay:.1f}s ({error_class})')
+
+    def handle_page(self, page_url, result, previous=None):
+        """
+        解析、处理并存储已获取的页面，返回新加入队列的链接（供不同爬取引擎共用）
+        :param result: FetchResult，获取失败时为None
+        :param previous: 页面上次抓取的校验信息，首次抓取为None
+        """
+        new_links = []
+        content_hash = self.check_fetched(page_url, result, previous)
+        if content_hash is not None:
+            # 单次解析同时得到可见文本和同域链接
+            page = extract_page(result.text, page_url, self.domain_name, self.html_backend)
+            # 近似重复页面只记录对应的canonical页面，不做分词、存储和索引
+            processed = None
+            if not self._is_near_duplicate(page_url, page.text):
+                processed = self.text_processor.process_text(page.text)
+            new_links = self.store_page(page_url, result, content_hash, previous, page, processed)
+        self.finish_page()
+        return new_links
+
+    def check_fetched(self, page_url, result, previous=None):
+        """
+        处理不需要解析的结果（非HTML、失败、304、内容未变）
+        :return: 页面为新页面或内容有变化、需要继续解析时返回内容哈希，否则返回None
+        """
+        if result is not None and result.skipped:
+            # 非HTML内容：标记为已爬取，不计为失败
+            self.counters.incr('skipped')
+            self.frontier.mark_crawled(page_url)
+            return None
+
+        if result is None or (result.status != 304 and not result.text):
+            self.counters.incr('failed')
+            return None
+
+        if result.status == 304:
+            # 服务器确认未修改：跳过解析、分词和索引
+            self.counters.incr('unchanged')
+            self.frontier.mark_crawled(page_url)
+            self._record_visit(page_url, result, None, previous, changed=False)
+            return None
+
+        self.counters.incr('fetched')
+        content_hash = hashlib.sha1(result.text.encode('utf-8', 'replace')).hexdigest()
+        if previous is not None and previous['content_hash'] == content_hash:
+            self.counters.incr('unchanged')
+            self.frontier.mark_crawled(page_url)
+            self._record_visit(page_url, result, content_hash, previous, changed=False)
+            return None
+        return content_hash
+
+    def store_page(self, page_url, result, content_hash, previous, page, processed):
+        """
+        保存并索引解析后的页面，将其链接加入队列，返回新增的链接
+        :param page: extract_page的解析结果
+        :param processed: 分词后的文本，近似重复页面为None（不存储、不索引）
+        """
+        if processed is not None:
+            self._store_content(page_url, page.text, processed, is_new=previous is None)
+        new_links = self._update_crawl_state(page_url, page.links)
+        self._record_visit(page_url, result, content_hash, previous, changed=True)
+        return new_links
+
+    def finish_page(self):
+        """每个页面处理结束后持久化计数器，达到上限时清空队列"""
+        self._persist_counters()
+        if self._reach_crawl_limit():
+            self._clear_queue()
+
+    def _record_visit(self, page_url, result, content_hash, previous, changed):
+        """保存校验信息，并根据页面是否变化调整重访间隔"""
+        interval = self.revisit_policy.next_interval(previous['revisit_interval'] if previous else None, changed)
+        self.frontier.record_visit(page_url, result.etag, result.last_modified, content_hash, changed, interval)
+
+    def conditional_headers(self, previous):
+        """根据上次抓取的ETag/Last-Modified生成条件请求头"""
+        headers = {}
+        if previous:
+            if previous['etag']:
+                headers['If-None-Match'] = previous['etag']
+            if previous['last_modified']:
+                headers['If-Modified-Since'] = previous['last_modified']
+        return headers
+
+    def _fetch(self, page_url, previous=None):
+        """获取页面内容"""
+        with self.concurrency.slot():
+            start = time.monotonic()
             try:
-                response = session.get(
-                    page_url,
-                    headers=self._generate_headers(page_url),
-                    timeout=20,
-                    allow_redirects=True,
-                    verify=certifi.where(),
-                    proxies={
-                        'http': None,
-                        'https': None
-                    }
+                # 复用该主机的长连接会话
+                with self.session_pool.session(page_url) as session:
+                    result = self._fetch_content(session, page_url, previous)
+            except requests.exceptions.RequestException:
+                self.concurrency.record(time.monotonic() - start, error=True)
+                raise
+            self.concurrency.record(time.monotonic() - start, error=result.status in RETRY_STATUS)
+            return result
+
+    def _fetch_content(self, session, page_url, previous=None):
+        """执行一次流式请求，请求异常由调用方安排重试"""
+        headers = {**self._generate_headers(page_url), **self.conditional_headers(previous)}
+        with session.get(
+            page_url,
+            headers=headers,
+            timeout=20,
+            allow_redirects=True,
+            verify=certifi.where(),
+            stream=True,
+            proxies={
+                'http': None,
+                'https': None
+            }
+        ) as response:
+            self.session_pool.record_latency(page_url, response.elapsed.total_seconds())
+            etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+            if response.status_code == 304:
+                return FetchResult(304, None, etag, last_modified)
+            if response.status_code in RETRY_STATUS:
+                return FetchResult(
+                    response.status_code, None, etag, last_modified, parse_retry_after(response.headers.get('Retry-After'))
                 )
-                response.encoding = response.apparent_encoding
-                return response.text
 
-            except requests.exceptions.RequestException as e:
-                print(f"Attempt {attempt + 1} failed: {str(e)}")
-                time.sleep(2 ** attempt)
+            # 根据响应头拒绝PDF、图片等非HTML内容，不下载正文
+            content_type = response.headers.get('Content-Type')
+            if not self.decoder.accepts(content_type):
+                return FetchResult(response.status_code, None, etag, last_modified, skipped=content_type)
 
-        print(f"Failed to fetch {page_url} after 3 attempts")
-        return None
+            body, truncated = self.decoder.read(response.iter_content(self.decoder.chunk_size))
+            if truncated:
+                print(f'Truncated {page_url} at {self.decoder.max_bytes} bytes')
+            return FetchResult(response.status_code, self.decoder.decode(body, content_type), etag, last_modified)
 
-    def _process_content(self, url, content):
-        """处理并存储内容"""
-        content = BeautifulSoup(content, 'html.parser').get_text(' ', strip=True)
+    def _store_content(self, url, content, processed_text, is_new=True):
+        """存储页面原始文本与分词结果，并加入索引队列"""
+        # 保存原始内容与处理后的内容
+        saved = self._save_page(url, content, processed_text)
 
-        # 保存原始内容
-        self.file_manager.save_content(url, content, 'org')
-
-        # 处理文本内容
-        processed_text = self.text_processor.process_text(content)
-
-        # 保存处理后的内容
-        suffix = 'c' if self.language == 'cn' else 'e'
-        self.file_manager.save_content(url, processed_text, suffix)
+        # 更新统计计数（每个页面只计一次，不再遍历downloads目录）
+        if saved:
+            self.counters.incr('saved' if is_new else 'updated')
 
         # 索引到Elasticsearch
         self._index_to_es(url, processed_text, content)
 
-        # 更新统计计数
-        self.crawled_count = self.file_manager.get_valid_file_count()
+    def _save_page(self, url, content, processed_text):
+        if self.segment_store is not None:
+            return self.segment_store.put(url, content, processed_text)
+
+        saved = self.file_manager.save_content(url, content, 'org')
+        suffix = 'c' if self.language == 'cn' else 'e'
+        return self.file_manager.save_content(url, processed_text, suffix) and saved
+
+    def _is_near_duplicate(self, url, content):
+        if not self.dedup_enabled:
+            return False
+        fingerprint = simhash(content, self.shingle_size)
+        canonical = self.fingerprints.match_or_add(url, fingerprint)
+        self.frontier.record_fingerprint(url, fingerprint, canonical)
+        if canonical is None:
+            return False
+        print(f'Near-duplicate of {canonical}: {url}')
+        self.counters.incr('duplicates')
+        return True
 
     def _index_to_es(self, url, processed, original):
         """索引文档到Elasticsearch"""
@@ -161,30 +396,9 @@ class Spider:
             "timestamp": datetime.now().isoformat()
         }
 
-        # 重试机制
-        for attempt in range(3):
-            result = self.es_client.index_document(document)
-            if result and result['result'] in ['created', 'updated']:
-                return
-            time.sleep(attempt)
-        print(f"索引失败：{url}")
-        return
-
-    def _extract_links(self, page_url, html_content):
-        """从HTML内容中提取链接"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # 使用LinkFinder提取链接
-        finder = LinkFinder(self.base_url, page_url)
-        finder.feed(html_content)
-        links = finder.page_links()
-
-        # 补充从BeautifulSoup提取的链接
-        for link in soup.find_all('a', href=True):
-            url = parse.urljoin(page_url, link['href'])
-            if get_domain_name(url) == self.domain_name:
-                links.add(url)
-        return links
+        # 以URL哈希作为文档ID，重爬更新时覆盖旧文档；只入队，写入由后台批量完成
+        doc_id = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        self.indexer.add(doc_id, document)
 
     def _generate_headers(self, page_url):
         """生成动态请求头"""
@@ -198,22 +412,66 @@ class Spider:
 
     def _update_crawl_state(self, page_url, links):
         """更新爬取状态"""
-        self.queue.remove(page_url)
-        self.crawled.add(page_url)
-        self._add_new_links(links)
-        self._save_progress()
+        depth = self.frontier.depth(page_url)
+        self.frontier.mark_crawled(page_url)
+        return self._add_new_links(links, depth + 1)
 
-    def _add_new_links(self, links):
-        """将新链接添加到队列"""
+    def _add_new_links(self, links, depth):
+        """规范化后将未见过的同域链接添加到队列，返回实际新增的链接"""
+        unseen = []
         for url in links:
-            if url not in self.queue and url not in self.crawled:
-                if get_domain_name(url) == self.domain_name:
-                    self.queue.add(url)
-
-    def _save_progress(self):
-        """保存当前进度"""
-        set_to_file(self.queue, self.queue_file)
-        set_to_file(self.crawled, self.crawled_file)
+            url = canonicalize_url(url)
+            if get_domain_name(url) == self.domain_name and self.seen.add(url):
+                unseen.append(url)
+
+        added = self.frontier.add(unseen, depth=depth)
+        self._save_seen_set()
+        return added
+
+    def seed_frontier(self, limit):
+        """从站点地图和订阅源补充待爬队列，返回入队的URL数量"""
+        if self.seeder is None:
+            return 0
+        return self.seeder.seed(self._add_seeds, limit)
+
+    def _add_seeds(self, entries):
+        """
+        种子URL按lastmod从新到旧入队；已见过的URL只有在启用重访、且lastmod晚于上次抓取时才重新入队，
+        未变化的页面不再请求
+        """
+        new, known = [], []
+        for url, lastmod in entries:
+            url = canonicalize_url(url)
+            if get_domain_name(url) != self.domain_name:
+                continue
+            if self.seen.add(url):
+                new.append((url, lastmod))
+            elif lastmod is not None and self.revisit_enabled:
+                known.append((url, lastmod))
+
+        new.sort(key=lambda entry: entry[1] or 0, reverse=True)
+        added = self.frontier.add([url for url, _ in new], depth=1)
+        requeued = self.frontier.requeue_modified(known) if known else 0
+        self._save_seen_set()
+        return len(added) + requeued
+
+    def _save_seen_set(self, force=False):
+        """定期持久化已见URL集合（丢失最近的记录只会多一次数据库去重，不会重复爬取）"""
+        now = time.monotonic()
+        if not force and now - self._seen_saved_at < 60:
+            return
+        self._seen_saved_at = now
+        self.seen.save(self.seen_file)
+
+    def close(self):
+        """写出待索引文档并保存爬取状态"""
+        self.indexer.close()
+        self.text_processor.close()
+        if self.segment_store is not None:
+            self.segment_store.close()
+        self._persist_counters()
+        self._save_seen_set(force=True)
+        self.frontier.close()
 
     def _reach_crawl_limit(self):
         """检查是否达到爬取限制"""
@@ -221,29 +479,19 @@ class Spider:
 
     def _clear_queue(self):
         """清空爬取队列"""
-        self.queue.clear()
-        self._save_progress()
+        self.frontier.clear_pending()
+        self._save_seen_set(force=True)
 
-    def _handle_crawl_error(self, page_url):
+    def _handle_crawl_error(self, page_url, reason=None):
         """处理爬取错误"""
-        if page_url in self.queue:
-            self.queue.remove(page_url)
-        self._save_progress()
+        self.frontier.mark_failed(page_url)
+        self.counters.incr('failed')
+        self._persist_counters()
         with open(f'{self.project_name}/error.log', 'a') as f:
-            f.write(f"{datetime.now().isoformat()}|{page_url}\n")
+            f.write(f"{datetime.now().isoformat()}|{page_url}" + (f"|{reason}" if reason else '') + "\n")
 
 
 def create_project_dir(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-
-def create_data_files(project_name, base_url):
-    queue = os.path.join(project_name, 'queue.txt')
-    crawled = os.path.join(project_name, 'crawled.txt')
-    if not os.path.isfile(queue):
-        with open(queue, 'w') as f:
-            f.write(base_url + '\n')
-    if not os.path.isfile(crawled):
-        with open(crawled, 'w') as f:
-            f.write('')
@@ -0,0 +1,69 @@
+import os
+import re
+import sys
+import queue
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analyze_client import AnalyzeClient
+
+
+class FakeResponse:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'tokens': self.tokens}
+
+
+class FakeSession:
+    """
+    模拟IK的偏移行为：数组中每个文本的起始偏移为上一个文本最后一个词元的结尾+1，
+    而不是上一个文本的结尾+1
+    """
+
+    def __init__(self):
+        self.requests = 0
+
+    def post(self, url, json, timeout):
+        self.requests += 1
+        tokens, base = [], 0
+        for text in json['text']:
+            end = 0
+            for match in re.finditer(r'\w+', text):
+                tokens.append({'token': match.group(), 'start_offset': base + match.start(),
+                               'end_offset': base + match.end()})
+                end = match.end()
+            base += end + 1
+        return FakeResponse(tokens)
+
+    def close(self):
+        pass
+
+
+def test_batched_texts_ending_in_punctuation():
+    client = AnalyzeClient(linger=0.05)
+    client.session = FakeSession()
+    texts = ['第一段 结尾。。。', '第二段！  ', '第三段\n\n\n', '末段']
+    assert client.analyze_many(texts) == [['第一段', '结尾'], ['第二段'], ['第三段'], ['末段']]
+    assert client.session.requests == 1
+    client.close()
+
+
+def test_text_containing_sentinel_falls_back_to_single_requests():
+    client = AnalyzeClient(linger=0.05)
+    client.session = FakeSession()
+    texts = ['前 zqxsplitmarkerzqx 后。', '下一段']
+    assert client.analyze_many(texts) == [['前', 'zqxsplitmarkerzqx', '后'], ['下一段']]
+    client.close()
+
+
+def test_wait_timeout_falls_back_to_none():
+    client = AnalyzeClient(wait_timeout=0.2)
+    # 分派线程读取的是原队列，新队列中的片段没有人处理
+    client._queue = queue.Queue()
+    assert client.analyze('无人处理') is None
+    assert client.stats()['fallbacks'] == 1
+    client.close()
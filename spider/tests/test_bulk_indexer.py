@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bulk_indexer import BulkIndexer
+from es_client import ElasticsearchClient
+
+
+class FakeES:
+    def __init__(self, up=True):
+        self.up = up
+        self.indexed = {}
+        self.release = threading.Event()
+        self.release.set()
+
+    def bulk_index(self, items):
+        self.release.wait()
+        if not self.up:
+            raise ConnectionError('down')
+        self.indexed.update(items)
+        return [(201, None)] * len(items)
+
+    def ping(self):
+        return self.up
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_client_construction_does_not_connect():
+    client = ElasticsearchClient('http://127.0.0.1:1')
+    assert client.ping() is False
+
+
+def test_unserializable_document_does_not_stop_indexer(tmp_path):
+    es = FakeES()
+    indexer = BulkIndexer(es, str(tmp_path / 'spool.jsonl'), flush_interval=0.05, queue_size=2)
+    indexer.add('bad', {'value': object()})
+    for i in range(5):
+        indexer.add(str(i), {'url': str(i)})
+    indexer.close()
+    assert sorted(es.indexed) == ['0', '1', '2', '3', '4']
+    assert indexer.stats()['dropped'] == 1
+
+
+def test_spool_replayed_after_recovery(tmp_path):
+    spool_path = str(tmp_path / 'spool.jsonl')
+    es = FakeES(up=False)
+    indexer = BulkIndexer(es, spool_path, flush_interval=0.05, replay_interval=0.1)
+    indexer.add('a', {'url': 'a'})
+    assert wait_for(lambda: os.path.isfile(spool_path))
+
+    # 回放的批次在途时暂存文件不能被删除
+    es.release.clear()
+    es.up = True
+    assert wait_for(lambda: os.path.isfile(spool_path + '.replay'))
+    time.sleep(0.2)
+    assert os.path.isfile(spool_path + '.replay')
+    es.release.set()
+    assert wait_for(lambda: not os.path.isfile(spool_path + '.replay'))
+    indexer.close()
+    assert list(es.indexed) == ['a']
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cn_segmenter import ChineseSegmenter
+
+DICTIONARY = '\n'.join([
+    '北京 100 ns', '北京大学 80 nt', '大学 120 n', '学习 150 v', '自然 60 n', '语言 70 n',
+    '自然语言 30 n', '处理 90 v', '我们 200 r', '在 500 p', '学 40 v', '生命 50 n', '科学 60 n'
+])
+
+
+def make_segmenter(tmp_path):
+    dict_path = tmp_path / 'dict.txt'
+    dict_path.write_text(DICTIONARY, encoding='utf-8')
+    return ChineseSegmenter(str(dict_path), cache_dir=str(tmp_path / 'cache'))
+
+
+def test_cut(tmp_path):
+    segmenter = make_segmenter(tmp_path)
+    assert segmenter.cut('我们在北京大学学习', max_word=False) == ['我们', '在', '北京大学', '学习']
+    assert segmenter.cut('我们在北京大学学习') == ['我们', '在', '北京', '北京大学', '大学', '学习']
+    assert segmenter.cut('Python3.11 发布，生命科学') == ['python3.11', '发', '布', '生命', '科学']
+
+
+def test_cache_round_trip(tmp_path):
+    first = make_segmenter(tmp_path)
+    assert os.listdir(tmp_path / 'cache') == ['dict.txt.cache']
+    second = make_segmenter(tmp_path)
+    assert second.words == first.words
+    assert list(second.counts) == list(first.counts)
+    assert second.total == first.total
+
+
+def test_add_word(tmp_path):
+    segmenter = make_segmenter(tmp_path)
+    segmenter.cut('自然语言处理')
+    segmenter.add_word('语言处理')
+    assert segmenter.word_freq('语言处理') > 0
+    assert segmenter.words == sorted(segmenter.words)
+    assert '语言处理' in segmenter.cut('自然语言处理')
+    # 只是前缀的片段词频为0，不在词典中时返回默认值
+    assert segmenter.word_freq('北京大') == 0
+    assert segmenter.word_freq('上海', 1) == 1
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from content_decoder import ContentDecoder, normalize_encoding
+
+
+def test_latin1_aliases_upgrade_to_cp1252():
+    for label in ('latin-1', 'ISO-8859-1', 'latin1', 'l1', 'us-ascii', 'ascii'):
+        assert normalize_encoding(label) == 'cp1252'
+    assert normalize_encoding('GB2312') == 'gb18030'
+
+
+def test_mislabelled_latin1_page_with_cp1252_characters():
+    body = '<p>“quoted” — caf\xe9</p>'.encode('cp1252')
+    decoder = ContentDecoder()
+    assert decoder.decode(body, 'text/html; charset=latin-1') == '<p>“quoted” — caf\xe9</p>'
+
+
+def test_mislabelled_latin1_page_with_utf8_body():
+    body = '<meta charset="latin-1"><p>caf\xe9 — 中文</p>'.encode('utf-8')
+    decoder = ContentDecoder()
+    assert decoder.decode(body, 'text/html; charset=latin-1') == '<meta charset="latin-1"><p>caf\xe9 — 中文</p>'
+    assert decoder.decode(body, 'text/html') == '<meta charset="latin-1"><p>caf\xe9 — 中文</p>'
@@ -0,0 +1,35 @@
+import os
+import sys
+import random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from near_dup import simhash, hamming_distance, SimHashIndex
+
+
+def random_text(seed, words=3000):
+    rng = random.Random(seed)
+    return ' '.join(''.join(rng.choice('abcdefghijklmnop') for _ in range(6)) for _ in range(words))
+
+
+def test_similar_texts_are_close():
+    text = random_text(1)
+    edited = text[:-300] + ' a short different ending'
+    assert hamming_distance(simhash(text), simhash(edited)) <= 3
+    assert hamming_distance(simhash(text), simhash(random_text(2))) > 10
+
+
+def test_whitespace_and_case_are_normalised():
+    assert simhash('Hello   World\n again') == simhash('hello world again')
+
+
+def test_short_and_empty_texts():
+    assert simhash('') == 0
+    assert 0 <= simhash('abc') < 1 << 64
+    assert simhash('中文内容') != simhash('英文内容')
+
+
+def test_index_finds_near_duplicate():
+    index = SimHashIndex(0.95)
+    text = random_text(3)
+    assert index.match_or_add('a', simhash(text)) is None
+    assert index.match_or_add('b', simhash(text[:-100] + ' tail')) == 'a'
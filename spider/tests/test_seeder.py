@@ -0,0 +1,63 @@
+import os
+import sys
+import gzip
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from seeder import Seeder
+from session_pool import SessionPool
+
+
+def sitemap(urls):
+    entries = ''.join(f'<url><loc>{url}</loc><lastmod>2024-01-01</lastmod></url>' for url in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?>' \
+           f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode()
+
+
+def serve(files):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = files.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_from(files, source):
+    server = serve(files)
+    root = f'http://127.0.0.1:{server.server_port}'
+    seeded = []
+    try:
+        seeder = Seeder(SessionPool(), root + '/', sitemaps=[root + source], use_robots=False)
+        seeder.seed(lambda entries: seeded.extend(entries) or len(entries), limit=10000)
+    finally:
+        server.shutdown()
+    return seeded, seeder.stats()
+
+
+def test_plain_sitemap():
+    urls = [f'http://example.com/{i}' for i in range(5)]
+    seeded, stats = seed_from({'/sitemap.xml': sitemap(urls)}, '/sitemap.xml')
+    assert [url for url, _ in seeded] == urls
+    assert stats['errors'] == 0
+
+
+def test_gzip_sitemap():
+    for count in (5, 3000):
+        urls = [f'http://example.com/{i}' for i in range(count)]
+        seeded, stats = seed_from({'/sitemap.xml.gz': gzip.compress(sitemap(urls))}, '/sitemap.xml.gz')
+        assert [url for url, _ in seeded] == urls
+        assert stats['errors'] == 0
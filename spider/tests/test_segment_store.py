@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from segment_store import SegmentStore
+
+
+def test_urls_match_latest_records(tmp_path):
+    store = SegmentStore(str(tmp_path))
+    store.put('https://example.com/a', 'x' * 200000, 'a b c')
+    store.put('https://example.com/页面', '<html>中文</html>', '中文')
+    store.put('https://example.com/a', 'updated', 'a')
+    store.close()
+
+    reader = SegmentStore(str(tmp_path), readonly=True)
+    assert list(reader.urls()) == [record.url for record in reader]
+    assert list(reader.urls()) == ['https://example.com/页面', 'https://example.com/a']
+    reader.close()
+
+
+def test_urls_empty_store(tmp_path):
+    reader = SegmentStore(str(tmp_path / 'missing'), readonly=True)
+    assert list(reader.urls()) == []
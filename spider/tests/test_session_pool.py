@@ -0,0 +1,22 @@
+import os
+import sys
+import threading
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from session_pool import SessionPool
+
+
+def test_connection_slot_released_when_checkout_fails(monkeypatch):
+    limit = threading.BoundedSemaphore(3)
+    pool = SessionPool(connection_limit=limit)
+
+    def fail():
+        raise RuntimeError('session setup failed')
+
+    monkeypatch.setattr(pool, '_create_entry', fail)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            with pool.session('http://example.com/'):
+                pass
+    assert all(limit.acquire(False) for _ in range(3))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from text_processor import TextProcessor
+
+
+def test_process_batch_reuses_pool():
+    processor = TextProcessor('cn', segmenter_options={'mode': 'local'})
+    texts = [f'中文分词测试第{i}段' for i in range(80)]
+    first = processor.process_batch(texts, workers=2)
+    pool = processor._pool
+    assert processor.process_batch(texts, workers=2) == first
+    assert processor._pool is pool
+    assert first == [processor.process_text(text) for text in texts]
+    processor.close()
+    assert processor._pool is None
@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from url_normalizer import canonicalize_url
+
+
+def test_equivalent_urls_share_canonical_form():
+    assert canonicalize_url('HTTP://Example.COM:80/a/?utm_source=x&b=2&a=1#top') == 'http://example.com/a?a=1&b=2'
+
+
+def test_invalid_port_returned_unchanged():
+    assert canonicalize_url('http://a.com:99999/') == 'http://a.com:99999/'
+    assert canonicalize_url('http://a.com:port/') == 'http://a.com:port/'
+
+
+def test_ipv6_host_keeps_brackets():
+    assert canonicalize_url('http://[::1]:8080/') == 'http://[::1]:8080/'
+    assert canonicalize_url('https://[2001:DB8::1]:443/x/') == 'https://[2001:db8::1]/x'
@@ -1,20 +1,82 @@
 import os
 import re
+import threading
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import nltk
-import requests
 from bs4 import BeautifulSoup
 from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer
 from nltk.tokenize import word_tokenize
+from analyze_client import AnalyzeClient
+from cn_segmenter import ChineseSegmenter
+
+# 英文流水线的正则预先编译，避免每个文档重复查找正则缓存
+_URL = re.compile(r'\b(https?://|www\.)\S+\b')
+_MENTION_OR_TAG = re.compile(r'[@#]\w+')  # @提及与#标签，两次替换合并为一次
+_DIGIT_LETTER = re.compile(r'(?<=\d)(?=[a-zA-Z])|(?<=[a-zA-Z])(?=\d)')  # 数字字母分离，两次替换合并为一次
+_DISALLOWED = re.compile(r"[^a-zA-Z0-9'\-\.]")
+_FALLBACK_TOKEN = re.compile(r"[\w'-]+|[.!?]")
+_SPLIT_APOSTROPHE = re.compile(r"\s+['-]\s+")
+_SPLIT_HYPHEN = re.compile(r'\b(\w+)\s+-\s+(\w+)\b')
+
+# 词干提取时保留原形的常见名词
+COMMON_NOUNS = {'data', 'analysis', 'system'}
+
+# 进程内所有TextProcessor共享的词干缓存（有上限）
+STEM_CACHE_SIZE = 200_000
+_stemmer = PorterStemmer()
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem_word(word):
+    if word in COMMON_NOUNS:
+        return word
+    return _stemmer.stem(word)
+
+
+# process_batch的工作进程中使用的处理器
+_worker_processor = None
+
+
+def _init_worker(language, analyze_options=None, segmenter_options=None):
+    global _worker_processor
+    _worker_processor = TextProcessor(language, analyze_options, segmenter_options)
+
+
+def _process_in_worker(text):
+    return _worker_processor.process_text(text)
 
 
 class TextProcessor:
-    def __init__(self, language):
+    def __init__(self, language, analyze_options=None, segmenter_options=None):
         self.language = language
         self.stemmer = PorterStemmer()
         self._check_nltk_resources()
         self.stopwords = self._load_stopwords()
         self.es_endpoint = "http://localhost:9200"
+        # 中文分词方式：'es'走ES的_analyze接口（失败时用本地分词降级），'local'只用进程内分词
+        segmenter_options = dict(segmenter_options or {})
+        self.cn_mode = segmenter_options.pop('mode', 'es')
+        self.max_word = segmenter_options.pop('max_word', True)
+        self.segmenter_options = segmenter_options
+        self._segmenter = None
+        self._segmenter_lock = threading.Lock()
+        self.analyze_client = None
+        # process_batch的线程池/进程池，首次使用时创建，之后各批次复用（由close()关闭）
+        self._pool = None
+        self._pool_workers = None
+        self._pool_lock = threading.Lock()
+        if language == 'cn' and self.cn_mode == 'es':
+            self.analyze_client = AnalyzeClient(self.es_endpoint, **(analyze_options or {}))
+
+    @property
+    def segmenter(self):
+        """进程内中文分词器，首次使用时加载词典"""
+        with self._segmenter_lock:
+            if self._segmenter is None:
+                self._segmenter = ChineseSegmenter(**self.segmenter_options)
+        return self._segmenter
 
     def _check_nltk_resources(self):
         resources = [
@@ -40,6 +102,49 @@ class TextProcessor:
         except FileNotFoundError:
             return set(stopwords.words(self.language))
 
+    def process_batch(self, texts, workers=None, min_parallel=64):
+        """
+        批量处理文本，结果顺序与输入一致
+        英文为CPU密集型，较大的批次分配到进程池；中文由多个线程并发提交，分词请求会被合并
+        :param min_parallel: 少于该数量时直接在当前进程处理
+        """
+        texts = list(texts)
+        if len(texts) < min_parallel:
+            return [self.process_text(text) for text in texts]
+
+        workers = workers or os.cpu_count() or 1
+        executor = self._get_pool(workers)
+        if self.language == 'cn':
+            return list(executor.map(self.process_text, texts))
+
+        chunksize = max(1, len(texts) // (workers * 4))
+        return list(executor.map(_process_in_worker, texts, chunksize=chunksize))
+
+    def _get_pool(self, workers):
+        """复用已创建的池，避免每批都启动工作进程（加载nltk资源与词典）；进程数变化时重建"""
+        with self._pool_lock:
+            if self._pool is not None and self._pool_workers != workers:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            if self._pool is None:
+                if self.language == 'cn':
+                    self._pool = ThreadPoolExecutor(max_workers=workers)
+                else:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=workers, initializer=_init_worker, initargs=(self.language,)
+                    )
+                self._pool_workers = workers
+            return self._pool
+
+    def close(self):
+        """关闭process_batch的池和ES分词客户端"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+        if self.analyze_client:
+            self.analyze_client.close()
+
     def process_text(self, raw_text):
         if self.language == 'cn':
             return self._process_chinese_text(raw_text)
@@ -49,37 +154,22 @@ class TextProcessor:
     # 中文文本处理流水线
     def _process_chinese_text(self, raw_text):
 
-        try:
-            # 通过ES的_analyze接口进行分词和停用词处理
-            response = requests.post(
-                f"{self.es_endpoint}/_analyze",
-                json={
-                    "analyzer": "ik_max_word",  # 使用IK分词器
-                    "text": raw_text
-                },
-                timeout=5,
-                headers={'Connection': 'close'},  # 明确关闭连接
-                verify=False  # 如果是本地测试可跳过证书验证
-            )
-
-            if response.status_code == 200:
-                # 提取分词结果并过滤
-                tokens = [token['token'] for token in response.json()['tokens']]
-                filtered = [
-                    word for word in tokens
-                    if word.strip() and
-                       word not in self.stopwords and
-                       re.match(r'[\u4e00-\u9fa5]', word)
-                ]
-                return ' '.join(self.deduplicate(filtered))
-            else:
-                print(f"ES分词失败：{response.text}")
-                return ""
-
-        except Exception as e:
-            print(f"ES连接异常：{str(e)}")
-            # 降级方案：使用简易分词
-            return ' '.join(re.findall(r'[\u4e00-\u9fa5]+', raw_text))
+        tokens = None
+        if self.analyze_client:
+            # 通过ES的_analyze接口进行分词，长文本自动切片
+            tokens = self.analyze_client.analyze(raw_text)
+        if tokens is None:
+            # 本地词典分词：ES不可用时的降级方案，或配置为local模式
+            tokens = self.segmenter.cut(raw_text, max_word=self.max_word)
+
+        # 过滤停用词和非中文词元
+        filtered = [
+            word for word in tokens
+            if word.strip() and
+               word not in self.stopwords and
+               re.match(r'[\u4e00-\u9fa5]', word)
+        ]
+        return ' '.join(self.deduplicate(filtered))
 
 
     # 英文文本处理流水线
@@ -87,17 +177,14 @@ class TextProcessor:
 
         # 预处理特殊格式
         text = raw_text.lower()
-        text = re.sub(r'\b(https?://|www\.)\S+\b', ' ', text)  # 移除URL
-        text = re.sub(r'@\w+', ' ', text)  # 移除@提及
-        text = re.sub(r'#\w+', ' ', text)  # 移除标签
+        text = _URL.sub(' ', text)  # 移除URL
+        text = _MENTION_OR_TAG.sub(' ', text)  # 移除@提及和标签
 
-        # 处理技术术语粘连（驼峰命名转换）
-        text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)  # CamelCase -> Camel Case
-        text = re.sub(r'(\d+)([a-zA-Z])', r'\1 \2', text)  # 数字字母分离
-        text = re.sub(r'([a-zA-Z])(\d+)', r'\1 \2', text)
+        # 驼峰命名拆分在小写化之后不会匹配，已去掉；数字字母分离
+        text = _DIGIT_LETTER.sub(' ', text)
 
         # 保留必要标点（如连字符、撇号）
-        text = re.sub(r"[^a-zA-Z0-9'\-\.]", ' ', text)  # 保留基本字符
+        text = _DISALLOWED.sub(' ', text)  # 保留基本字符
 
         # 增强分词处理
         try:
@@ -105,7 +192,7 @@ class TextProcessor:
             tokens = word_tokenize(text, language='english')
         except:
             # 备用分词方案
-            tokens = re.findall(r"[\w'-]+|[.!?]", text)
+            tokens = _FALLBACK_TOKEN.findall(text)
 
         # 智能停用词过滤（保留否定形式）
         filtered = [
@@ -115,20 +202,14 @@ class TextProcessor:
                and not word.isdigit()
         ]
 
-        # 词干提取优化（保留常见名词）
-        common_nouns = {'data', 'analysis', 'system'}  # 自定义保留词表
-        stemmed = []
-        for word in filtered:
-            if word in common_nouns:
-                stemmed.append(word)
-            else:
-                stemmed.append(self.stemmer.stem(word))
+        # 词干提取（带缓存，保留常见名词）
+        stemmed = [stem_word(word) for word in filtered]
 
         # 后处理修正
         stemmed = self.deduplicate(stemmed)
         processed = ' '.join(stemmed)
-        processed = re.sub(r"\s+['-]\s+", '', processed)  # 修复分离的撇号
-        processed = re.sub(r'\b(\w+)\s+-\s+(\w+)\b', r'\1-\2', processed)  # 恢复连字符单词
+        processed = _SPLIT_APOSTROPHE.sub('', processed)  # 修复分离的撇号
+        processed = _SPLIT_HYPHEN.sub(r'\1-\2', processed)  # 恢复连字符单词
 
         return processed
 
@@ -0,0 +1,47 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'igshid', 'mc_cid', 'mc_eid',
+    'spm', 'spm_id_from', 'share_source', 'share_medium', 'share_plat', 'vd_source', 'from_spmid',
+    'ref', 'ref_src', 'ref_url', '_hsenc', '_hsmi'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_')
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def canonicalize_url(url):
+    """
+    URL规范化，使指向同一页面的不同写法得到相同结果：
+    协议和主机名小写、去掉默认端口和片段、去掉跟踪参数、参数排序、去掉末尾斜杠
+    """
+    # 端口不是合法数字或超出范围时parts.port抛出ValueError，原样返回
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        # hostname去掉了IPv6地址的方括号
+        host = f'[{host}]'
+    if port and str(port) != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{port}'
+    if parts.username:
+        userinfo = parts.username + (f':{parts.password}' if parts.password else '')
+        host = f'{userinfo}@{host}'
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))